@@ -0,0 +1,367 @@
+import argparse
+import copy
+import json
+import math
+from collections import Counter
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from analisadores import selecionar_analisadores
+from leitura_antecipada import ler_imagens_antecipadas
+
+LIMITE_CATEGORIAS = 256  # valores distintos por coluna de texto antes de virar "texto livre"
+
+class Welford:
+    """
+    Média/variância em streaming (Welford), combinável entre processos (Chan)
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+
+    def atualizar(self, valores):
+        valores = np.atleast_1d(np.asarray(valores, dtype=np.float64))
+        if len(valores) == 0:
+            return
+        parcial = Welford()
+        parcial.n = len(valores)
+        parcial.media = float(np.mean(valores))
+        parcial.m2 = float(np.sum((valores - parcial.media) ** 2))
+        parcial.minimo = float(valores.min())
+        parcial.maximo = float(valores.max())
+        self.combinar(parcial)
+
+    def combinar(self, outro):
+        if outro.n == 0:
+            return self
+        n = self.n + outro.n
+        delta = outro.media - self.media
+        self.media += delta * outro.n / n
+        self.m2 += outro.m2 + delta ** 2 * self.n * outro.n / n
+        self.n = n
+        self.minimo = min(self.minimo, outro.minimo)
+        self.maximo = max(self.maximo, outro.maximo)
+        return self
+
+    @property
+    def variancia(self):
+        return self.m2 / self.n if self.n else 0.0
+
+    @property
+    def desvio(self):
+        return math.sqrt(self.variancia)
+
+    def para_dict(self):
+        return {'n': self.n, 'media': self.media, 'm2': self.m2, 'minimo': self.minimo, 'maximo': self.maximo}
+
+    @classmethod
+    def de_dict(cls, dados):
+        acumulador = cls()
+        acumulador.__dict__.update(dados)
+        return acumulador
+
+class DigestQuantis:
+    """
+    Quantis aproximados no estilo t-digest (centroides de média/peso)
+
+    Centroides perto das caudas ficam pequenos (escala arcsen), então os
+    percentis extremos são mais precisos que os centrais. Dois digests se
+    combinam juntando os centroides e comprimindo de novo.
+    """
+
+    def __init__(self, compressao=100):
+        self.compressao = compressao
+        self.medias = np.empty(0)
+        self.pesos = np.empty(0)
+        self.buffer = []
+        self.minimo = math.inf
+        self.maximo = -math.inf
+
+    def atualizar(self, valores):
+        valores = np.atleast_1d(np.asarray(valores, dtype=np.float64))
+        if len(valores) == 0:
+            return
+        self.minimo = min(self.minimo, float(valores.min()))
+        self.maximo = max(self.maximo, float(valores.max()))
+        self.buffer.append(valores)
+        if sum(len(b) for b in self.buffer) > 5 * self.compressao:
+            self._comprimir()
+
+    def _escala(self, q):
+        return self.compressao / (2 * math.pi) * np.arcsin(2 * np.clip(q, 0, 1) - 1)
+
+    def _comprimir(self, medias_extra=None, pesos_extra=None):
+        medias = [self.medias] + self.buffer
+        pesos = [self.pesos] + [np.ones(len(b)) for b in self.buffer]
+        if medias_extra is not None:
+            medias.append(medias_extra)
+            pesos.append(pesos_extra)
+        self.buffer = []
+
+        medias = np.concatenate(medias)
+        pesos = np.concatenate(pesos)
+        if len(medias) == 0:
+            return
+
+        ordem = np.argsort(medias, kind='stable')
+        medias, pesos = medias[ordem], pesos[ordem]
+        total = pesos.sum()
+
+        novas_medias, novos_pesos = [], []
+        media_atual, peso_atual = medias[0], pesos[0]
+        acumulado = 0.0
+        limite = self._escala(0.0) + 1
+
+        for media, peso in zip(medias[1:], pesos[1:]):
+            if self._escala((acumulado + peso_atual + peso) / total) <= limite:
+                # Cabe no centroide atual
+                peso_atual += peso
+                media_atual += (media - media_atual) * peso / peso_atual
+            else:
+                novas_medias.append(media_atual)
+                novos_pesos.append(peso_atual)
+                acumulado += peso_atual
+                limite = self._escala(acumulado / total) + 1
+                media_atual, peso_atual = media, peso
+
+        novas_medias.append(media_atual)
+        novos_pesos.append(peso_atual)
+        self.medias = np.array(novas_medias)
+        self.pesos = np.array(novos_pesos)
+
+    def combinar(self, outro):
+        # Centroides e buffer do outro entram como estão: o outro não é alterado
+        medias = np.concatenate([outro.medias, *outro.buffer])
+        pesos = np.concatenate([outro.pesos, np.ones(len(medias) - len(outro.medias))])
+        self.minimo = min(self.minimo, outro.minimo)
+        self.maximo = max(self.maximo, outro.maximo)
+        self._comprimir(medias, pesos)
+        return self
+
+    def quantil(self, q):
+        """Quantil q em [0, 1] por interpolação entre os centros dos centroides"""
+        if self.buffer:
+            self._comprimir()
+        if len(self.medias) == 0:
+            return math.nan
+
+        total = self.pesos.sum()
+        # Posição (em peso acumulado) do centro de cada centroide
+        centros = np.cumsum(self.pesos) - self.pesos / 2
+        posicoes = np.concatenate([[0.0], centros, [total]])
+        valores = np.concatenate([[self.minimo], self.medias, [self.maximo]])
+        return float(np.interp(q * total, posicoes, valores))
+
+    def para_dict(self):
+        self._comprimir()
+        return {'compressao': self.compressao, 'medias': self.medias.tolist(), 'pesos': self.pesos.tolist(),
+                'minimo': self.minimo, 'maximo': self.maximo}
+
+    @classmethod
+    def de_dict(cls, dados):
+        digest = cls(dados['compressao'])
+        digest.medias = np.array(dados['medias'])
+        digest.pesos = np.array(dados['pesos'])
+        digest.minimo = dados['minimo']
+        digest.maximo = dados['maximo']
+        return digest
+
+class ContagemCategorias:
+    """
+    Contagem exata de categorias (ex.: nomes de cor), combinável por soma
+
+    Vocabulários pequenos (classificações, nomes de cor) cabem inteiros.
+    Colunas de texto livre ("[245, 204, 110]", thresholds) teriam um
+    valor por imagem: passando de 'limite' valores distintos a contagem
+    por valor é descartada e só o total fica, então a memória é de no
+    máximo 'limite' chaves por coluna.
+    """
+
+    def __init__(self, limite=LIMITE_CATEGORIAS):
+        self.limite = limite
+        self.valores = Counter()
+        self.total = 0
+        self.excedeu = False
+
+    def _conferir_limite(self):
+        if len(self.valores) > self.limite:
+            self.valores.clear()
+            self.excedeu = True
+
+    def atualizar(self, chave, quantidade=1):
+        self.total += quantidade
+        if not self.excedeu:
+            self.valores[str(chave)] += quantidade
+            self._conferir_limite()
+
+    def combinar(self, outro):
+        self.total += outro.total
+        self.excedeu = self.excedeu or outro.excedeu
+        if self.excedeu:
+            self.valores.clear()
+        else:
+            self.valores.update(outro.valores)
+            self._conferir_limite()
+        return self
+
+    def contagens(self):
+        return dict(sorted(self.valores.items()))
+
+    def para_dict(self):
+        return {'limite': self.limite, 'valores': dict(self.valores), 'total': self.total, 'excedeu': self.excedeu}
+
+    @classmethod
+    def de_dict(cls, dados):
+        contagem = cls(dados['limite'])
+        contagem.valores = Counter(dados['valores'])
+        contagem.total = dados['total']
+        contagem.excedeu = dados['excedeu']
+        return contagem
+
+class ResumoStreaming:
+    """
+    Resumo combinável das saídas dos analisadores, linha a linha
+
+    Colunas numéricas ganham Welford + digest de quantis; colunas de texto
+    (classificações, nomes de cor) ganham uma contagem exata. Nenhuma
+    linha é guardada: só os acumuladores.
+    """
+
+    def __init__(self):
+        self.numericas = {}
+        self.categoricas = {}
+
+    def atualizar(self, linha):
+        for coluna, valor in linha.items():
+            if coluna == 'nome' or valor is None:
+                continue
+            if isinstance(valor, (bool, np.bool_)):
+                valor = str(valor)
+            if isinstance(valor, (int, float, np.integer, np.floating)):
+                if math.isnan(valor):
+                    continue
+                if coluna not in self.numericas:
+                    self.numericas[coluna] = (Welford(), DigestQuantis())
+                for acumulador in self.numericas[coluna]:
+                    acumulador.atualizar(valor)
+            elif isinstance(valor, str):
+                self.categoricas.setdefault(coluna, ContagemCategorias()).atualizar(valor)
+
+    def combinar(self, outro):
+        for coluna, (welford, digest) in outro.numericas.items():
+            if coluna in self.numericas:
+                self.numericas[coluna][0].combinar(welford)
+                self.numericas[coluna][1].combinar(digest)
+            else:
+                # Cópia: combinar depois não pode alterar os acumuladores do outro
+                self.numericas[coluna] = copy.deepcopy((welford, digest))
+        for coluna, contagem in outro.categoricas.items():
+            if coluna in self.categoricas:
+                self.categoricas[coluna].combinar(contagem)
+            else:
+                self.categoricas[coluna] = copy.deepcopy(contagem)
+        return self
+
+    def tabela_numerica(self):
+        linhas = []
+        for coluna, (welford, digest) in self.numericas.items():
+            linhas.append({
+                'coluna': coluna,
+                'n': welford.n,
+                'media': round(welford.media, 3),
+                'desvio': round(welford.desvio, 3),
+                'min': welford.minimo,
+                'p25': round(digest.quantil(0.25), 3),
+                'p50': round(digest.quantil(0.50), 3),
+                'p75': round(digest.quantil(0.75), 3),
+                'max': welford.maximo,
+            })
+        return pd.DataFrame(linhas)
+
+    def tabela_categorica(self):
+        linhas = []
+        for coluna, contagens in self.categoricas.items():
+            if contagens.excedeu:
+                linhas.append({'coluna': coluna, 'categoria': f"(mais de {contagens.limite} valores distintos)",
+                               'contagem': contagens.total})
+                continue
+            for categoria, contagem in contagens.contagens().items():
+                linhas.append({'coluna': coluna, 'categoria': categoria, 'contagem': contagem})
+        return pd.DataFrame(linhas)
+
+    def salvar(self, arquivo):
+        dados = {
+            'numericas': {c: [w.para_dict(), d.para_dict()] for c, (w, d) in self.numericas.items()},
+            'categoricas': {c: s.para_dict() for c, s in self.categoricas.items()},
+        }
+        Path(arquivo).write_text(json.dumps(dados), encoding='utf-8')
+
+    @classmethod
+    def carregar(cls, arquivo):
+        dados = json.loads(Path(arquivo).read_text(encoding='utf-8'))
+        resumo = cls()
+        resumo.numericas = {c: (Welford.de_dict(w), DigestQuantis.de_dict(d))
+                            for c, (w, d) in dados['numericas'].items()}
+        resumo.categoricas = {c: ContagemCategorias.de_dict(s) for c, s in dados['categoricas'].items()}
+        return resumo
+
+def resumir_pasta(caminho_pasta, analisadores=None):
+    """
+    Roda os analisadores e alimenta um resumo por analisador, sem guardar linhas
+    """
+    selecionados = selecionar_analisadores(analisadores)
+    resumos = {nome: ResumoStreaming() for nome in selecionados}
+    arquivos = sorted(Path(caminho_pasta).glob("*.TIF"))
+
+    for arquivo, img, erro in ler_imagens_antecipadas(arquivos):
+        if erro is not None:
+            print(f"❌ {arquivo.name}: {erro}")
+            continue
+        for nome, (funcao, _) in selecionados.items():
+            try:
+                resultado = funcao(img, arquivo.name)
+                if resultado is not None:
+                    resumos[nome].atualizar(resultado)
+            except Exception as e:
+                print(f"❌ {arquivo.name} [{nome}]: {e}")
+
+    return resumos
+
+def combinar_resumos(arquivos):
+    """
+    Soma resumos parciais salvos (por pasta, processo ou máquina)
+    """
+    total = ResumoStreaming()
+    for arquivo in arquivos:
+        total.combinar(ResumoStreaming.carregar(arquivo))
+    return total
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resumos combináveis das saídas dos analisadores")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_resumir = sub.add_parser('resumir', help="gera resumos parciais de uma pasta")
+    p_resumir.add_argument('caminho')
+    p_resumir.add_argument('--analisadores', nargs='+', default=['densidade', 'tracos', 'histograma'])
+
+    p_combinar = sub.add_parser('combinar', help="combina resumos parciais (.json)")
+    p_combinar.add_argument('arquivos', nargs='+')
+    p_combinar.add_argument('--prefixo', default='resumo_total')
+    args = parser.parse_args()
+
+    if args.comando == 'resumir':
+        pasta = Path(args.caminho)
+        for nome, resumo in resumir_pasta(pasta, args.analisadores).items():
+            arquivo = f"resumo_{pasta.name}_{nome}.json"
+            resumo.salvar(arquivo)
+            print(f"💾 Salvo: {arquivo}")
+    else:
+        total = combinar_resumos(args.arquivos)
+        print(total.tabela_numerica().to_string(index=False))
+        total.tabela_numerica().to_csv(f"{args.prefixo}_numerico.csv", index=False)
+        total.tabela_categorica().to_csv(f"{args.prefixo}_categorias.csv", index=False)
+        print(f"\n💾 Salvo: {args.prefixo}_numerico.csv, {args.prefixo}_categorias.csv")
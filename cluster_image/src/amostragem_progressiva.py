@@ -0,0 +1,355 @@
+import time
+import cv2
+import numpy as np
+from pathlib import Path
+import pandas as pd
+from upload import carregar_imagem
+from conversao_cores import converter_compartilhado
+from histograma_matiz import histograma_matiz
+from histograma_cores import definir_faixas_cores, contar_pixels_por_cor, mascaras_contagem
+from densidade_saturacao import analisar_densidade_saturacao, mascaras_densidade
+
+Z_95 = 1.959964
+
+def _indicadores(h, s, v):
+    """
+    Métricas de contar_pixels_por_cor e analisar_densidade_saturacao por pixel amostrado
+
+    Cada métrica de proporção é (numerador, denominador) em máscaras
+    booleanas, montadas com as máscaras das próprias funções originais.
+    """
+    contagem = mascaras_contagem(s, v)
+    densidade = mascaras_densidade(s, v)
+    valido = contagem['valido']
+    todos = np.ones_like(valido)
+    nao_branco = ~densidade['branco']
+
+    proporcoes = {}
+    # Cores (denominador: pixels válidos)
+    for cor, intervalos in definir_faixas_cores().items():
+        mascara_cor = np.zeros_like(valido)
+        for inicio, fim in intervalos:
+            mascara_cor |= (h >= inicio) & (h <= fim)
+        proporcoes[f'hist_{cor}'] = (mascara_cor & valido, valido)
+    for cor in ('Preto', 'Branco', 'Cinza'):
+        proporcoes[f'hist_{cor}'] = (contagem[cor], todos)
+
+    # Densidade de saturação
+    for categoria in ('cinza', 'branco', 'preto'):
+        proporcoes[categoria] = (densidade[categoria], todos)
+    # Como na função original, o denominador é total - brancos (a máscara de
+    # brancos conta também os vívidos/suaves fora dela)
+    for categoria in ('colorido_vivido', 'colorido_suave', 'quase_monocromatico'):
+        proporcoes[categoria] = (densidade[categoria], nao_branco)
+
+    medias = {
+        'saturacao_media': s.astype(np.float64),
+        'valor_medio': v.astype(np.float64),
+    }
+    return proporcoes, medias
+
+def intervalo_wilson(sucessos, n, z=Z_95):
+    """
+    Intervalo de Wilson para uma proporção (0-1); (0, 1) se n = 0
+    """
+    if n == 0:
+        return 0.0, 1.0
+    p = sucessos / n
+    denominador = 1 + z ** 2 / n
+    centro = (p + z ** 2 / (2 * n)) / denominador
+    meia = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denominador
+    return max(0.0, centro - meia), min(1.0, centro + meia)
+
+def intervalo_media(n, soma, soma_quadrados, z=Z_95):
+    """
+    Intervalo normal para uma média a partir das somas acumuladas
+    """
+    if n < 2:
+        return -np.inf, np.inf
+    media = soma / n
+    variancia = max(0.0, (soma_quadrados - n * media ** 2) / (n - 1))
+    meia = z * np.sqrt(variancia / n)
+    return media - meia, media + meia
+
+def _somar(proporcoes, medias, somas=None):
+    """
+    Acumula contagens (proporções) e n, soma, soma² (médias) de uma rodada
+    """
+    if somas is None:
+        somas = {nome: [0, 0] for nome in proporcoes} | {nome: [0, 0.0, 0.0] for nome in medias}
+    for nome, (numerador, denominador) in proporcoes.items():
+        somas[nome][0] += int(numerador.sum())
+        somas[nome][1] += int(denominador.sum())
+    for nome, valores in medias.items():
+        somas[nome][0] += len(valores)
+        somas[nome][1] += float(valores.sum())
+        somas[nome][2] += float(np.dot(valores, valores))
+    return somas
+
+def _somas_exatas(img):
+    """
+    As somas de _somar sobre todos os pixels, sem montar os indicadores por pixel
+
+    Conta as máscaras com count_nonzero e as faixas num único histograma de
+    matiz, como as funções originais: custa o mesmo que rodá-las, enquanto
+    _indicadores na imagem inteira custaria várias vezes mais.
+    """
+    hsv = converter_compartilhado(img, 'hsv')
+    h, s, v = cv2.split(hsv)
+    total = h.size
+    contagem = mascaras_contagem(s, v)
+    densidade = mascaras_densidade(s, v)
+    validos = int(np.count_nonzero(contagem['valido']))
+    nao_brancos = total - int(np.count_nonzero(densidade['branco']))
+
+    somas = {}
+    acumulado = np.concatenate([[0], np.cumsum(histograma_matiz(h, contagem['valido']))])
+    for cor, intervalos in definir_faixas_cores().items():
+        somas[f'hist_{cor}'] = [int(sum(acumulado[fim + 1] - acumulado[inicio] for inicio, fim in intervalos)), validos]
+    for cor in ('Preto', 'Branco', 'Cinza'):
+        somas[f'hist_{cor}'] = [int(np.count_nonzero(contagem[cor])), total]
+    for categoria in ('cinza', 'branco', 'preto'):
+        somas[categoria] = [int(np.count_nonzero(densidade[categoria])), total]
+    for categoria in ('colorido_vivido', 'colorido_suave', 'quase_monocromatico'):
+        somas[categoria] = [int(np.count_nonzero(densidade[categoria])), nao_brancos]
+    for nome, plano in (('saturacao_media', s), ('valor_medio', v)):
+        plano = plano.astype(np.int64)
+        somas[nome] = [total, float(plano.sum()), float(np.sum(plano * plano))]
+    return somas
+
+def _estimativas(somas, medias):
+    estimativas = {}
+    for nome, soma in somas.items():
+        if nome in medias:
+            estimativas[nome] = soma[1] / soma[0] if soma[0] else 0.0
+        else:
+            estimativas[nome] = soma[0] / soma[1] * 100 if soma[1] else 0.0
+    return estimativas
+
+def _intervalos_binomiais(somas, medias):
+    intervalos = {}
+    for nome, soma in somas.items():
+        if nome in medias:
+            intervalos[nome] = intervalo_media(*soma)
+        else:
+            inferior, superior = intervalo_wilson(*soma)
+            intervalos[nome] = (inferior * 100, superior * 100)
+    return intervalos
+
+def _intervalos_bootstrap(proporcoes, medias, rng, reamostras=200, bloco=25):
+    """
+    Bootstrap de Poisson: cada pixel recebe peso ~ Poisson(1) em cada reamostra
+
+    Vale também para as razões (numerador/denominador), que o intervalo
+    binomial trata como proporção simples.
+    """
+    nomes_prop = list(proporcoes)
+    numeradores = np.stack([proporcoes[n][0] for n in nomes_prop], axis=1).astype(np.float32)
+    denominadores = np.stack([proporcoes[n][1] for n in nomes_prop], axis=1).astype(np.float32)
+    nomes_media = list(medias)
+    valores = np.stack([medias[n] for n in nomes_media], axis=1).astype(np.float32)
+
+    estimativas_prop, estimativas_media = [], []
+    for inicio in range(0, reamostras, bloco):
+        pesos = rng.poisson(1.0, size=(min(bloco, reamostras - inicio), len(valores))).astype(np.float32)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            estimativas_prop.append(pesos @ numeradores / (pesos @ denominadores) * 100)
+            estimativas_media.append(pesos @ valores / pesos.sum(axis=1, keepdims=True))
+
+    estimativas_prop = np.concatenate(estimativas_prop)
+    estimativas_media = np.concatenate(estimativas_media)
+
+    intervalos = {}
+    for i, nome in enumerate(nomes_prop):
+        inferior, superior = np.nanpercentile(estimativas_prop[:, i], [2.5, 97.5]) if np.isfinite(
+            estimativas_prop[:, i]).any() else (0.0, 100.0)
+        intervalos[nome] = (float(inferior), float(superior))
+    for i, nome in enumerate(nomes_media):
+        inferior, superior = np.percentile(estimativas_media[:, i], [2.5, 97.5])
+        intervalos[nome] = (float(inferior), float(superior))
+    return intervalos
+
+def _sortear_estratos(altura, largura, por_estrato, grade, rng):
+    """
+    Coordenadas sorteadas com 'por_estrato' pixels em cada bloco de uma grade grade x grade
+    """
+    bordas_y = np.linspace(0, altura, grade + 1).astype(int)
+    bordas_x = np.linspace(0, largura, grade + 1).astype(int)
+    y0 = np.repeat(bordas_y[:-1], grade)
+    y1 = np.repeat(bordas_y[1:], grade)
+    x0 = np.tile(bordas_x[:-1], grade)
+    x1 = np.tile(bordas_x[1:], grade)
+
+    ys = rng.integers(y0[:, None], y1[:, None], size=(grade * grade, por_estrato))
+    xs = rng.integers(x0[:, None], x1[:, None], size=(grade * grade, por_estrato))
+    return ys.ravel(), xs.ravel()
+
+def _hsv_indicadores(pixels):
+    hsv = cv2.cvtColor(pixels.reshape(1, -1, 3), cv2.COLOR_BGR2HSV)[0]
+    return _indicadores(hsv[:, 0], hsv[:, 1], hsv[:, 2])
+
+def _dentro_da_tolerancia(intervalos, medias, tolerancia, tolerancia_media):
+    return all(
+        (superior - inferior) / 2 <= (tolerancia_media if nome in medias else tolerancia)
+        for nome, (inferior, superior) in intervalos.items()
+    )
+
+def estimar_progressivo(img, tolerancia=3.0, tolerancia_media=1.0, metodo='binomial', grade=8,
+                        inicial_por_estrato=16, max_fracao=0.2, semente=42):
+    """
+    Estima as métricas de cor/saturação numa amostra estratificada crescente
+
+    A imagem é dividida numa grade grade x grade; a cada rodada cada
+    bloco ganha o mesmo número de pixels sorteados (a amostra dobra). Para
+    quando todos os intervalos de 95% têm meia-largura <= tolerancia
+    (pontos percentuais) e <= tolerancia_media (médias de S e V, 0-255).
+    Se a próxima rodada passaria de max_fracao dos pixels, calcula o
+    valor exato em todos eles (intervalo de largura zero).
+
+    Cada pixel amostrado custa bem mais que um pixel no cálculo exato
+    (sorteio, indexação, uma máscara por métrica), então só compensa com
+    amostras pequenas: nos scans de CA_processada, ±3 pontos sai ~2,5x
+    mais rápido que o exato e ±5 ~4x, mas ±1 precisa de boa parte da
+    imagem e fica mais lento que o exato.
+
+    metodo='binomial' usa Wilson (proporções) e normal (médias) sobre
+    contagens acumuladas, tratando a amostra como aleatória simples, o
+    que é conservador para a estratificação com alocação proporcional.
+    metodo='bootstrap' confirma a parada com o bootstrap de Poisson
+    (mais lento: guarda a amostra e reamostra).
+    """
+    if len(img.shape) == 2:
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+
+    rng = np.random.default_rng(semente)
+    altura, largura = img.shape[:2]
+    total_pixels = altura * largura
+
+    somas = None
+    amostras = []
+    total_amostrado = 0
+    por_estrato = inicial_por_estrato
+    rodadas = 0
+    exato = False
+
+    while True:
+        ys, xs = _sortear_estratos(altura, largura, por_estrato, grade, rng)
+        pixels = img[ys, xs]
+        proporcoes, medias = _hsv_indicadores(pixels)
+        somas = _somar(proporcoes, medias, somas)
+        total_amostrado += len(ys)
+        rodadas += 1
+
+        intervalos = _intervalos_binomiais(somas, medias)
+        convergiu = _dentro_da_tolerancia(intervalos, medias, tolerancia, tolerancia_media)
+
+        if metodo == 'bootstrap':
+            amostras.append(pixels)
+            if convergiu:
+                intervalos = _intervalos_bootstrap(*_hsv_indicadores(np.concatenate(amostras)), rng)
+                convergiu = _dentro_da_tolerancia(intervalos, medias, tolerancia, tolerancia_media)
+
+        if convergiu:
+            estimativas = _estimativas(somas, medias)
+            break
+
+        # Dobrar a amostra: a próxima rodada sorteia o mesmo tanto já acumulado
+        if 2 * total_amostrado > max_fracao * total_pixels:
+            estimativas = _estimativas(_somas_exatas(img), medias)
+            intervalos = {nome: (valor, valor) for nome, valor in estimativas.items()}
+            total_amostrado = total_pixels
+            exato = True
+            break
+        por_estrato = total_amostrado // (grade * grade)
+
+    return {
+        'estimativas': estimativas,
+        'intervalos': intervalos,
+        'n_amostra': total_amostrado,
+        'fracao_amostra': total_amostrado / total_pixels,
+        'rodadas': rodadas,
+        'exato': exato,
+    }
+
+def linha_progressiva(nome, resultado, casas=2):
+    """
+    Linha da tabela: estimativa e limites do intervalo de cada métrica
+    """
+    linha = {
+        'nome': nome,
+        'n_amostra': resultado['n_amostra'],
+        'fracao_amostra': round(resultado['fracao_amostra'], 4),
+        'rodadas': resultado['rodadas'],
+        'exato': resultado['exato'],
+    }
+    for metrica, estimativa in resultado['estimativas'].items():
+        inferior, superior = resultado['intervalos'][metrica]
+        linha[metrica] = round(float(estimativa), casas)
+        linha[f'{metrica}_inf'] = round(float(inferior), casas)
+        linha[f'{metrica}_sup'] = round(float(superior), casas)
+    return linha
+
+def valores_exatos(img):
+    """
+    As mesmas métricas calculadas em todos os pixels (para conferir a cobertura)
+    """
+    hist = contar_pixels_por_cor(img)
+    densidade = analisar_densidade_saturacao(img)
+    exatos = {f'hist_{cor}': hist.get(cor) for cor in list(definir_faixas_cores()) + ['Preto', 'Branco', 'Cinza']}
+    for metrica in ('cinza', 'branco', 'preto', 'colorido_vivido', 'colorido_suave', 'quase_monocromatico',
+                    'saturacao_media', 'valor_medio'):
+        exatos[metrica] = densidade[metrica]
+    return exatos
+
+def estimar_pasta(caminho_pasta, tolerancia=3.0, metodo='binomial', conferir=False):
+    """
+    Estimativa progressiva de todas as imagens da pasta
+
+    conferir=True calcula também os valores exatos e informa quantos
+    caíram dentro dos intervalos (contar_pixels_por_cor omite cores
+    com <= 1%, essas não entram na conferência).
+    """
+    pasta = Path(caminho_pasta)
+    resultados = []
+    dentro, conferidos = 0, 0
+
+    print(f"AMOSTRAGEM PROGRESSIVA (±{tolerancia}%, {metodo})")
+
+    for arquivo in sorted(pasta.glob("*.TIF")):
+        try:
+            img = carregar_imagem(arquivo)
+
+            inicio = time.perf_counter()
+            resultado = estimar_progressivo(img, tolerancia, metodo=metodo)
+            tempo = time.perf_counter() - inicio
+
+            linha = linha_progressiva(arquivo.name, resultado)
+            linha['tempo'] = round(tempo, 4)
+            resultados.append(linha)
+
+            if conferir:
+                for metrica, exato in valores_exatos(img).items():
+                    if exato is None:
+                        continue
+                    inferior, superior = resultado['intervalos'][metrica]
+                    # Os exatos vêm arredondados (1 ou 2 casas)
+                    dentro += inferior - 0.05 <= exato <= superior + 0.05
+                    conferidos += 1
+
+            modo = "exato" if resultado['exato'] else f"{resultado['fracao_amostra'] * 100:.1f}% dos pixels"
+            print(f"✅ {arquivo.name} - {modo}, {resultado['rodadas']} rodadas, {tempo * 1000:.0f} ms")
+
+        except Exception as e:
+            print(f"❌ {arquivo.name}: {e}")
+
+    if conferidos:
+        print(f"\n📊 Valores exatos dentro do intervalo: {dentro}/{conferidos} ({dentro / conferidos * 100:.1f}%)")
+
+    return pd.DataFrame(resultados)
+
+if __name__ == "__main__":
+    caminho = r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image\CA_processada"
+
+    df_progressivo = estimar_pasta(caminho, tolerancia=3.0, conferir=True)
+    df_progressivo.to_csv('amostragem_progressiva.csv', index=False)
+    print(f"\n💾 Salvo: amostragem_progressiva.csv")
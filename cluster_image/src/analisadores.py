@@ -0,0 +1,81 @@
+from analise_hsv import analisar_imagem_hsv
+from analise_tracos import analisar_imagem_tracos
+from cores_dominantes import analisar_imagem_cores
+from densidade_saturacao import analisar_imagem_densidade, analisar_imagem_matiz
+from histograma_cores import analisar_imagem_histograma
+from quantizacao_lab import analisar_imagem_lab
+from segmentacao_fundo import recortar_desenho
+
+# Registro dos analisadores por imagem: nome -> (função(img, nome), arquivo CSV)
+# A função recebe a imagem já decodificada (BGR) e devolve a linha do CSV (ou None)
+ANALISADORES = {}
+
+def registrar_analisador(nome, funcao, arquivo_csv):
+    """
+    Registra um analisador por imagem e o CSV onde seus resultados são salvos
+    """
+    ANALISADORES[nome] = (funcao, arquivo_csv)
+
+def _analisar_clip(img, nome):
+    """
+    Adia a importação do torch/transformers até o CLIP ser realmente usado
+    """
+    from clip_cores import analisar_imagem_clip
+    return analisar_imagem_clip(img, nome)
+
+registrar_analisador('cores', analisar_imagem_cores, 'cores_dominantes.csv')
+registrar_analisador('hsv', analisar_imagem_hsv, 'hsv.csv')
+registrar_analisador('histograma', analisar_imagem_histograma, 'histograma_cores.csv')
+registrar_analisador('densidade', analisar_imagem_densidade, 'densidade_saturacao.csv')
+registrar_analisador('matiz', analisar_imagem_matiz, 'matiz.csv')
+registrar_analisador('lab', analisar_imagem_lab, 'cores_lab.csv')
+registrar_analisador('tracos', analisar_imagem_tracos, 'analise_tracos_corrigida.csv')
+registrar_analisador('clip', _analisar_clip, 'classificacao_clip_cores.csv')
+
+def _recortador():
+    """
+    recortar_desenho compartilhado pelos analisadores de uma seleção
+
+    Cada imagem é recortada uma vez e todos recebem o mesmo array, então
+    a conversão de cor em cache (converter_compartilhado) vale entre eles.
+    Só o recorte da última imagem fica guardado: a view segura o array
+    original.
+    """
+    ultimo = [None]
+
+    def recortar(img):
+        atual = ultimo[0]
+        if atual is None or atual[0] is not img:
+            atual = (img, recortar_desenho(img))
+            ultimo[0] = atual
+        return atual[1]
+    return recortar
+
+def _com_recorte(funcao, recortar):
+    """
+    Roda o analisador só na caixa do desenho (segmentação calculada uma vez por imagem)
+    """
+    def analisar(img, nome):
+        return funcao(recortar(img), nome)
+    return analisar
+
+def selecionar_analisadores(nomes=None, recortar=False):
+    """
+    Devolve os analisadores pedidos (todos se nomes=None)
+
+    recortar=True faz cada analisador receber só a caixa do desenho,
+    pulando o papel vazio em volta (percentuais passam a ser da caixa).
+    """
+    if nomes is None:
+        nomes = list(ANALISADORES)
+
+    desconhecidos = [nome for nome in nomes if nome not in ANALISADORES]
+    if desconhecidos:
+        raise ValueError(f"Analisadores desconhecidos: {', '.join(desconhecidos)}")
+
+    if not recortar:
+        return {nome: ANALISADORES[nome] for nome in nomes}
+
+    recortar = _recortador()
+    return {nome: (_com_recorte(funcao, recortar), arquivo_csv)
+            for nome, (funcao, arquivo_csv) in ((nome, ANALISADORES[nome]) for nome in nomes)}
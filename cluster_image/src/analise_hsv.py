@@ -1,13 +1,13 @@
-import cv2
 import numpy as np
-from PIL import Image
 from pathlib import Path
 import pandas as pd
-from sklearn.cluster import KMeans
+from upload import carregar_imagem
+from cores_dominantes import ajustar_kmeans, ajustar_kmeans_auto
+from conversao_cores import converter_compartilhado
 
 def rgb_para_hsv(img):
-    """Converte BGR para HSV"""
-    return cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    """Converte BGR para HSV (uma vez por imagem, compartilhado entre analisadores)"""
+    return converter_compartilhado(img, 'hsv')
 
 def classificar_cor_hsv(h, s, v):
     """
@@ -37,9 +37,9 @@ def classificar_cor_hsv(h, s, v):
     else:
         return "Rosa/Magenta"
 
-def extrair_cores_hsv(img, n_cores=5):
+def pixels_validos_hsv(img):
     """
-    Extrai cores dominantes HSV sem conversão RGB
+    Pixels HSV válidos (não muito claros, não muito dessaturados)
     """
     # Converter para HSV
     hsv_img = rgb_para_hsv(img)
@@ -48,59 +48,88 @@ def extrair_cores_hsv(img, n_cores=5):
     # Filtrar pixels válidos (não muito claros, não muito dessaturados)
     h, s, v = pixels_hsv[:, 0], pixels_hsv[:, 1], pixels_hsv[:, 2]
     mask_valido = (v < 240) & (s > 25) & (v > 40)
-    pixels_validos = pixels_hsv[mask_valido]
+    return pixels_hsv[mask_valido]
+
+def extrair_cores_hsv(img, n_cores=5, centroides_iniciais=None):
+    """
+    Extrai cores dominantes HSV sem conversão RGB
+
+    n_cores='auto' escolhe o número de cores por imagem (ajustar_kmeans_auto)
+    """
+    pixels_validos = pixels_validos_hsv(img)
+    
+    if n_cores == 'auto':
+        if len(pixels_validos) == 0:
+            return [], []
+        return ajustar_kmeans_auto(pixels_validos, 'hsv')
     
     if len(pixels_validos) < n_cores:
         return [], []
     
     # K-Means
-    kmeans = KMeans(n_clusters=n_cores, random_state=42, n_init=10)
-    kmeans.fit(pixels_validos)
+    kmeans = ajustar_kmeans(pixels_validos, n_cores, centroides_iniciais)
     
     # Resultados
     cores_hsv = kmeans.cluster_centers_
     labels = kmeans.labels_
-    contagens = np.bincount(labels)
+    contagens = np.bincount(labels, minlength=n_cores)
     percentuais = (contagens / len(pixels_validos)) * 100
     
     return cores_hsv, percentuais
 
-def analisar_hsv(caminho_pasta):
+def analisar_imagem_hsv(img, nome, aquecimento=None, n_cores=5):
+    """
+    Gera a linha de resultado HSV de uma imagem
+
+    aquecimento e n_cores: como em cores_dominantes.analisar_imagem_cores
+    """
+    centroides = aquecimento.get('centroides') if aquecimento is not None else None
+    
+    # Extrair cores HSV
+    cores_hsv, percentuais = extrair_cores_hsv(img, n_cores=n_cores, centroides_iniciais=centroides)
+    
+    if len(cores_hsv) == 0:
+        return None
+    
+    if aquecimento is not None:
+        aquecimento['centroides'] = cores_hsv
+    
+    resultado = {'nome': nome}
+    if n_cores == 'auto':
+        resultado['n_cores'] = len(cores_hsv)
+    
+    for i, (hsv, perc) in enumerate(zip(cores_hsv, percentuais)):
+        h, s, v = hsv.astype(int)
+        cor_tipo = classificar_cor_hsv(h, s, v)
+        
+        # Salvar no resultado
+        resultado[f'cor_{i+1}'] = cor_tipo
+        resultado[f'hsv_{i+1}'] = f"[{h},{s},{v}]"
+        resultado[f'perc_{i+1}'] = round(perc, 1)
+    
+    return resultado
+
+def analisar_hsv(caminho_pasta, aquecido=False, n_cores=5):
     """
     Análise HSV sem confusão RGB
+
+    Com aquecido=True, cada imagem parte dos centroides da anterior;
+    n_cores='auto' escolhe o número de cores de cada imagem
     """
     pasta = Path(caminho_pasta)
     resultados = []
+    aquecimento = {} if aquecido else None
     
     print("Analise usando HSV")
     
     for arquivo in pasta.glob("*.TIF"):
         try:
             # Carregar imagem
-            pil_img = Image.open(arquivo)
-            img_array = np.array(pil_img)
-            
-            if len(img_array.shape) == 3 and pil_img.mode == 'RGB':
-                img = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-            else:
-                img = img_array
+            img = carregar_imagem(arquivo)
             
-            # Extrair cores HSV
-            cores_hsv, percentuais = extrair_cores_hsv(img, n_cores=5)
+            resultado = analisar_imagem_hsv(img, arquivo.name, aquecimento, n_cores)
             
-            if len(cores_hsv) > 0:
-                
-                resultado = {'nome': arquivo.name}
-                
-                for i, (hsv, perc) in enumerate(zip(cores_hsv, percentuais)):
-                    h, s, v = hsv.astype(int)
-                    cor_tipo = classificar_cor_hsv(h, s, v)
-                    
-                    # Salvar no resultado
-                    resultado[f'cor_{i+1}'] = cor_tipo
-                    resultado[f'hsv_{i+1}'] = f"[{h},{s},{v}]"
-                    resultado[f'perc_{i+1}'] = round(perc, 1)
-                
+            if resultado is not None:
                 resultados.append(resultado)
         
         except Exception as e:
@@ -1,9 +1,118 @@
 import cv2
 import numpy as np
-from PIL import Image
 from pathlib import Path
 import pandas as pd
 from scipy import ndimage
+from upload import carregar_imagem
+
+# Vizinhança que os filtros do modo em blocos enxergam: blur 3x3, Sobel 3x3
+# do Canny e a supressão de não-máximos (1 px cada)
+MARGEM_MINIMA = 3
+
+def _medir_contornos(edges, area_tracos):
+    """
+    Segmentos, comprimentos e conectividade a partir do mapa de bordas
+    """
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    
+    if contours:
+        # Filtrar contornos muito pequenos (ruído)
+        contours_validos = [cnt for cnt in contours if cv2.contourArea(cnt) > 10]
+        
+        num_segmentos = len(contours_validos)
+        
+        # Calcular comprimentos dos contornos
+        comprimentos = [cv2.arcLength(cnt, False) for cnt in contours_validos]
+        comprimento_total = sum(comprimentos)
+        
+        if num_segmentos > 0:
+            comprimento_medio = round(comprimento_total / num_segmentos, 2)
+        else:
+            comprimento_medio = 0.0
+            
+        # 2.3 Métrica de conectividade: razão entre área real e área de contornos
+        if comprimento_total > 0:
+            conectividade = round((area_tracos / comprimento_total), 2)
+        else:
+            conectividade = 0.0
+            
+    else:
+        num_segmentos = 0
+        comprimento_total = comprimento_medio = conectividade = 0.0
+    
+    return num_segmentos, comprimento_total, comprimento_medio, conectividade
+
+def _classificar_tracos(espessura_media, espessura_max, espessura_std,
+                        num_segmentos, comprimento_total, comprimento_medio, conectividade,
+                        suavidade, densidade_tracos, variacao_densidade, densidade_max_regiao,
+                        pressao_forte_pct, pressao_media_pct, pressao_fraca_pct,
+                        intensidade_media, contraste_pressao, entropia_normalizada, p25, p75):
+    """
+    Classificações e dicionário final a partir das métricas de traço
+    """
+    # === CLASSIFICAÇÕES MELHORADAS ===
+    
+    # Classificação de espessura baseada em dados reais
+    if espessura_media < 1.5:
+        classificacao_espessura = "Traços Muito Finos"
+    elif espessura_media < 3.0:
+        classificacao_espessura = "Traços Finos"
+    elif espessura_media < 5.0:
+        classificacao_espessura = "Traços Médios"
+    elif espessura_media < 8.0:
+        classificacao_espessura = "Traços Grossos"
+    else:
+        classificacao_espessura = "Traços Muito Grossos"
+    
+    # Classificação de continuidade baseada em conectividade
+    if conectividade > 15:
+        classificacao_continuidade = "Muito Conectado"
+    elif conectividade > 8:
+        classificacao_continuidade = "Conectado"
+    elif conectividade > 4:
+        classificacao_continuidade = "Moderadamente Conectado"
+    elif conectividade > 2:
+        classificacao_continuidade = "Pouco Conectado"
+    else:
+        classificacao_continuidade = "Fragmentado"
+    
+    # Classificação de densidade
+    if densidade_tracos > 25:
+        classificacao_densidade = "Muito Denso"
+    elif densidade_tracos > 15:
+        classificacao_densidade = "Denso"
+    elif densidade_tracos > 8:
+        classificacao_densidade = "Moderado"
+    elif densidade_tracos > 3:
+        classificacao_densidade = "Esparso"
+    else:
+        classificacao_densidade = "Muito Esparso"
+    
+    resultados = {
+        'espessura_media': espessura_media,
+        'espessura_max': espessura_max,
+        'espessura_std': espessura_std,
+        'num_segmentos': num_segmentos,
+        'comprimento_total': round(comprimento_total, 1),
+        'comprimento_medio': comprimento_medio,
+        'conectividade': conectividade,
+        'suavidade': suavidade,
+        'densidade_tracos': densidade_tracos,
+        'variacao_densidade': variacao_densidade,
+        'densidade_max_regiao': densidade_max_regiao,
+        'pressao_forte_pct': pressao_forte_pct,
+        'pressao_media_pct': pressao_media_pct,
+        'pressao_fraca_pct': pressao_fraca_pct,
+        'intensidade_media': intensidade_media,
+        'contraste_pressao': contraste_pressao,
+        'entropia_normalizada': entropia_normalizada,
+        'thresholds_pressao': f"Fraca:<{p25:.0f}, Média:{p25:.0f}-{p75:.0f}, Forte:>{p75:.0f}",
+        'classificacao_espessura': classificacao_espessura,
+        'classificacao_continuidade': classificacao_continuidade,
+        'classificacao_densidade': classificacao_densidade
+    }
+    
+    return resultados
 
 def analisar_tracos_desenho_corrigido(img):
     """
@@ -53,34 +162,8 @@ def analisar_tracos_desenho_corrigido(img):
     blur = cv2.GaussianBlur(gray, (3, 3), 0)  # Suavizar antes do Canny
     edges = cv2.Canny(blur, 30, 80)  # Thresholds mais baixos
     
-    # 2.2 Encontrar contornos
-    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    
-    if contours:
-        # Filtrar contornos muito pequenos (ruído)
-        contours_validos = [cnt for cnt in contours if cv2.contourArea(cnt) > 10]
-        
-        num_segmentos = len(contours_validos)
-        
-        # Calcular comprimentos dos contornos
-        comprimentos = [cv2.arcLength(cnt, False) for cnt in contours_validos]
-        comprimento_total = sum(comprimentos)
-        
-        if num_segmentos > 0:
-            comprimento_medio = round(comprimento_total / num_segmentos, 2)
-        else:
-            comprimento_medio = 0.0
-            
-        # 2.3 Métrica de conectividade: razão entre área real e área de contornos
-        area_tracos = np.sum(mask_tracos)
-        if comprimento_total > 0:
-            conectividade = round((area_tracos / comprimento_total), 2)
-        else:
-            conectividade = 0.0
-            
-    else:
-        num_segmentos = 0
-        comprimento_total = comprimento_medio = conectividade = 0.0
+    # 2.2 Contornos e conectividade
+    num_segmentos, comprimento_total, comprimento_medio, conectividade = _medir_contornos(edges, np.sum(mask_tracos))
     
     # === 3. ANÁLISE DE SUAVIDADE MELHORADA ===
     # Combinar múltiplas métricas de suavidade
@@ -162,71 +245,284 @@ def analisar_tracos_desenho_corrigido(img):
     else:
         entropia_normalizada = 0.0
     
-    # === CLASSIFICAÇÕES MELHORADAS ===
+    return _classificar_tracos(
+        espessura_media, espessura_max, espessura_std,
+        num_segmentos, comprimento_total, comprimento_medio, conectividade,
+        suavidade, densidade_tracos, variacao_densidade, densidade_max_regiao,
+        pressao_forte_pct, pressao_media_pct, pressao_fraca_pct,
+        intensidade_media, contraste_pressao, entropia_normalizada, p25, p75
+    )
     
-    # Classificação de espessura baseada em dados reais
-    if espessura_media < 1.5:
-        classificacao_espessura = "Traços Muito Finos"
-    elif espessura_media < 3.0:
-        classificacao_espessura = "Traços Finos"
-    elif espessura_media < 5.0:
-        classificacao_espessura = "Traços Médios"
-    elif espessura_media < 8.0:
-        classificacao_espessura = "Traços Grossos"
+def _blocos(altura, largura, tamanho_bloco, margem):
+    """
+    Gera (interior, com_margem) de cada bloco como pares de slices (y, x)
+    """
+    for y0 in range(0, altura, tamanho_bloco):
+        for x0 in range(0, largura, tamanho_bloco):
+            y1, x1 = min(y0 + tamanho_bloco, altura), min(x0 + tamanho_bloco, largura)
+            py0, px0 = max(y0 - margem, 0), max(x0 - margem, 0)
+            py1, px1 = min(y1 + margem, altura), min(x1 + margem, largura)
+            yield (slice(y0, y1), slice(x0, x1)), (slice(py0, py1), slice(px0, px1)), (y0 - py0, x0 - px0)
+
+def _combinar_momentos(a, b):
+    """
+    Junta (n, média, M2) de dois blocos (fórmula de Chan) sem rever os pixels
+    """
+    n_a, media_a, m2_a = a
+    n_b, media_b, m2_b = b
+    n = n_a + n_b
+    if n == 0:
+        return 0, 0.0, 0.0
+    delta = media_b - media_a
+    media = media_a + delta * n_b / n
+    m2 = m2_a + m2_b + delta ** 2 * n_a * n_b / n
+    return n, media, m2
+
+def _momentos(valores):
+    """(n, média, M2) de um vetor de valores"""
+    if len(valores) == 0:
+        return 0, 0.0, 0.0
+    media = np.mean(valores)
+    return len(valores), media, np.sum((valores - media) ** 2)
+
+def _percentil_histograma(hist, q):
+    """
+    Percentil (interpolação linear, igual ao np.percentile) a partir de um histograma de inteiros
+    """
+    n = hist.sum()
+    posicao = (n - 1) * q / 100
+    abaixo, acima = int(np.floor(posicao)), int(np.ceil(posicao))
+    acumulado = np.cumsum(hist)
+    # k-ésimo valor ordenado = menor v com acumulado[v] > k
+    v_abaixo = np.searchsorted(acumulado, abaixo, side='right')
+    v_acima = np.searchsorted(acumulado, acima, side='right')
+    return v_abaixo + (v_acima - v_abaixo) * (posicao - abaixo)
+
+def _histerese(candidatas, fortes):
+    """
+    Histerese do Canny na imagem inteira: mantém os componentes (vizinhança 8)
+    de pixels candidatos que tocam algum pixel forte
+    """
+    n, rotulos = cv2.connectedComponents(candidatas, connectivity=8, ltype=cv2.CV_32S)
+    manter = np.zeros(n, dtype=bool)
+    manter[np.unique(rotulos[fortes > 0])] = True
+    manter[0] = False
+    return np.where(manter[rotulos], np.uint8(255), np.uint8(0))
+
+def _distancia_bloco(gray, iy, ix, margem):
+    """
+    Distance transform do interior do bloco, com o halo crescendo até ficar exato
+
+    O valor num pixel só depende do fundo mais próximo; se a maior distância
+    do interior fica abaixo do halo (com folga de 2 px da máscara 5x5), esse
+    fundo está dentro do bloco e o valor é o mesmo da imagem inteira. Senão
+    (traço mais grosso que o halo) o halo dobra e o bloco é refeito.
+    """
+    h, w = gray.shape
+    while True:
+        py = slice(max(iy.start - margem, 0), min(iy.stop + margem, h))
+        px = slice(max(ix.start - margem, 0), min(ix.stop + margem, w))
+        binary = (gray[py, px] > 20).astype(np.uint8)
+        dist = cv2.distanceTransform(binary, cv2.DIST_L2, 5)
+        dist = dist[iy.start - py.start:iy.stop - py.start, ix.start - px.start:ix.stop - px.start]
+        cobre_imagem = py == slice(0, h) and px == slice(0, w)
+        if cobre_imagem or dist.max(initial=0) < margem - 2:
+            return dist
+        margem *= 2
+
+def analisar_tracos_em_blocos(img, tamanho_bloco=512, margem=64):
+    """
+    Mesma análise de analisar_tracos_desenho_corrigido, processada em blocos
+
+    Os intermediários float64 (Laplaciano, Sobel, magnitude, distance
+    transform) existem só para um bloco por vez, com uma margem de
+    vizinhança para que os filtros vejam os mesmos pixels que na imagem
+    inteira. Cada bloco devolve estatísticas parciais (contagens, momentos,
+    histograma de intensidade, densidade por célula do grid 4x4) que são
+    combinadas nas mesmas métricas por imagem.
+
+    O resultado é igual ao da imagem inteira (a menos do arredondamento
+    float32 das médias, que somam em outra ordem):
+    - Canny: cada bloco dá só os pixels candidatos (gradiente > 30 após a
+      supressão de não-máximos) e os fortes (> 80); a histerese, que liga
+      bordas entre blocos, roda uma vez na imagem inteira
+    - distance transform: o halo de cada bloco cresce até cobrir o traço
+      mais grosso que passa por ele (_distancia_bloco), então a margem
+      só precisa cobrir os filtros 3x3 (margem >= MARGEM_MINIMA)
+    Ficam em tamanho cheio o cinza, os mapas de bordas (uint8) e os rótulos
+    da histerese (int32).
+    """
+    if margem < MARGEM_MINIMA:
+        raise ValueError(f"margem {margem} menor que a vizinhança dos filtros ({MARGEM_MINIMA} px)")
+
+    # Converter para grayscale
+    if len(img.shape) == 3:
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
     else:
-        classificacao_espessura = "Traços Muito Grossos"
+        gray = img.copy()
     
-    # Classificação de continuidade baseada em conectividade
-    if conectividade > 15:
-        classificacao_continuidade = "Muito Conectado"
-    elif conectividade > 8:
-        classificacao_continuidade = "Conectado"
-    elif conectividade > 4:
-        classificacao_continuidade = "Moderadamente Conectado"
-    elif conectividade > 2:
-        classificacao_continuidade = "Pouco Conectado"
+    # Inverter se necessário (fundo claro, traços escuros)
+    if np.mean(gray) > 127:
+        gray = 255 - gray
+    
+    h, w = gray.shape
+    total_pixels = h * w
+    
+    # Acumuladores parciais
+    momentos_espessura = (0, 0.0, 0.0)
+    espessura_max = 0.0
+    momentos_laplacian = (0, 0.0, 0.0)
+    momentos_gradiente = (0, 0.0, 0.0)
+    hist_intensidade = np.zeros(256, dtype=np.int64)
+    candidatas = np.zeros((h, w), dtype=np.uint8)
+    fortes = np.zeros((h, w), dtype=np.uint8)
+    limites_y = [i * h // 4 for i in range(5)]
+    limites_x = [j * w // 4 for j in range(5)]
+    contagem_grid = np.zeros((4, 4), dtype=np.int64)
+    
+    for (iy, ix), (py, px), (oy, ox) in _blocos(h, w, tamanho_bloco, margem):
+        gray_bloco = gray[py, px]
+        # Recorte do interior dentro do bloco com margem
+        interior = (slice(oy, oy + iy.stop - iy.start), slice(ox, ox + ix.stop - ix.start))
+        
+        mask_bloco = gray_bloco[interior] > 20
+        
+        # 1. Espessura (distance transform com halo suficiente para o traço)
+        dist = _distancia_bloco(gray, iy, ix, margem)
+        espessuras = dist[dist > 0] * 2
+        momentos_espessura = _combinar_momentos(momentos_espessura, _momentos(espessuras))
+        if len(espessuras) > 0:
+            espessura_max = max(espessura_max, float(espessuras.max()))
+        
+        # 2. Bordas: candidatas e fortes do Canny (limiares iguais = sem histerese)
+        blur = cv2.GaussianBlur(gray_bloco, (3, 3), 0)
+        candidatas[iy, ix] = cv2.Canny(blur, 30, 30)[interior]
+        fortes[iy, ix] = cv2.Canny(blur, 80, 80)[interior]
+        
+        # 3. Suavidade: momentos do Laplaciano e da magnitude do gradiente
+        laplacian = cv2.Laplacian(gray_bloco, cv2.CV_64F)[interior]
+        momentos_laplacian = _combinar_momentos(momentos_laplacian, _momentos(laplacian[mask_bloco]))
+        grad_x = cv2.Sobel(gray_bloco, cv2.CV_64F, 1, 0, ksize=3)[interior]
+        grad_y = cv2.Sobel(gray_bloco, cv2.CV_64F, 0, 1, ksize=3)[interior]
+        magnitude = np.sqrt(grad_x**2 + grad_y**2)
+        momentos_gradiente = _combinar_momentos(momentos_gradiente, _momentos(magnitude[mask_bloco]))
+        
+        # 4/5/6. Histograma de intensidade dos traços e densidade por célula
+        hist_intensidade += np.bincount(gray_bloco[interior][mask_bloco], minlength=256)
+        for i in range(4):
+            y1, y2 = max(limites_y[i], iy.start), min(limites_y[i + 1], iy.stop)
+            if y1 >= y2:
+                continue
+            for j in range(4):
+                x1, x2 = max(limites_x[j], ix.start), min(limites_x[j + 1], ix.stop)
+                if x1 < x2:
+                    contagem_grid[i, j] += np.count_nonzero(mask_bloco[y1 - iy.start:y2 - iy.start, x1 - ix.start:x2 - ix.start])
+    
+    area_tracos = int(hist_intensidade.sum())
+    
+    # === 1. ESPESSURA ===
+    n_esp, media_esp, m2_esp = momentos_espessura
+    if area_tracos > 100 and n_esp > 0:
+        espessura_media = round(media_esp, 2)
+        espessura_max = round(espessura_max, 2)
+        espessura_std = round(np.sqrt(m2_esp / n_esp), 2)
     else:
-        classificacao_continuidade = "Fragmentado"
+        espessura_media = espessura_max = espessura_std = 0.0
     
-    # Classificação de densidade
-    if densidade_tracos > 25:
-        classificacao_densidade = "Muito Denso"
-    elif densidade_tracos > 15:
-        classificacao_densidade = "Denso"
-    elif densidade_tracos > 8:
-        classificacao_densidade = "Moderado"
-    elif densidade_tracos > 3:
-        classificacao_densidade = "Esparso"
+    # === 2. CONTINUIDADE (histerese global) ===
+    edges = _histerese(candidatas, fortes)
+    del candidatas, fortes
+    num_segmentos, comprimento_total, comprimento_medio, conectividade = _medir_contornos(edges, area_tracos)
+    
+    # === 3. SUAVIDADE ===
+    rugosidade_laplacian = np.sqrt(momentos_laplacian[2] / area_tracos) if area_tracos > 0 else 0
+    rugosidade_gradiente = np.sqrt(momentos_gradiente[2] / area_tracos) if area_tracos > 0 else 0
+    rugosidade_total = (rugosidade_laplacian + rugosidade_gradiente) / 2
+    suavidade = round(1 / (1 + rugosidade_total / 50), 3)
+    
+    # === 4. DENSIDADE ===
+    densidade_tracos = round((area_tracos / total_pixels) * 100, 2)
+    tamanhos_grid = np.outer(np.diff(limites_y), np.diff(limites_x))
+    grid_densities = (contagem_grid / tamanhos_grid * 100).ravel()
+    variacao_densidade = round(np.std(grid_densities), 2)
+    densidade_max_regiao = round(max(grid_densities), 2)
+    
+    # === 5. PRESSÃO (percentis exatos a partir do histograma) ===
+    intensidades = np.arange(256)
+    if area_tracos > 0:
+        p25 = _percentil_histograma(hist_intensidade, 25)
+        p75 = _percentil_histograma(hist_intensidade, 75)
+        
+        pressao_fraca = hist_intensidade[(intensidades >= 20) & (intensidades < p25)].sum()
+        pressao_media = hist_intensidade[(intensidades >= p25) & (intensidades < p75)].sum()
+        pressao_forte = hist_intensidade[intensidades >= p75].sum()
+        
+        pressao_fraca_pct = round((pressao_fraca / area_tracos) * 100, 2)
+        pressao_media_pct = round((pressao_media / area_tracos) * 100, 2)
+        pressao_forte_pct = round((pressao_forte / area_tracos) * 100, 2)
+        
+        media_intensidade = np.sum(hist_intensidade * intensidades) / area_tracos
+        intensidade_media = round(media_intensidade, 2)
+        contraste_pressao = round(np.sqrt(np.sum(hist_intensidade * (intensidades - media_intensidade) ** 2) / area_tracos), 2)
     else:
-        classificacao_densidade = "Muito Esparso"
+        pressao_fraca_pct = pressao_media_pct = pressao_forte_pct = 0.0
+        intensidade_media = contraste_pressao = 0.0
+        p25 = p75 = 0
     
-    resultados = {
-        'espessura_media': espessura_media,
-        'espessura_max': espessura_max,
-        'espessura_std': espessura_std,
-        'num_segmentos': num_segmentos,
-        'comprimento_total': round(comprimento_total, 1),
-        'comprimento_medio': comprimento_medio,
-        'conectividade': conectividade,
-        'suavidade': suavidade,
-        'densidade_tracos': densidade_tracos,
-        'variacao_densidade': variacao_densidade,
-        'densidade_max_regiao': densidade_max_regiao,
-        'pressao_forte_pct': pressao_forte_pct,
-        'pressao_media_pct': pressao_media_pct,
-        'pressao_fraca_pct': pressao_fraca_pct,
-        'intensidade_media': intensidade_media,
-        'contraste_pressao': contraste_pressao,
-        'entropia_normalizada': entropia_normalizada,
-        'thresholds_pressao': f"Fraca:<{p25:.0f}, Média:{p25:.0f}-{p75:.0f}, Forte:>{p75:.0f}",
-        'classificacao_espessura': classificacao_espessura,
-        'classificacao_continuidade': classificacao_continuidade,
-        'classificacao_densidade': classificacao_densidade
-    }
+    # === 6. ENTROPIA (mesmos 32 bins, rebinados do histograma de 256) ===
+    if area_tracos > 0:
+        hist, _ = np.histogram(intensidades, bins=32, range=(0, 255), weights=hist_intensidade)
+        hist = hist / np.sum(hist)
+        hist = hist[hist > 0]
+        entropy = -np.sum(hist * np.log2(hist))
+        entropia_normalizada = round(entropy / 5, 3)
+    else:
+        entropia_normalizada = 0.0
     
-    return resultados
+    return _classificar_tracos(
+        espessura_media, espessura_max, espessura_std,
+        num_segmentos, comprimento_total, comprimento_medio, conectividade,
+        suavidade, densidade_tracos, variacao_densidade, densidade_max_regiao,
+        pressao_forte_pct, pressao_media_pct, pressao_fraca_pct,
+        intensidade_media, contraste_pressao, entropia_normalizada, p25, p75
+    )
     
-def analisar_tracos_dataset_corrigido(caminho_pasta):
+def analisar_imagem_tracos(img, nome, tamanho_bloco=None):
+    """
+    Gera a linha de resultado de traços de uma imagem
+
+    Com tamanho_bloco, usa a execução em blocos (memória limitada ao bloco)
+    """
+    # Analisar com algoritmos corrigidos
+    if tamanho_bloco:
+        tracos = analisar_tracos_em_blocos(img, tamanho_bloco)
+    else:
+        tracos = analisar_tracos_desenho_corrigido(img)
+    
+    return {
+        'nome': nome,
+        'classificacao_espessura': tracos['classificacao_espessura'],
+        'classificacao_continuidade': tracos['classificacao_continuidade'],
+        'classificacao_densidade': tracos['classificacao_densidade'],
+        'espessura_media': tracos['espessura_media'],
+        'espessura_max': tracos['espessura_max'],
+        'espessura_std': tracos['espessura_std'],
+        'densidade_tracos': tracos['densidade_tracos'],
+        'variacao_densidade': tracos['variacao_densidade'],
+        'num_segmentos': tracos['num_segmentos'],
+        'conectividade': tracos['conectividade'],
+        'comprimento_total': tracos['comprimento_total'],
+        'suavidade': tracos['suavidade'],
+        'pressao_forte_pct': tracos['pressao_forte_pct'],
+        'pressao_media_pct': tracos['pressao_media_pct'],
+        'pressao_fraca_pct': tracos['pressao_fraca_pct'],
+        'intensidade_media': tracos['intensidade_media'],
+        'contraste_pressao': tracos['contraste_pressao'],
+        'entropia_normalizada': tracos['entropia_normalizada'],
+        'thresholds_pressao': tracos['thresholds_pressao']
+    }
+
+def analisar_tracos_dataset_corrigido(caminho_pasta, tamanho_bloco=None):
     """
     Processa dataset com algoritmos corrigidos
     """
@@ -239,43 +535,12 @@ def analisar_tracos_dataset_corrigido(caminho_pasta):
     for arquivo in pasta.glob("*.TIF"):
         try:
             # Carregar imagem
-            pil_img = Image.open(arquivo)
-            img_array = np.array(pil_img)
-            
-            if len(img_array.shape) == 3 and pil_img.mode == 'RGB':
-                img = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-            else:
-                img = img_array
-            
-            # Analisar com algoritmos corrigidos
-            tracos = analisar_tracos_desenho_corrigido(img)
+            img = carregar_imagem(arquivo)
             
-            # Preparar resultado
-            resultado = {
-                'nome': arquivo.name,
-                'classificacao_espessura': tracos['classificacao_espessura'],
-                'classificacao_continuidade': tracos['classificacao_continuidade'],
-                'classificacao_densidade': tracos['classificacao_densidade'],
-                'espessura_media': tracos['espessura_media'],
-                'espessura_max': tracos['espessura_max'],
-                'espessura_std': tracos['espessura_std'],
-                'densidade_tracos': tracos['densidade_tracos'],
-                'variacao_densidade': tracos['variacao_densidade'],
-                'num_segmentos': tracos['num_segmentos'],
-                'conectividade': tracos['conectividade'],
-                'comprimento_total': tracos['comprimento_total'],
-                'suavidade': tracos['suavidade'],
-                'pressao_forte_pct': tracos['pressao_forte_pct'],
-                'pressao_media_pct': tracos['pressao_media_pct'],
-                'pressao_fraca_pct': tracos['pressao_fraca_pct'],
-                'intensidade_media': tracos['intensidade_media'],
-                'contraste_pressao': tracos['contraste_pressao'],
-                'entropia_normalizada': tracos['entropia_normalizada'],
-                'thresholds_pressao': tracos['thresholds_pressao']
-            }
+            resultado = analisar_imagem_tracos(img, arquivo.name, tamanho_bloco)
             
             resultados.append(resultado)
-            print(f"✅ {arquivo.name} - Espessura: {tracos['espessura_media']:.1f}px, Conectividade: {tracos['conectividade']:.1f}")
+            print(f"✅ {arquivo.name} - Espessura: {resultado['espessura_media']:.1f}px, Conectividade: {resultado['conectividade']:.1f}")
             
         except Exception as e:
             print(f"❌ {arquivo.name}: {e}")
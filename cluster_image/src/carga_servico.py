@@ -0,0 +1,77 @@
+import argparse
+import json
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+
+def enviar(url, dados, nome, analisadores=None):
+    """
+    POST de uma imagem para /analisar; devolve (latência em s, status)
+    """
+    consulta = f"?nome={urllib.parse.quote(nome)}"
+    if analisadores:
+        consulta += f"&analisadores={','.join(analisadores)}"
+    pedido = urllib.request.Request(f"{url}/analisar{consulta}", data=dados, method='POST',
+                                    headers={'Content-Type': 'application/octet-stream'})
+    inicio = time.perf_counter()
+    try:
+        with urllib.request.urlopen(pedido, timeout=300) as resposta:
+            resposta.read()
+            status = resposta.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return time.perf_counter() - inicio, status
+
+def teste_carga(url, caminho_pasta, requisicoes=100, concorrencia=8, analisadores=None):
+    """
+    Dispara 'requisicoes' uploads com 'concorrencia' clientes simultâneos
+
+    Mede do lado do cliente (p50/p99 e vazão) e mostra as métricas do serviço.
+    """
+    imagens = [(a.name, a.read_bytes()) for a in sorted(Path(caminho_pasta).glob("*.TIF"))]
+    if not imagens:
+        raise ValueError(f"Nenhuma imagem em {caminho_pasta}")
+
+    print(f"🏋️  {requisicoes} requisições, {concorrencia} clientes, {len(imagens)} imagens distintas")
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        futuros = [executor.submit(enviar, url, imagens[i % len(imagens)][1], imagens[i % len(imagens)][0],
+                                   analisadores)
+                   for i in range(requisicoes)]
+        resultados = [futuro.result() for futuro in futuros]
+    total = time.perf_counter() - inicio
+
+    latencias = np.array([latencia for latencia, _ in resultados]) * 1000
+    falhas = sum(status != 200 for _, status in resultados)
+
+    print(f"📊 Cliente: p50 {np.percentile(latencias, 50):.0f} ms, p99 {np.percentile(latencias, 99):.0f} ms, "
+          f"vazão {requisicoes / total:.2f} req/s, {falhas} falha(s)")
+
+    with urllib.request.urlopen(f"{url}/metricas") as resposta:
+        metricas = json.loads(resposta.read())
+    print(f"📊 Serviço: {json.dumps(metricas, ensure_ascii=False)}")
+
+    return {
+        'p50_ms': float(np.percentile(latencias, 50)),
+        'p99_ms': float(np.percentile(latencias, 99)),
+        'vazao_rps': requisicoes / total,
+        'falhas': falhas,
+        'servico': metricas,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de carga do serviço de análise")
+    parser.add_argument('caminho', nargs='?',
+                        default=r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image\CA_processada")
+    parser.add_argument('--url', default='http://127.0.0.1:8765')
+    parser.add_argument('--requisicoes', type=int, default=100)
+    parser.add_argument('--concorrencia', type=int, default=8)
+    parser.add_argument('--analisadores', nargs='+', help="subconjunto (padrão: o do serviço)")
+    args = parser.parse_args()
+
+    teste_carga(args.url, args.caminho, args.requisicoes, args.concorrencia, args.analisadores)
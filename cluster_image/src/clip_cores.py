@@ -3,8 +3,12 @@ import numpy as np
 from PIL import Image
 from pathlib import Path
 import pandas as pd
+import queue
+import threading
+from functools import lru_cache
 import torch
 from transformers import CLIPProcessor, CLIPModel
+from leitura_antecipada import ler_imagens_antecipadas
 
 def carregar_modelo_clip():
     """
@@ -43,8 +47,11 @@ def classificar_imagem_clip(imagem_path, model, processor, device, categorias):
     """
     Classifica uma imagem usando CLIP
     """
-    # Carregar e preparar imagem
-    imagem = Image.open(imagem_path).convert("RGB")
+    # Carregar e preparar imagem (aceita caminho ou imagem PIL já carregada)
+    if isinstance(imagem_path, Image.Image):
+        imagem = imagem_path.convert("RGB")
+    else:
+        imagem = Image.open(imagem_path).convert("RGB")
     
     # Preparar inputs
     inputs = processor(
@@ -63,6 +70,12 @@ def classificar_imagem_clip(imagem_path, model, processor, device, categorias):
     # Converter para numpy
     probabilidades = probs.cpu().numpy()[0]
     
+    return ordenar_probabilidades(probabilidades, categorias)
+
+def ordenar_probabilidades(probabilidades, categorias):
+    """
+    Lista de {categoria, probabilidade (%)} ordenada da mais provável para a menos
+    """
     # Criar resultado
     resultado = []
     for i, categoria in enumerate(categorias):
@@ -76,6 +89,210 @@ def classificar_imagem_clip(imagem_path, model, processor, device, categorias):
     
     return resultado
 
+def montar_linha_clip(nome, resultado):
+    """
+    Monta a linha de resultado com as 3 categorias mais prováveis
+    """
+    return {
+        'nome': nome,
+        'categoria_principal': resultado[0]['categoria'],
+        'confianca_principal': resultado[0]['probabilidade'],
+        'categoria_2': resultado[1]['categoria'],
+        'confianca_2': resultado[1]['probabilidade'],
+        'categoria_3': resultado[2]['categoria'],
+        'confianca_3': resultado[2]['probabilidade']
+    }
+
+@lru_cache(maxsize=1)
+def modelo_clip_compartilhado():
+    """
+    Carrega o modelo CLIP uma única vez por processo
+    """
+    return carregar_modelo_clip()
+
+def parametros_preprocessamento(processor):
+    """
+    Tamanho, recorte e normalização do processador CLIP (lidos da configuração)
+    """
+    image_processor = processor.image_processor
+    return {
+        'lado_menor': image_processor.size['shortest_edge'],
+        'recorte': (image_processor.crop_size['height'], image_processor.crop_size['width']),
+        'media': torch.tensor(image_processor.image_mean).view(1, 3, 1, 1),
+        'desvio': torch.tensor(image_processor.image_std).view(1, 3, 1, 1),
+    }
+
+def preparar_imagem_clip(img, parametros):
+    """
+    BGR/BGRA/cinza -> RGB, lado menor = lado_menor, recorte central (uint8)
+
+    Mesmo redimensionamento do CLIPImageProcessor: tamanho calculado como
+    em get_resize_output_image_size e bicúbico do PIL, para os embeddings
+    não dependerem de a imagem vir do processor ou daqui.
+    """
+    if img.ndim == 2:
+        rgb = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
+    elif img.shape[2] == 4:
+        rgb = cv2.cvtColor(img, cv2.COLOR_BGRA2RGB)
+    elif img.shape[2] == 3:
+        rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    else:
+        raise ValueError(f"imagem com {img.shape[2]} canais")
+    if rgb.dtype != np.uint8:
+        raise ValueError(f"imagem {rgb.dtype}, esperado uint8")
+    
+    lado_menor = parametros['lado_menor']
+    altura, largura = rgb.shape[:2]
+    if largura <= altura:
+        nova_largura, nova_altura = lado_menor, int(lado_menor * altura / largura)
+    else:
+        nova_largura, nova_altura = int(lado_menor * largura / altura), lado_menor
+    rgb = np.asarray(Image.fromarray(rgb).resize((nova_largura, nova_altura), Image.BICUBIC))
+    
+    altura_recorte, largura_recorte = parametros['recorte']
+    topo = (nova_altura - altura_recorte) // 2
+    esquerda = (nova_largura - largura_recorte) // 2
+    return rgb[topo:topo + altura_recorte, esquerda:esquerda + largura_recorte]
+
+def normalizar_lote_clip(recortes, parametros, device="cpu"):
+    """
+    Recortes uint8 (de preparar_imagem_clip) -> tensor normalizado (N, 3, H, W)
+    """
+    lote = torch.from_numpy(np.stack(recortes)).to(device).permute(0, 3, 1, 2).float().div_(255)
+    return (lote - parametros['media'].to(device)) / parametros['desvio'].to(device)
+
+def preprocessar_lote_clip(imagens, parametros, device="cpu"):
+    """
+    Prepara um lote de arrays já decodificados para o CLIP
+
+    Redimensiona/recorta cada imagem e normaliza o lote inteiro de uma vez
+    em tensor (N, 3, H, W), sem reabrir arquivos.
+    """
+    return normalizar_lote_clip([preparar_imagem_clip(img, parametros) for img in imagens], parametros, device)
+
+def comparar_com_processor(imagens, model, processor, device="cpu"):
+    """
+    Maior diferença absoluta entre preprocessar_lote_clip e o CLIPProcessor
+
+    Devolve (diferença em pixel_values, diferença nos embeddings
+    normalizados), para conferir a equivalência num conjunto de imagens.
+    """
+    nosso = preprocessar_lote_clip(imagens, parametros_preprocessamento(processor), device)
+    pil = [Image.fromarray(img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2RGB)).convert("RGB")
+           for img in imagens]
+    referencia = processor(images=pil, return_tensors="pt")['pixel_values'].to(device)
+    with torch.no_grad():
+        a = model.get_image_features(pixel_values=nosso)
+        b = model.get_image_features(pixel_values=referencia)
+    a = a / a.norm(dim=-1, keepdim=True)
+    b = b / b.norm(dim=-1, keepdim=True)
+    return (nosso - referencia).abs().max().item(), (a - b).abs().max().item()
+
+def caracteristicas_texto(model, processor, device, categorias):
+    """
+    Embeddings normalizados das categorias (calculados uma vez por execução)
+    """
+    inputs = processor(text=categorias, return_tensors="pt", padding=True).to(device)
+    with torch.no_grad():
+        texto = model.get_text_features(**inputs)
+    return texto / texto.norm(dim=-1, keepdim=True)
+
+def classificar_lote_clip(pixel_values, model, texto_normalizado):
+    """
+    Probabilidades (N, categorias) para um lote já preprocessado
+    """
+    with torch.no_grad():
+        imagem = model.get_image_features(pixel_values=pixel_values)
+        imagem = imagem / imagem.norm(dim=-1, keepdim=True)
+        # Mesmos logits de CLIPModel.forward: escala * similaridade de cosseno
+        logits_per_image = model.logit_scale.exp() * imagem @ texto_normalizado.T
+        probs = logits_per_image.softmax(dim=1)
+    return probs.cpu().numpy()
+
+@lru_cache(maxsize=1)
+def texto_clip_compartilhado():
+    """
+    Embeddings das categorias para o modelo compartilhado
+    """
+    model, processor, device = modelo_clip_compartilhado()
+    return caracteristicas_texto(model, processor, device, definir_categorias_cores())
+
+def analisar_imagem_clip(img, nome):
+    """
+    Classifica com CLIP uma imagem já decodificada (array BGR)
+    """
+    model, processor, device = modelo_clip_compartilhado()
+    
+    pixel_values = preprocessar_lote_clip([img], parametros_preprocessamento(processor), device)
+    probabilidades = classificar_lote_clip(pixel_values, model, texto_clip_compartilhado())[0]
+    return montar_linha_clip(nome, ordenar_probabilidades(probabilidades, definir_categorias_cores()))
+
+def _produzir_lotes(arquivos, parametros, device, tamanho_lote, fila, falhas):
+    """
+    Worker: lê, decodifica e preprocessa lotes enquanto o modelo roda o anterior
+
+    Uma imagem que não decodifica ou não preprocessa vai para 'falhas' e o
+    lote segue sem ela; um erro inesperado é repassado para a thread principal.
+    """
+    nomes, recortes = [], []
+    try:
+        for arquivo, img, erro in ler_imagens_antecipadas(arquivos):
+            if erro is None:
+                try:
+                    recorte = preparar_imagem_clip(img, parametros)
+                except Exception as e:
+                    erro = e
+            if erro is not None:
+                print(f"   ❌ {arquivo.name}: {erro}")
+                falhas.append({'nome': arquivo.name, 'erro': str(erro)})
+                continue
+            nomes.append(arquivo.name)
+            recortes.append(recorte)
+            if len(recortes) == tamanho_lote:
+                fila.put((nomes, normalizar_lote_clip(recortes, parametros, device)))
+                nomes, recortes = [], []
+        if recortes:
+            fila.put((nomes, normalizar_lote_clip(recortes, parametros, device)))
+    except Exception as e:
+        fila.put(e)
+    finally:
+        fila.put(None)
+
+def analisar_dataset_clip_lotes(caminho_pasta, tamanho_lote=16):
+    """
+    Analisa o dataset com CLIP em lotes, com preprocessamento em segundo plano
+
+    Uma thread lê/decodifica/preprocessa o próximo lote (cv2, PIL e torch
+    liberam o GIL) enquanto a principal roda o modelo no lote atual; a
+    fila limitada a 2 lotes segura a memória.
+    """
+    model, processor, device = carregar_modelo_clip()
+    categorias = definir_categorias_cores()
+    texto = caracteristicas_texto(model, processor, device, categorias)
+    parametros = parametros_preprocessamento(processor)
+    
+    arquivos = sorted(Path(caminho_pasta).glob("*.TIF"))
+    print(f"\n🎨 Analisando {len(arquivos)} imagens com CLIP (lotes de {tamanho_lote})...")
+    
+    fila = queue.Queue(maxsize=2)
+    falhas = []
+    worker = threading.Thread(target=_produzir_lotes, args=(arquivos, parametros, device, tamanho_lote, fila, falhas),
+                              daemon=True)
+    worker.start()
+    
+    resultados_completos = []
+    while (item := fila.get()) is not None:
+        if isinstance(item, Exception):
+            raise item
+        nomes, pixel_values = item
+        for nome, probabilidades in zip(nomes, classificar_lote_clip(pixel_values, model, texto)):
+            resultados_completos.append(montar_linha_clip(nome, ordenar_probabilidades(probabilidades, categorias)))
+    
+    worker.join()
+    if falhas:
+        print(f"⚠️  {len(falhas)} imagem(ns) com erro: {', '.join(f['nome'] for f in falhas)}")
+    return pd.DataFrame(resultados_completos)
+
 def analisar_dataset_clip(caminho_pasta):
     """
     Analisa todas as imagens do dataset com CLIP
@@ -96,17 +313,7 @@ def analisar_dataset_clip(caminho_pasta):
             resultado = classificar_imagem_clip(arquivo, model, processor, device, categorias)
             
             # Salvar resultado completo
-            resultado_imagem = {
-                'nome': arquivo.name,
-                'categoria_principal': resultado[0]['categoria'],
-                'confianca_principal': resultado[0]['probabilidade'],
-                'categoria_2': resultado[1]['categoria'],
-                'confianca_2': resultado[1]['probabilidade'],
-                'categoria_3': resultado[2]['categoria'],
-                'confianca_3': resultado[2]['probabilidade']
-            }
-            
-            resultados_completos.append(resultado_imagem)
+            resultados_completos.append(montar_linha_clip(arquivo.name, resultado))
             
         except Exception as e:
             print(f"   ❌ Erro: {e}")
@@ -119,8 +326,8 @@ def analisar_dataset_clip(caminho_pasta):
 if __name__ == "__main__":
     caminho = r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image\CA_processada"
     
-    # Analisar com CLIP
-    df_clip = analisar_dataset_clip(caminho)
+    # Analisar com CLIP (lotes, preprocessamento em segundo plano)
+    df_clip = analisar_dataset_clip_lotes(caminho)
     
     
     # Salvar resultados
@@ -0,0 +1,154 @@
+import time
+import weakref
+import zlib
+import cv2
+import numpy as np
+from functools import lru_cache
+from pathlib import Path
+from upload import carregar_imagem
+
+CONVERSOES = {
+    'hsv': cv2.COLOR_BGR2HSV,
+    'lab': cv2.COLOR_BGR2LAB,
+}
+
+# Medido em CA_processada (1058x720): para a imagem inteira o cvtColor
+# (~1,3 ms HSV, ~6 ms Lab) ganha da LUT (~16-19 ms, o gather em 48 MB é
+# limitado pela memória); a LUT vale para listas de cores únicas
+METODO_PADRAO = {
+    'hsv': 'cv2',
+    'lab': 'cv2',
+}
+
+_CACHE = {}
+
+def mascara_nao_branco(img):
+    """
+    Pixels que NÃO são quase brancos (mesmo critério de extrair_cores_dominantes)
+    """
+    return ~((img[..., 0] > 240) & (img[..., 1] > 240) & (img[..., 2] > 240))
+
+def codigos_24bits(img):
+    """
+    Código único de 24 bits por pixel BGR: (B << 16) | (G << 8) | R
+    """
+    codigos = img[..., 0].astype(np.uint32) << 16
+    codigos |= img[..., 1].astype(np.uint32) << 8
+    codigos |= img[..., 2]
+    return codigos
+
+@lru_cache(maxsize=None)
+def lut_conversao(espaco):
+    """
+    Tabela (2^24, 3) uint8: código BGR de 24 bits -> cor no espaço pedido
+
+    Construída com o próprio cvtColor sobre todas as cores (~0,5 s), então
+    o resultado é idêntico ao da conversão direta.
+    """
+    codigos = np.arange(1 << 24, dtype=np.uint32)
+    todas = np.stack([(codigos >> 16) & 255, (codigos >> 8) & 255, codigos & 255], axis=1).astype(np.uint8)
+    lut = cv2.cvtColor(todas.reshape(4096, 4096, 3), CONVERSOES[espaco]).reshape(-1, 3)
+    lut.flags.writeable = False
+    return lut
+
+def converter_cores(img, espaco='hsv', metodo=None):
+    """
+    Converte uma imagem BGR para HSV/Lab (uint8, escala do OpenCV)
+
+    metodo='cv2' usa cvtColor; metodo='lut' busca cada pixel na LUT de 24 bits.
+    """
+    metodo = metodo or METODO_PADRAO[espaco]
+    if metodo == 'lut':
+        return np.take(lut_conversao(espaco), codigos_24bits(img), axis=0)
+    return cv2.cvtColor(img, CONVERSOES[espaco])
+
+def assinatura_array(img, amostras=64):
+    """
+    Endereço dos dados, formato e um crc32 de uma grade de ~amostras x amostras pixels
+
+    Barata (alguns microssegundos) e pega a escrita no array que passe
+    por algum pixel da grade; uma mudança que não toque nenhum deles
+    passa despercebida.
+    """
+    passo_y = max(1, img.shape[0] // amostras)
+    passo_x = max(1, img.shape[1] // amostras) if img.ndim > 1 else 1
+    grade = img[::passo_y, ::passo_x] if img.ndim > 1 else img[::passo_y]
+    return (img.__array_interface__['data'][0], img.shape, img.strides, zlib.crc32(np.ascontiguousarray(grade)))
+
+def cache_por_array(img, nome, calcular):
+    """
+    calcular(img) uma vez por array e nome; o resultado sai do cache junto com o array
+
+    A chave é o id do array, conferido por weakref (um id reaproveitado
+    por outro array não devolve o resultado antigo) e por assinatura_array
+    (o array foi alterado no lugar desde o cálculo). A assinatura é por
+    amostragem: quem altera a imagem depois de analisá-la deve passar uma
+    cópia. O resultado não pode guardar referência ao próprio img (uma
+    view dele, por exemplo), senão o array nunca é liberado.
+    """
+    chave = (id(img), nome)
+    assinatura = assinatura_array(img)
+    item = _CACHE.get(chave)
+    if item is not None and item[0]() is img and item[1] == assinatura:
+        return item[2]
+
+    resultado = calcular(img)
+    _CACHE[chave] = (weakref.ref(img, lambda _: _CACHE.pop(chave, None)), assinatura, resultado)
+    return resultado
+
+def _converter_somente_leitura(img, espaco):
+    convertida = converter_cores(img, espaco)
+    convertida.flags.writeable = False
+    return convertida
+
+def converter_compartilhado(img, espaco='hsv'):
+    """
+    converter_cores calculado uma vez por imagem e espaço (cache pelo próprio array)
+
+    Todos os analisadores que recebem o mesmo array reaproveitam a mesma
+    conversão; o resultado é somente leitura.
+    """
+    return cache_por_array(img, espaco, lambda img: _converter_somente_leitura(img, espaco))
+
+def cores_unicas(img, mascara=None):
+    """
+    Cores únicas (K, 3) BGR da imagem, quantos pixels têm cada uma e o índice de volta
+
+    inverso tem um índice por pixel selecionado: cores[inverso] reconstrói os pixels.
+    """
+    codigos = codigos_24bits(img)
+    if mascara is not None:
+        codigos = codigos[mascara]
+    unicos, inverso, contagens = np.unique(codigos.ravel(), return_inverse=True, return_counts=True)
+    cores = np.stack([(unicos >> 16) & 255, (unicos >> 8) & 255, unicos & 255], axis=1).astype(np.uint8)
+    return cores, contagens, inverso
+
+def converter_unicas(cores, espaco='lab'):
+    """
+    Converte só as cores únicas (K, 3) pela LUT (sem montar uma imagem)
+    """
+    return np.take(lut_conversao(espaco), codigos_24bits(cores), axis=0)
+
+def comparar_conversoes(caminho_pasta, repeticoes=5):
+    """
+    Tempo médio por imagem de cvtColor vs LUT para cada espaço (e checa igualdade)
+    """
+    imagens = [carregar_imagem(a) for a in sorted(Path(caminho_pasta).glob("*.TIF"))]
+    for espaco in CONVERSOES:
+        lut_conversao(espaco)
+        for metodo in ('cv2', 'lut'):
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                for img in imagens:
+                    converter_cores(img, espaco, metodo)
+            ms = (time.perf_counter() - inicio) / (repeticoes * len(imagens)) * 1000
+            print(f"   {espaco} {metodo}: {ms:.1f} ms/imagem")
+
+        iguais = all(np.array_equal(converter_cores(img, espaco, 'cv2'), converter_cores(img, espaco, 'lut'))
+                     for img in imagens)
+        print(f"   {espaco}: resultados {'idênticos' if iguais else 'DIFERENTES'}")
+
+if __name__ == "__main__":
+    caminho = r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image\CA_processada"
+
+    comparar_conversoes(caminho)
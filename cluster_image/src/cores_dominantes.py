@@ -1,78 +1,261 @@
+import time
 import cv2
 import numpy as np
-from PIL import Image
 from pathlib import Path
 import pandas as pd
 from sklearn.cluster import KMeans
+from upload import carregar_imagem
+from conversao_cores import cores_unicas
 
-def extrair_cores_dominantes(img, n_cores=5, ignorar_branco=True):
+# n_cores='auto': teto da busca e critérios para juntar cores
+N_CORES_MAXIMO = 10
+DELTA_E_MINIMO = 25   # cores a menos de 25 ΔE (CIE76) uma da outra viram uma só
+PESO_MINIMO = 0.02    # cor com menos de 2% dos pixels é absorvida pela mais próxima
+
+# Parada antecipada do K-Means aquecido (o padrão do scikit-learn é tol=1e-4,
+# max_iter=300). Em CA_processada, partindo da imagem anterior: ~35% menos
+# iterações que o mesmo ajuste levado até convergir, com inércia mediana
+# +0,02% (pior imagem +0,7%); ver kmeans_aquecido.comparar_aquecimento
+TOL_AQUECIDO = 1e-3
+MAX_ITER_AQUECIDO = 20
+
+def pixels_nao_brancos(img):
+    """
+    Lista de pixels BGR sem os quase brancos (> 240 em todos os canais)
+    """
+    pixels = img.reshape(-1, 3)
+    nao_brancos = ~((pixels[:, 0] > 240) & (pixels[:, 1] > 240) & (pixels[:, 2] > 240))
+    return pixels[nao_brancos]
+
+def ajustar_kmeans(pixels, n_cores, centroides_iniciais=None, tol=None, max_iter=None):
+    """
+    K-Means padrão (10 reinícios) ou aquecido a partir de centroides conhecidos
+
+    Com centroides_iniciais (ex.: da imagem anterior da mesma pasta, que usa
+    o mesmo conjunto de giz de cera) roda um único ajuste partindo deles, em
+    vez de 10 a partir do k-means++, e com parada antecipada: tol e
+    max_iter mais frouxos (TOL_AQUECIDO, MAX_ITER_AQUECIDO), já que o
+    ponto de partida está perto da solução. tol/max_iter explícitos valem
+    para os dois modos.
+    """
+    if centroides_iniciais is None:
+        kmeans = KMeans(n_clusters=n_cores, random_state=42, n_init=10,
+                        tol=1e-4 if tol is None else tol, max_iter=300 if max_iter is None else max_iter)
+    else:
+        init = np.asarray(centroides_iniciais, dtype=np.float64)
+        kmeans = KMeans(n_clusters=n_cores, init=init, n_init=1,
+                        tol=TOL_AQUECIDO if tol is None else tol,
+                        max_iter=MAX_ITER_AQUECIDO if max_iter is None else max_iter)
+    
+    kmeans.fit(pixels)
+    return kmeans
+
+def centroides_em_lab(centroides, espaco='bgr'):
+    """
+    Centroides (k, 3) BGR ou HSV (escala do OpenCV) em CIELab de verdade (L 0-100)
+    """
+    cores = np.asarray(centroides, dtype=np.float32).reshape(1, -1, 3)
+    if espaco == 'hsv':
+        # cvtColor em float espera H em graus e S, V em 0-1
+        cores = cv2.cvtColor(cores * np.float32([2, 1 / 255, 1 / 255]), cv2.COLOR_HSV2BGR)
+    else:
+        cores = cores / 255
+    return cv2.cvtColor(cores, cv2.COLOR_BGR2LAB)[0]
+
+def media_cores(cores, pesos, espaco='bgr'):
+    """
+    Média ponderada de cores; em HSV o matiz (0-179) é a média circular
+
+    Em média linear, vermelhos dos dois lados do 0 (H=2 e H=177) dariam
+    H=89,5, um verde-ciano que não está na imagem.
+    """
+    cores = np.asarray(cores, dtype=np.float64).reshape(-1, 3)
+    pesos = np.asarray(pesos, dtype=np.float64)
+    media = pesos @ cores / pesos.sum()
+    if espaco == 'hsv':
+        angulos = cores[:, 0] * (np.pi / 90)
+        media[0] = np.arctan2(pesos @ np.sin(angulos), pesos @ np.cos(angulos)) * (90 / np.pi) % 180
+    return media
+
+def distancias_cores(cores, centroides, espaco='bgr'):
+    """
+    Distância euclidiana ao quadrado (n, k); em HSV a diferença de matiz dá a volta no 180
+    """
+    diferencas = np.abs(np.asarray(cores, dtype=np.float64)[:, None] - np.asarray(centroides, dtype=np.float64)[None])
+    if espaco == 'hsv':
+        diferencas[..., 0] = np.minimum(diferencas[..., 0], 180 - diferencas[..., 0])
+    return (diferencas ** 2).sum(axis=-1)
+
+def kmeans_ponderado(cores, pesos, iniciais, espaco='bgr', max_iter=50):
+    """
+    K-Means (Lloyd) com pesos partindo de iniciais; devolve (centroides, rótulos)
+
+    Existe para o HSV, onde o matiz é circular e o KMeans do scikit-learn
+    separaria H=179 de H=0. Cluster que fica vazio mantém o centroide.
+    """
+    centroides = np.array(iniciais, dtype=np.float64)
+    for _ in range(max_iter):
+        rotulos = np.argmin(distancias_cores(cores, centroides, espaco), axis=1)
+        novos = centroides.copy()
+        for k in range(len(centroides)):
+            membros = rotulos == k
+            if membros.any():
+                novos[k] = media_cores(cores[membros], pesos[membros], espaco)
+        if np.allclose(novos, centroides):
+            break
+        centroides = novos
+    return centroides, rotulos
+
+def reduzir_paleta(centroides, pesos, espaco='bgr', delta_e_minimo=DELTA_E_MINIMO, peso_minimo=PESO_MINIMO):
+    """
+    Junta centroides parecidos ou pequenos até sobrar só o que é cor distinta
+
+    A cada passo, a cor com menos de peso_minimo do total é absorvida pela
+    mais próxima; senão, o par mais próximo (ΔE em Lab) é fundido se estiver
+    abaixo de delta_e_minimo. A fusão é a média ponderada pelos pixels
+    (media_cores, circular no matiz em HSV).
+    """
+    centroides = [np.asarray(c, dtype=np.float64) for c in centroides]
+    pesos = [float(p) for p in pesos]
+    total = sum(pesos)
+
+    while len(centroides) > 1:
+        lab = centroides_em_lab(centroides, espaco)
+        distancias = np.sqrt(((lab[:, None] - lab[None]) ** 2).sum(axis=-1))
+        np.fill_diagonal(distancias, np.inf)
+
+        i = int(np.argmin(pesos))
+        if pesos[i] / total < peso_minimo:
+            j = int(np.argmin(distancias[i]))
+        else:
+            i, j = np.unravel_index(np.argmin(distancias), distancias.shape)
+            if distancias[i, j] >= delta_e_minimo:
+                break
+
+        centroides[i] = media_cores([centroides[i], centroides[j]], [pesos[i], pesos[j]], espaco)
+        pesos[i] += pesos[j]
+        del centroides[j], pesos[j]
+
+    return np.array(centroides)
+
+def ajustar_kmeans_auto(pixels, espaco='bgr', n_maximo=N_CORES_MAXIMO):
+    """
+    K-Means com o número de cores escolhido por imagem
+
+    Tudo roda nas cores únicas com peso = número de pixels (o mesmo
+    objetivo do K-Means nos pixels, com bem menos pontos): um ajuste com
+    n_maximo cores, reduzir_paleta para escolher k e um último ajuste
+    partindo das cores reduzidas (em HSV com kmeans_ponderado, que trata
+    o matiz como circular). Devolve (centroides, percentuais), da cor
+    mais frequente para a menos.
+    """
+    cores, contagens, _ = cores_unicas(np.ascontiguousarray(pixels, dtype=np.uint8))
+    cores = cores.astype(np.float64)
+    n_maximo = min(n_maximo, len(cores))
+
+    kmeans = KMeans(n_clusters=n_maximo, random_state=42, n_init=1).fit(cores, sample_weight=contagens)
+    pesos = np.bincount(kmeans.labels_, weights=contagens, minlength=n_maximo)
+    iniciais = reduzir_paleta(kmeans.cluster_centers_[pesos > 0], pesos[pesos > 0], espaco)
+
+    k = len(iniciais)
+    if espaco == 'hsv':
+        centroides, rotulos = kmeans_ponderado(cores, contagens, iniciais, espaco)
+    else:
+        kmeans = KMeans(n_clusters=k, init=iniciais, n_init=1).fit(cores, sample_weight=contagens)
+        centroides, rotulos = kmeans.cluster_centers_, kmeans.labels_
+    percentuais = np.bincount(rotulos, weights=contagens, minlength=k) / contagens.sum() * 100
+
+    ordem = np.argsort(-percentuais)
+    return centroides[ordem], percentuais[ordem]
+
+def extrair_cores_dominantes(img, n_cores=5, ignorar_branco=True, centroides_iniciais=None):
     """
     Extrai cores dominantes usando K-Means
+
+    n_cores='auto' escolhe o número de cores por imagem (ajustar_kmeans_auto);
+    nesse modo centroides_iniciais é ignorado.
     """
     # Reshape para lista de pixels
     pixels = img.reshape(-1, 3)
     
     # Remover pixels brancos se solicitado
     if ignorar_branco:
-        # Pixels que NÃO são quase brancos (< 240 em qualquer canal)
-        nao_brancos = ~((pixels[:, 0] > 240) & (pixels[:, 1] > 240) & (pixels[:, 2] > 240))
-        pixels = pixels[nao_brancos]
+        pixels = pixels_nao_brancos(img)
+    
+    if n_cores == 'auto':
+        if len(pixels) == 0:
+            return [], []
+        cores, percentuais = ajustar_kmeans_auto(pixels, 'bgr')
+        return cores.astype(int), percentuais
     
     if len(pixels) < n_cores:
         return [], []
     
     # K-Means para encontrar cores dominantes
-    kmeans = KMeans(n_clusters=n_cores, random_state=42, n_init=10)
-    kmeans.fit(pixels)
+    kmeans = ajustar_kmeans(pixels, n_cores, centroides_iniciais)
     
     # Cores dominantes (centroids)
     cores = kmeans.cluster_centers_.astype(int)
     
     # Contar quantos pixels cada cor representa
     labels = kmeans.labels_
-    contagens = np.bincount(labels)
+    contagens = np.bincount(labels, minlength=n_cores)
     percentuais = (contagens / len(pixels)) * 100
     
     return cores, percentuais
 
-def analisar_cores_dataset(caminho_pasta):
+def analisar_imagem_cores(img, nome, aquecimento=None, n_cores=5):
+    """
+    Gera a linha de resultado de cores dominantes de uma imagem
+
+    aquecimento: dicionário compartilhado entre imagens; os centroides da
+    imagem anterior ('centroides') iniciam o K-Means desta e são atualizados
+    n_cores='auto': número de cores por imagem (coluna n_cores na linha)
+    """
+    centroides = aquecimento.get('centroides') if aquecimento is not None else None
+    
+    # Extrair cores dominantes (5, ou quantas a imagem tiver no modo 'auto')
+    cores, percentuais = extrair_cores_dominantes(img, n_cores=n_cores, centroides_iniciais=centroides)
+    
+    if len(cores) == 0:
+        return None
+    
+    if aquecimento is not None:
+        aquecimento['centroides'] = cores
+    
+    resultado = {'nome': nome}
+    if n_cores == 'auto':
+        resultado['n_cores'] = len(cores)
+    
+    # Sempre pelo menos 5 pares de colunas (vazios se faltarem cores)
+    for i in range(max(5, len(cores))):
+        resultado[f'cor_{i+1}'] = cores[i].tolist() if len(cores) > i else None
+        resultado[f'perc_{i+1}'] = round(percentuais[i], 1) if len(cores) > i else None
+    
+    return resultado
+
+def analisar_cores_dataset(caminho_pasta, aquecido=False, n_cores=5):
     """
     Analisa cores dominantes de todas as imagens
+
+    Com aquecido=True, cada imagem parte dos centroides da anterior
+    (um único ajuste em vez de 10 reinícios); n_cores='auto' escolhe
+    o número de cores de cada imagem
     """
     pasta = Path(caminho_pasta)
     resultados = []
+    aquecimento = {} if aquecido else None
     
     print("Analisando cores dominantes...")
     
     for arquivo in pasta.glob("*.TIF"):
         try:
             # Carregar imagem
-            pil_img = Image.open(arquivo)
-            img_array = np.array(pil_img)
-            
-            if len(img_array.shape) == 3 and pil_img.mode == 'RGB':
-                img = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-            else:
-                img = img_array
+            img = carregar_imagem(arquivo)
             
-            # Extrair 5 cores dominantes
-            cores, percentuais = extrair_cores_dominantes(img, n_cores=5)
+            resultado = analisar_imagem_cores(img, arquivo.name, aquecimento, n_cores)
             
-            if len(cores) > 0:
-                resultado = {
-                    'nome': arquivo.name,
-                    'cor_1': cores[0].tolist(),
-                    'perc_1': round(percentuais[0], 1),
-                    'cor_2': cores[1].tolist() if len(cores) > 1 else None,
-                    'perc_2': round(percentuais[1], 1) if len(cores) > 1 else None,
-                    'cor_3': cores[2].tolist() if len(cores) > 2 else None,
-                    'perc_3': round(percentuais[2], 1) if len(cores) > 2 else None,
-                    'cor_4': cores[3].tolist() if len(cores) > 3 else None,
-                    'perc_4': round(percentuais[3], 1) if len(cores) > 3 else None,
-                    'cor_5': cores[4].tolist() if len(cores) > 4 else None,
-                    'perc_5': round(percentuais[4], 1) if len(cores) > 4 else None,
-                }
-                
+            if resultado is not None:
                 resultados.append(resultado)
         
         except Exception as e:
@@ -80,6 +263,25 @@ def analisar_cores_dataset(caminho_pasta):
     
     return pd.DataFrame(resultados)
 
+def comparar_n_cores_auto(caminho_pasta):
+    """
+    Tempo e k escolhido do modo 'auto' contra o ajuste fixo de 5 cores, imagem a imagem
+    """
+    linhas = []
+    for arquivo in sorted(Path(caminho_pasta).glob("*.TIF")):
+        img = carregar_imagem(arquivo)
+        inicio = time.perf_counter()
+        extrair_cores_dominantes(img, n_cores=5)
+        tempo_fixo = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        cores, _ = extrair_cores_dominantes(img, n_cores='auto')
+        tempo_auto = time.perf_counter() - inicio
+        linhas.append({'nome': arquivo.name, 'n_cores': len(cores),
+                       'tempo_fixo_ms': round(tempo_fixo * 1000), 'tempo_auto_ms': round(tempo_auto * 1000)})
+    
+    df = pd.DataFrame(linhas)
+    print(df.to_string(index=False))
+    return df
 
 if __name__ == "__main__":
     caminho = r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image\CA_processada"
@@ -1,53 +1,55 @@
 import cv2
 import numpy as np
-from PIL import Image
 from pathlib import Path
 import pandas as pd
+from upload import carregar_imagem
+from conversao_cores import converter_compartilhado
+from histograma_matiz import histograma_matiz, desvio_circular, metricas_matiz
+
+def mascaras_densidade(s, v):
+    """
+    Máscaras das categorias de analisar_densidade_saturacao
+
+    Funciona com planos S e V de qualquer formato (imagem inteira ou amostra).
+    Vívido, suave e quase monocromático são exclusivos entre si, nessa ordem.
+    """
+    mask_vivido = (s > 150) & (v > 80)
+    mask_suave = (s > 80) & (s <= 150) & (v > 60) & ~mask_vivido
+    return {
+        'cinza': (s <= 20) & (v > 40) & (v < 200),    # dessaturados
+        'branco': (v >= 200) & (s <= 30),             # muito claros
+        'preto': v <= 40,                             # muito escuros
+        'colorido_vivido': mask_vivido,
+        'colorido_suave': mask_suave,
+        'quase_monocromatico': (s > 20) & (s <= 80) & (v > 50) & ~mask_vivido & ~mask_suave,
+    }
+
+def mascara_colorida(s, v):
+    """
+    Pixels com matiz confiável para a diversidade e as métricas de matiz
+    """
+    return (s > 50) & (v > 50) & (v < 230)
 
 def analisar_densidade_saturacao(img):
     """
     Analisa densidade de saturação sem definir cores específicas
     """
     # Converter para HSV
-    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    hsv = converter_compartilhado(img, 'hsv')
     h, s, v = cv2.split(hsv)
     
     total_pixels = img.shape[0] * img.shape[1]
+    mascaras = mascaras_densidade(s, v)
     
-    # Categorias por saturação e valor
+    # Cinzas, brancos e pretos: percentual da imagem inteira
     resultados = {}
-    
-    # 4. Pixels dessaturados (cinzas)
-    mask_cinza = (s <= 20) & (v > 40) & (v < 200)
-    cinzas = np.sum(mask_cinza)
-    resultados['cinza'] = round((cinzas / total_pixels) * 100, 2)
-    
-    # 5. Pixels muito claros (brancos)
-    mask_branco = (v >= 200) & (s <= 30)
-    brancos = np.sum(mask_branco)
-    resultados['branco'] = round((brancos / total_pixels) * 100, 2)
-    
-    # 6. Pixels muito escuros (pretos)
-    mask_preto = (v <= 40)
-    pretos = np.sum(mask_preto)
-    resultados['preto'] = round((pretos / total_pixels) * 100, 2)
+    for categoria in ('cinza', 'branco', 'preto'):
+        resultados[categoria] = round((np.sum(mascaras[categoria]) / total_pixels) * 100, 2)
 
-    pixel_n_branco = total_pixels - brancos
-
-    # 1. Pixels muito saturados (coloridos vívidos)
-    mask_vivido = (s > 150) & (v > 80)
-    vividos = np.sum(mask_vivido)
-    resultados['colorido_vivido'] = round((vividos / pixel_n_branco) * 100, 2)
-    
-    # 2. Pixels moderadamente saturados (coloridos suaves)
-    mask_suave = (s > 80) & (s <= 150) & (v > 60) & ~mask_vivido
-    suaves = np.sum(mask_suave)
-    resultados['colorido_suave'] = round((suaves / pixel_n_branco) * 100, 2)
-    
-    # 3. Pixels pouco saturados (quase monocromático)
-    mask_mono = (s > 20) & (s <= 80) & (v > 50) & ~mask_vivido & ~mask_suave
-    mono = np.sum(mask_mono)
-    resultados['quase_monocromatico'] = round((mono / pixel_n_branco) * 100, 2)
+    # Coloridos: percentual dos pixels que não são brancos
+    pixel_n_branco = total_pixels - np.sum(mascaras['branco'])
+    for categoria in ('colorido_vivido', 'colorido_suave', 'quase_monocromatico'):
+        resultados[categoria] = round((np.sum(mascaras[categoria]) / pixel_n_branco) * 100, 2)
     
     # Métricas gerais
     resultados['saturacao_media'] = round(np.mean(s), 2)
@@ -55,43 +57,81 @@ def analisar_densidade_saturacao(img):
     
     # Classificação geral
     total_colorido = resultados['colorido_vivido'] + resultados['colorido_suave']
+    resultados['classificacao'] = classificar_colorido(total_colorido)
     
+    return resultados
+
+def classificar_colorido(total_colorido):
+    """
+    Classificação geral pelo percentual de pixels coloridos (vívidos + suaves)
+    """
     if total_colorido > 40:
-        resultados['classificacao'] = "Muito Colorido"
+        return "Muito Colorido"
     elif total_colorido > 20:
-        resultados['classificacao'] = "Colorido"
+        return "Colorido"
     elif total_colorido > 10:
-        resultados['classificacao'] = "Pouco Colorido"
+        return "Pouco Colorido"
     else:
-        resultados['classificacao'] = "Monocromático"
-    
-    return resultados
+        return "Monocromático"
 
 def calcular_diversidade_cores(img):
     """
     Calcula diversidade sem definir cores específicas
     """
-    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    hsv = converter_compartilhado(img, 'hsv')
     h, s, v = cv2.split(hsv)
     
     # Filtrar apenas pixels coloridos
-    mask_colorido = (s > 50) & (v > 50) & (v < 230)
+    mask_colorido = mascara_colorida(s, v)
     
     if np.sum(mask_colorido) < 100:
         return 0
     
-    # Pegar valores H dos pixels coloridos
-    h_coloridos = h[mask_colorido]
-    
-    # Calcular dispersão dos matizes (0-179)
+    # Dispersão circular dos matizes (0 e 179 são vizinhos)
     # Quanto mais espalhado, mais diverso
-    if len(h_coloridos) > 0:
-        std_h = np.std(h_coloridos)
-        # Normalizar para 0-100
-        diversidade = min((std_h / 60) * 100, 100)
-        return round(diversidade, 1)
+    std_h = desvio_circular(histograma_matiz(h, mask_colorido))
+    # Normalizar para 0-100
+    diversidade = min((std_h / 60) * 100, 100)
+    return round(diversidade, 1)
+
+def analisar_imagem_densidade(img, nome):
+    """
+    Gera a linha de resultado de densidade de saturação de uma imagem
+    """
+    # Analisar densidade
+    densidade = analisar_densidade_saturacao(img)
+    diversidade = calcular_diversidade_cores(img)
     
-    return 0
+    return linha_densidade(nome, densidade, diversidade)
+
+def analisar_imagem_matiz(img, nome):
+    """
+    Gera a linha de métricas circulares do matiz (mesmos pixels coloridos da diversidade)
+    """
+    hsv = converter_compartilhado(img, 'hsv')
+    h, s, v = cv2.split(hsv)
+    mask_colorido = mascara_colorida(s, v)
+    hist = histograma_matiz(h, mask_colorido)
+    return {'nome': nome, 'pixels_coloridos': int(hist.sum()), **metricas_matiz(hist)}
+
+def linha_densidade(nome, densidade, diversidade):
+    """
+    Linha de resultado a partir da densidade e da diversidade já calculadas
+    """
+    return {
+        'nome': nome,
+        'classificacao': densidade['classificacao'],
+        'colorido_vivido': densidade['colorido_vivido'],
+        'colorido_suave': densidade['colorido_suave'],
+        'total_colorido': densidade['colorido_vivido'] + densidade['colorido_suave'],
+        'monocromatico': densidade['quase_monocromatico'],
+        'cinza': densidade['cinza'],
+        'branco': densidade['branco'],
+        'preto': densidade['preto'],
+        'saturacao_media': densidade['saturacao_media'],
+        'valor_medio': densidade['valor_medio'],
+        'diversidade_cores': diversidade
+    }
 
 def analisar_densidade_dataset(caminho_pasta):
     """
@@ -105,33 +145,9 @@ def analisar_densidade_dataset(caminho_pasta):
     for arquivo in pasta.glob("*.TIF"):
         try:
             # Carregar imagem
-            pil_img = Image.open(arquivo)
-            img_array = np.array(pil_img)
-            
-            if len(img_array.shape) == 3 and pil_img.mode == 'RGB':
-                img = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-            else:
-                img = img_array
-            
-            # Analisar densidade
-            densidade = analisar_densidade_saturacao(img)
-            diversidade = calcular_diversidade_cores(img)
+            img = carregar_imagem(arquivo)
             
-            # Preparar resultado
-            resultado = {
-                'nome': arquivo.name,
-                'classificacao': densidade['classificacao'],
-                'colorido_vivido': densidade['colorido_vivido'],
-                'colorido_suave': densidade['colorido_suave'],
-                'total_colorido': densidade['colorido_vivido'] + densidade['colorido_suave'],
-                'monocromatico': densidade['quase_monocromatico'],
-                'cinza': densidade['cinza'],
-                'branco': densidade['branco'],
-                'preto': densidade['preto'],
-                'saturacao_media': densidade['saturacao_media'],
-                'valor_medio': densidade['valor_medio'],
-                'diversidade_cores': diversidade
-            }
+            resultado = analisar_imagem_densidade(img, arquivo.name)
             
             resultados.append(resultado)
             
@@ -0,0 +1,205 @@
+import argparse
+import csv
+import json
+import os
+import traceback
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from analisadores import selecionar_analisadores
+from leitura_antecipada import ler_imagens_antecipadas
+
+COLUNAS_FALHAS = ['nome', 'analisador', 'erro', 'traceback', 'quando']
+
+def para_json(valor):
+    """Converte tipos numpy para tipos nativos na serialização"""
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+class Diario:
+    """
+    Diário append-only (JSON Lines) com os resultados de um analisador
+
+    Cada linha gravada vai para o disco (flush + fsync) a cada 'lote'
+    linhas, então uma queda perde no máximo o lote em andamento.
+    """
+
+    def __init__(self, arquivo, retomar=False, lote=1):
+        self.arquivo = Path(arquivo)
+        self.lote = lote
+        self.pendentes = 0
+        self.concluidos = set()
+
+        if retomar and self.arquivo.exists():
+            self.cortar_linha_incompleta()
+            for linha in self.linhas():
+                self.concluidos.add(linha['nome'])
+
+        self.f = open(self.arquivo, 'a' if retomar else 'w', encoding='utf-8')
+
+    def cortar_linha_incompleta(self):
+        """
+        Corta o diário de volta ao último fim de linha (linha truncada por uma queda)
+
+        Sem isso o próximo registro seria colado no fragmento e a linha
+        inteira, registro novo incluído, seria descartada na leitura.
+        """
+        with open(self.arquivo, 'rb+') as f:
+            dados = f.read()
+            if dados and not dados.endswith(b'\n'):
+                f.truncate(dados.rfind(b'\n') + 1)
+
+    def linhas(self):
+        """Lê as linhas válidas do diário (ignora uma última linha truncada)"""
+        with open(self.arquivo, encoding='utf-8') as f:
+            for texto in f:
+                try:
+                    yield json.loads(texto)
+                except json.JSONDecodeError:
+                    continue
+
+    def gravar(self, linha):
+        self.f.write(json.dumps(linha, ensure_ascii=False, default=para_json) + '\n')
+        self.concluidos.add(linha['nome'])
+        self.pendentes += 1
+        if self.pendentes >= self.lote:
+            self.sincronizar()
+
+    def sincronizar(self):
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.pendentes = 0
+
+    def fechar(self):
+        self.sincronizar()
+        self.f.close()
+
+def registrar_falha(arquivo_falhas, nome, analisador, erro):
+    """
+    Acrescenta a falha (com traceback) à tabela de falhas
+    """
+    arquivo_falhas = Path(arquivo_falhas)
+    novo = not arquivo_falhas.exists()
+
+    with open(arquivo_falhas, 'a', newline='', encoding='utf-8') as f:
+        escritor = csv.DictWriter(f, fieldnames=COLUNAS_FALHAS)
+        if novo:
+            escritor.writeheader()
+        escritor.writerow({
+            'nome': nome,
+            'analisador': analisador,
+            'erro': f"{type(erro).__name__}: {erro}",
+            'traceback': ''.join(traceback.format_exception(erro)),
+            'quando': datetime.now().isoformat(timespec='seconds'),
+        })
+        f.flush()
+        os.fsync(f.fileno())
+
+def limpar_falhas_resolvidas(arquivo_falhas, diarios):
+    """
+    Tira de falhas.csv as falhas de (imagem, analisador) que já têm resultado no diário
+    """
+    arquivo_falhas = Path(arquivo_falhas)
+    if not arquivo_falhas.exists():
+        return
+
+    with open(arquivo_falhas, newline='', encoding='utf-8') as f:
+        falhas = list(csv.DictReader(f))
+    restantes = [falha for falha in falhas
+                 if falha['analisador'] not in diarios or falha['nome'] not in diarios[falha['analisador']].concluidos]
+    if len(restantes) == len(falhas):
+        return
+
+    with open(arquivo_falhas, 'w', newline='', encoding='utf-8') as f:
+        escritor = csv.DictWriter(f, fieldnames=COLUNAS_FALHAS)
+        escritor.writeheader()
+        escritor.writerows(restantes)
+    print(f"🧹 {len(falhas) - len(restantes)} falha(s) resolvida(s) removida(s) de {arquivo_falhas.name}")
+
+def executar_com_checkpoint(caminho_pasta, analisadores=None, pasta_saida='.', retomar=False, lote=1,
+                            concorrencia=4, recortar=False):
+    """
+    Roda os analisadores registrados com diário por imagem e retomada
+
+    - resultados: <csv>.diario.jsonl (um por analisador), consolidados no
+      CSV final ao terminar
+    - falhas: falhas.csv (nome, analisador, erro, traceback, quando)
+    - retomar=True pula as imagens que já estão no diário; as que falharam
+      são tentadas de novo e saem de falhas.csv quando passam
+    - recortar=True roda os analisadores só na caixa do desenho
+    """
+    pasta = Path(caminho_pasta)
+    pasta_saida = Path(pasta_saida)
+    selecionados = selecionar_analisadores(analisadores, recortar)
+    arquivo_falhas = pasta_saida / 'falhas.csv'
+    if not retomar and arquivo_falhas.exists():
+        arquivo_falhas.unlink()
+
+    diarios = {
+        nome: Diario(pasta_saida / f"{Path(arquivo_csv).stem}.diario.jsonl", retomar, lote)
+        for nome, (_, arquivo_csv) in selecionados.items()
+    }
+
+    arquivos = sorted(pasta.glob("*.TIF"))
+    pendentes = [a for a in arquivos if any(a.name not in d.concluidos for d in diarios.values())]
+    print(f"▶️  {len(pendentes)} de {len(arquivos)} imagens pendentes")
+
+    try:
+        for arquivo, img, erro in ler_imagens_antecipadas(pendentes, concorrencia):
+            ok = True
+            for nome, (funcao, _) in selecionados.items():
+                diario = diarios[nome]
+                if arquivo.name in diario.concluidos:
+                    continue
+                try:
+                    if erro is not None:
+                        raise erro
+                    resultado = funcao(img, arquivo.name)
+                    # Linha vazia marca a imagem como concluída sem resultado
+                    diario.gravar(resultado if resultado is not None else {'nome': arquivo.name, '_vazio': True})
+                except Exception as e:
+                    print(f"❌ {arquivo.name} [{nome}]: {e}")
+                    registrar_falha(arquivo_falhas, arquivo.name, nome, e)
+                    ok = False
+
+            if ok:
+                print(f"✅ {arquivo.name}")
+
+    except KeyboardInterrupt:
+        print("\n⏹️  Interrompido: progresso salvo, rode de novo com --resume para continuar")
+        raise
+
+    finally:
+        for diario in diarios.values():
+            diario.fechar()
+
+    limpar_falhas_resolvidas(arquivo_falhas, diarios)
+
+    # Consolidar os diários nos CSVs finais
+    for nome, (_, arquivo_csv) in selecionados.items():
+        linhas = [linha for linha in diarios[nome].linhas() if not linha.get('_vazio')]
+        pd.DataFrame(linhas).to_csv(pasta_saida / arquivo_csv, index=False)
+        print(f"💾 Salvo: {arquivo_csv} ({len(linhas)} linhas)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Execução em lote com checkpoint e retomada")
+    parser.add_argument('caminho', nargs='?',
+                        default=r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image\CA_processada")
+    parser.add_argument('--analisadores', nargs='+', help="subconjunto dos analisadores registrados")
+    parser.add_argument('--saida', default='.', help="pasta dos diários, falhas e CSVs")
+    parser.add_argument('--resume', '--retomar', dest='retomar', action='store_true',
+                        help="continua a partir do último checkpoint")
+    parser.add_argument('--lote', type=int, default=1, help="imagens por fsync do diário")
+    parser.add_argument('--recortar', action='store_true',
+                        help="analisa só a caixa do desenho, sem o papel em volta")
+    args = parser.parse_args()
+
+    try:
+        executar_com_checkpoint(args.caminho, args.analisadores, args.saida, args.retomar, args.lote,
+                                recortar=args.recortar)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,174 @@
+import cv2
+import numpy as np
+from pathlib import Path
+import pandas as pd
+from upload import carregar_imagem
+
+def _cinza(img):
+    """Converte para escala de cinza se necessário"""
+    if len(img.shape) == 3:
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return img
+
+def _bits_para_int(bits):
+    """Empacota uma matriz booleana em um inteiro (64 bits para 8x8)"""
+    valor = 0
+    for bit in bits.ravel():
+        valor = (valor << 1) | int(bit)
+    return valor
+
+def ahash(gray, tamanho=8):
+    """
+    Average hash: pixels acima da média da miniatura
+    """
+    mini = cv2.resize(gray, (tamanho, tamanho), interpolation=cv2.INTER_AREA)
+    return _bits_para_int(mini > mini.mean())
+
+def dhash(gray, tamanho=8):
+    """
+    Difference hash: gradiente horizontal entre vizinhos
+    """
+    mini = cv2.resize(gray, (tamanho + 1, tamanho), interpolation=cv2.INTER_AREA)
+    return _bits_para_int(mini[:, 1:] > mini[:, :-1])
+
+def phash(gray, tamanho=8, fator=4):
+    """
+    Perceptual hash: baixas frequências da DCT comparadas à mediana
+    """
+    lado = tamanho * fator
+    mini = cv2.resize(gray, (lado, lado), interpolation=cv2.INTER_AREA).astype(np.float32)
+    dct = cv2.dct(mini)[:tamanho, :tamanho]
+    # Mediana sem o termo DC (brilho médio)
+    mediana = np.median(dct.ravel()[1:])
+    return _bits_para_int(dct > mediana)
+
+def calcular_hashes(img):
+    """
+    Calcula aHash, dHash e pHash da imagem e da versão espelhada
+
+    O verso de um desenho mostra o traço espelhado (vazamento do papel),
+    por isso os hashes espelhados servem para achar pares frente/verso.
+    """
+    gray = _cinza(img)
+    # Equalizar para que versos apagados tenham contraste comparável
+    gray = cv2.equalizeHist(gray)
+    espelhada = cv2.flip(gray, 1)
+
+    return {
+        'ahash': ahash(gray),
+        'dhash': dhash(gray),
+        'phash': phash(gray),
+        'phash_espelhado': phash(espelhada),
+    }
+
+def distancia_hamming(a, b):
+    """Número de bits diferentes entre dois hashes"""
+    return (a ^ b).bit_count()
+
+class ArvoreBK:
+    """
+    BK-tree sobre distância de Hamming para busca por raio sub-quadrática
+    """
+
+    def __init__(self):
+        self.raiz = None
+        self.tamanho = 0
+
+    def inserir(self, valor, item):
+        """Insere (hash, item) na árvore"""
+        self.tamanho += 1
+        if self.raiz is None:
+            self.raiz = (valor, item, {})
+            return
+
+        no = self.raiz
+        while True:
+            d = distancia_hamming(valor, no[0])
+            filho = no[2].get(d)
+            if filho is None:
+                no[2][d] = (valor, item, {})
+                return
+            no = filho
+
+    def buscar(self, valor, raio):
+        """Devolve [(distância, item)] com distância <= raio"""
+        if self.raiz is None:
+            return []
+
+        encontrados = []
+        pilha = [self.raiz]
+        while pilha:
+            no_valor, no_item, filhos = pilha.pop()
+            d = distancia_hamming(valor, no_valor)
+            if d <= raio:
+                encontrados.append((d, no_item))
+            # Desigualdade triangular: só descer nos filhos em [d - raio, d + raio]
+            for dist_filho, filho in filhos.items():
+                if d - raio <= dist_filho <= d + raio:
+                    pilha.append(filho)
+
+        return sorted(encontrados, key=lambda x: x[0])
+
+def indexar_hashes(caminho_pasta, recursivo=True):
+    """
+    Calcula os hashes de todas as imagens da pasta (e subpastas)
+    """
+    pasta = Path(caminho_pasta)
+    arquivos = pasta.rglob("*.TIF") if recursivo else pasta.glob("*.TIF")
+    registros = []
+
+    for arquivo in sorted(arquivos):
+        try:
+            img = carregar_imagem(arquivo)
+            registro = {'nome': arquivo.name, 'caminho': str(arquivo)}
+            registro.update(calcular_hashes(img))
+            registros.append(registro)
+        except Exception as e:
+            print(f"❌ {arquivo.name}: {e}")
+
+    return registros
+
+def encontrar_pares(registros, raio=10):
+    """
+    Encontra pares de quase-duplicatas e candidatos frente/verso
+
+    Cada imagem consulta a árvore antes de ser inserida, então cada par
+    aparece uma única vez. A busca usa o pHash; aHash e dHash são
+    reportados para conferência.
+    """
+    arvore = ArvoreBK()
+    pares = []
+
+    for i, registro in enumerate(registros):
+        consultas = [('quase_duplicata', registro['phash']), ('frente_verso', registro['phash_espelhado'])]
+
+        for tipo, valor in consultas:
+            for dist, j in arvore.buscar(valor, raio):
+                outro = registros[j]
+                pares.append({
+                    'nome_1': outro['nome'],
+                    'nome_2': registro['nome'],
+                    'tipo': tipo,
+                    'dist_phash': dist,
+                    'dist_dhash': distancia_hamming(registro['dhash'], outro['dhash']),
+                    'dist_ahash': distancia_hamming(registro['ahash'], outro['ahash']),
+                    'caminho_1': outro['caminho'],
+                    'caminho_2': registro['caminho'],
+                })
+
+        arvore.inserir(registro['phash'], i)
+
+    return pd.DataFrame(pares)
+
+if __name__ == "__main__":
+    caminho = r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image\CA_processada"
+
+    # Indexar pasta e subpastas (inclui CA_deletados)
+    registros = indexar_hashes(caminho)
+    df_pares = encontrar_pares(registros, raio=10)
+
+    print(f"\n📊 {len(registros)} imagens indexadas, {len(df_pares)} pares candidatos")
+
+    # Salvar
+    df_pares.to_csv('pares_duplicados.csv', index=False)
+    print(f"\n💾 Salvo: pares_duplicados.csv")
@@ -0,0 +1,229 @@
+import argparse
+import json
+import numpy as np
+from pathlib import Path
+import pandas as pd
+from leitura_antecipada import ler_imagens_antecipadas
+from conversao_cores import converter_compartilhado
+from histograma_matiz import N_MATIZES, participacao_faixas
+from histograma_cores import definir_faixas_cores
+from paleta_global import listar_pastas_processadas
+
+# H completo (1 bin por unidade do OpenCV) x S e V em 16 faixas de 16:
+# 46.080 contagens inteiras, ~360 KB por resumo antes da compressão
+N_SATURACOES = 16
+N_VALORES = 16
+FORMA = (N_MATIZES, N_SATURACOES, N_VALORES)
+
+# Região "colorida" na hora da comparação (o papel branco domina a imagem
+# inteira): S >= 32 e 48 <= V < 240, perto do mask_valido de contar_pixels_por_cor
+S_MIN_CROMATICO = 2
+V_MIN_CROMATICO, V_MAX_CROMATICO = 3, 15
+
+class HistogramaHSV:
+    """
+    Histograma HSV 3D completo de uma coleção, combinável por soma
+
+    As contagens são inteiras, então somar resumos de pastas, processos
+    ou máquinas dá exatamente o histograma de ter lido tudo junto.
+    """
+
+    def __init__(self, fontes=None):
+        self.contagens = np.zeros(FORMA, dtype=np.int64)
+        self.n_imagens = 0
+        self.fontes = list(fontes or [])
+
+    def atualizar(self, img):
+        hsv = converter_compartilhado(img, 'hsv')
+        h = hsv[..., 0].astype(np.int32)
+        codigos = (h * N_SATURACOES + (hsv[..., 1] >> 4)) * N_VALORES + (hsv[..., 2] >> 4)
+        self.contagens += np.bincount(codigos.ravel(), minlength=self.contagens.size).reshape(FORMA)
+        self.n_imagens += 1
+
+    def combinar(self, outro):
+        self.contagens += outro.contagens
+        self.n_imagens += outro.n_imagens
+        self.fontes.extend(outro.fontes)
+        return self
+
+    def distribuicao(self, cromatico=False):
+        """
+        Histograma normalizado (soma 1); cromatico=True ignora papel, cinzas e pretos
+        """
+        contagens = self.contagens
+        if cromatico:
+            contagens = np.zeros_like(contagens)
+            regiao = (slice(None), slice(S_MIN_CROMATICO, None), slice(V_MIN_CROMATICO, V_MAX_CROMATICO))
+            contagens[regiao] = self.contagens[regiao]
+        total = contagens.sum()
+        return contagens / total if total else contagens.astype(np.float64)
+
+    def marginais(self, cromatico=False):
+        """
+        Distribuições marginais de H (180), S (16) e V (16)
+        """
+        p = self.distribuicao(cromatico)
+        return p.sum(axis=(1, 2)), p.sum(axis=(0, 2)), p.sum(axis=(0, 1))
+
+    def participacao_cores(self):
+        """
+        Percentual de cada faixa de definir_faixas_cores entre os pixels coloridos
+
+        Ao contrário das top-5 do histograma_cores, nenhuma faixa é descartada.
+        """
+        matiz, _, _ = self.marginais(cromatico=True)
+        return {cor: round(float(p), 2) for cor, p in participacao_faixas(matiz, definir_faixas_cores()).items()}
+
+    def salvar(self, arquivo):
+        np.savez_compressed(arquivo, contagens=self.contagens, n_imagens=self.n_imagens,
+                            fontes=json.dumps(self.fontes))
+
+    @classmethod
+    def carregar(cls, arquivo):
+        dados = np.load(arquivo)
+        if dados['contagens'].shape != FORMA:
+            raise ValueError(f"{arquivo}: formato {dados['contagens'].shape}, esperado {FORMA}")
+        resumo = cls(json.loads(str(dados['fontes'])))
+        resumo.contagens = dados['contagens'].astype(np.int64)
+        resumo.n_imagens = int(dados['n_imagens'])
+        return resumo
+
+def distancia_chi2(p, q):
+    """
+    Distância chi² simétrica entre distribuições normalizadas (0 = iguais, 1 = disjuntas)
+    """
+    soma = p + q
+    usados = soma > 0
+    return float(0.5 * np.sum((p[usados] - q[usados]) ** 2 / soma[usados]))
+
+def emd_linear(p, q, largura_bin=1):
+    """
+    EMD 1D (Wasserstein-1) entre histogramas normalizados: soma |F_p - F_q|
+    """
+    return float(np.abs(np.cumsum(p - q)).sum() * largura_bin)
+
+def emd_circular(p, q):
+    """
+    EMD no círculo de matiz, em unidades de H
+
+    Mover massa pode dar a volta (179 -> 0), então a solução é a EMD
+    linear com o deslocamento ótimo: a mediana das diferenças acumuladas.
+    """
+    diferencas = np.cumsum(p - q)
+    return float(np.abs(diferencas - np.median(diferencas)).sum())
+
+def comparar_histogramas(a, b, cromatico=True):
+    """
+    chi² no histograma 3D e EMD nas marginais de H, S e V
+    """
+    ha, sa, va = a.marginais(cromatico)
+    hb, sb, vb = b.marginais(cromatico)
+    return {
+        'chi2': round(distancia_chi2(a.distribuicao(cromatico), b.distribuicao(cromatico)), 4),
+        'chi2_matiz': round(distancia_chi2(ha, hb), 4),
+        'emd_matiz': round(emd_circular(ha, hb), 2),
+        'emd_saturacao': round(emd_linear(sa, sb, 256 / N_SATURACOES), 2),
+        'emd_valor': round(emd_linear(va, vb, 256 / N_VALORES), 2),
+    }
+
+def histograma_pasta(caminho_pasta, arquivos=None):
+    """
+    Lê as imagens da pasta (ou só 'arquivos', para dividir entre workers) e soma o histograma
+    """
+    pasta = Path(caminho_pasta)
+    arquivos = sorted(pasta.glob("*.TIF")) if arquivos is None else arquivos
+    resumo = HistogramaHSV([pasta.name])
+
+    for arquivo, img, erro in ler_imagens_antecipadas(arquivos):
+        if erro is not None:
+            print(f"❌ {arquivo.name}: {erro}")
+            continue
+        if img.ndim != 3 or img.shape[2] != 3:
+            print(f"⚠️  {arquivo.name}: não é colorida, ignorada")
+            continue
+        resumo.atualizar(img)
+
+    print(f"✅ {pasta.name}: {resumo.n_imagens} imagens")
+    return resumo
+
+def combinar_histogramas(arquivos):
+    """
+    Soma resumos .npz parciais (por pasta, processo ou máquina)
+    """
+    total = HistogramaHSV()
+    for arquivo in arquivos:
+        total.combinar(HistogramaHSV.carregar(arquivo))
+    return total
+
+def tabela_colecoes(resumos):
+    """
+    Participação das faixas de cor por coleção, mais a linha global
+    """
+    total = HistogramaHSV()
+    linhas = []
+    for nome, resumo in resumos.items():
+        total.combinar(resumo)
+        linhas.append({'colecao': nome, 'imagens': resumo.n_imagens, **resumo.participacao_cores()})
+    linhas.append({'colecao': 'GLOBAL', 'imagens': total.n_imagens, **total.participacao_cores()})
+    return pd.DataFrame(linhas)
+
+def tabela_distancias(resumos, cromatico=True):
+    """
+    Distâncias entre todos os pares de coleções
+    """
+    nomes = list(resumos)
+    linhas = []
+    for i, a in enumerate(nomes):
+        for b in nomes[i + 1:]:
+            linhas.append({'colecao_a': a, 'colecao_b': b,
+                           **comparar_histogramas(resumos[a], resumos[b], cromatico)})
+    return pd.DataFrame(linhas)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Histogramas HSV combináveis por coleção")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_resumir = sub.add_parser('resumir', help="gera um histograma .npz por pasta")
+    p_resumir.add_argument('pastas', nargs='*',
+                           help="pastas de imagens (padrão: todas as *_processada da raiz)")
+    p_resumir.add_argument('--raiz',
+                           default=r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image")
+
+    p_combinar = sub.add_parser('combinar', help="soma histogramas parciais (.npz)")
+    p_combinar.add_argument('arquivos', nargs='+')
+    p_combinar.add_argument('--saida', default='histograma_global.npz')
+
+    p_comparar = sub.add_parser('comparar', help="participação e distâncias entre coleções")
+    p_comparar.add_argument('arquivos', nargs='+')
+    p_comparar.add_argument('--imagem-inteira', action='store_true',
+                            help="compara incluindo papel, cinzas e pretos")
+    args = parser.parse_args()
+
+    if args.comando == 'resumir':
+        pastas = [Path(p) for p in args.pastas] or listar_pastas_processadas(args.raiz)
+        for pasta in pastas:
+            arquivo = f"histograma_{pasta.name}.npz"
+            histograma_pasta(pasta).salvar(arquivo)
+            print(f"💾 Salvo: {arquivo}")
+
+    elif args.comando == 'combinar':
+        total = combinar_histogramas(args.arquivos)
+        total.salvar(args.saida)
+        print(f"🌍 {total.n_imagens} imagens de {len(total.fontes)} fonte(s)")
+        print(f"💾 Salvo: {args.saida}")
+
+    else:
+        resumos = {}
+        for arquivo in args.arquivos:
+            resumo = HistogramaHSV.carregar(arquivo)
+            nome = '+'.join(dict.fromkeys(resumo.fontes)) or Path(arquivo).stem
+            resumos[nome] = resumos[nome].combinar(resumo) if nome in resumos else resumo
+
+        df_colecoes = tabela_colecoes(resumos)
+        df_distancias = tabela_distancias(resumos, cromatico=not args.imagem_inteira)
+        print(df_colecoes.to_string(index=False))
+        print()
+        print(df_distancias.to_string(index=False))
+        df_colecoes.to_csv('histograma_colecoes.csv', index=False)
+        df_distancias.to_csv('distancias_colecoes.csv', index=False)
+        print(f"\n💾 Salvo: histograma_colecoes.csv, distancias_colecoes.csv")
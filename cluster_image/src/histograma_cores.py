@@ -1,8 +1,10 @@
 import cv2
 import numpy as np
-from PIL import Image
 from pathlib import Path
 import pandas as pd
+from upload import carregar_imagem
+from conversao_cores import converter_compartilhado
+from histograma_matiz import histograma_matiz, participacao_faixas
 
 def definir_faixas_cores():
     """
@@ -19,49 +21,48 @@ def definir_faixas_cores():
     }
     return faixas
 
+def mascaras_contagem(s, v):
+    """
+    Máscaras de contar_pixels_por_cor: pixels válidos (contados por matiz) e Preto/Branco/Cinza
+
+    Funciona com planos S e V de qualquer formato (imagem inteira ou amostra).
+    """
+    return {
+        'valido': (s > 30) & (v > 50) & (v < 240),  # não muito claros/dessaturados
+        'Preto': (v < 50) & (s > 20),
+        'Branco': (v > 200) & (s < 30),
+        'Cinza': (s < 30) & (v >= 50) & (v <= 200),
+    }
+
 def contar_pixels_por_cor(img):
     """
     Conta pixels por faixa de cor usando histograma
     """
     # Converter para HSV
-    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    hsv = converter_compartilhado(img, 'hsv')
     h, s, v = cv2.split(hsv)
     
-    # Filtrar pixels válidos (não muito claros/dessaturados)
-    mask_valido = (s > 30) & (v > 50) & (v < 240)
+    mascaras = mascaras_contagem(s, v)
+    mask_valido = mascaras['valido']
     
     total_pixels_validos = np.sum(mask_valido)
     if total_pixels_validos == 0:
         return {}
     
-    # Contar por faixa de cor
-    faixas = definir_faixas_cores()
+    # Contar por faixa de cor (um histograma de matiz, faixas somadas nele)
+    hist = histograma_matiz(h, mask_valido)
     contadores = {}
     
-    for cor, intervalos in faixas.items():
-        mask_cor = np.zeros_like(h, dtype=bool)
-        
-        for inicio, fim in intervalos:
-            mask_cor |= (h >= inicio) & (h <= fim)
-        
-        # Combinar com mask válido
-        mask_final = mask_cor & mask_valido
-        pixels_cor = np.sum(mask_final)
-        percentual = (pixels_cor / total_pixels_validos) * 100
-        
+    for cor, percentual in participacao_faixas(hist, definir_faixas_cores()).items():
         if percentual > 1:  # Só cores com mais de 1%
             contadores[cor] = round(percentual, 1)
     
     # Adicionar categorias especiais
-    mask_preto = (v < 50) & (s > 20)
-    mask_branco = (v > 200) & (s < 30)
-    mask_cinza = (s < 30) & (v >= 50) & (v <= 200)
-    
     total_todos_pixels = h.shape[0] * h.shape[1]
     
-    preto_perc = (np.sum(mask_preto) / total_todos_pixels) * 100
-    branco_perc = (np.sum(mask_branco) / total_todos_pixels) * 100
-    cinza_perc = (np.sum(mask_cinza) / total_todos_pixels) * 100
+    preto_perc = (np.sum(mascaras['Preto']) / total_todos_pixels) * 100
+    branco_perc = (np.sum(mascaras['Branco']) / total_todos_pixels) * 100
+    cinza_perc = (np.sum(mascaras['Cinza']) / total_todos_pixels) * 100
     
     if preto_perc > 1:
         contadores['Preto'] = round(preto_perc, 1)
@@ -72,6 +73,27 @@ def contar_pixels_por_cor(img):
     
     return contadores
 
+def analisar_imagem_histograma(img, nome):
+    """
+    Gera a linha de resultado (top 5 cores) de uma imagem
+    """
+    return linha_histograma(nome, contar_pixels_por_cor(img))
+
+def linha_histograma(nome, cores_encontradas):
+    """
+    Linha de resultado (top 5) a partir das cores já contadas
+    """
+    # Ordenar por percentual
+    cores_ordenadas = sorted(cores_encontradas.items(), key=lambda x: x[1], reverse=True)
+    
+    resultado = {'nome': nome}
+    
+    for i, (cor, perc) in enumerate(cores_ordenadas[:5]):  # Top 5
+        resultado[f'cor_{i+1}'] = cor
+        resultado[f'perc_{i+1}'] = perc
+    
+    return resultado
+
 def analisar_histograma_cores(caminho_pasta):
     """
     Analisa cores usando histograma direto
@@ -84,27 +106,11 @@ def analisar_histograma_cores(caminho_pasta):
     for arquivo in pasta.glob("*.TIF"):
         try:
             # Carregar imagem
-            pil_img = Image.open(arquivo)
-            img_array = np.array(pil_img)
-            
-            if len(img_array.shape) == 3 and pil_img.mode == 'RGB':
-                img = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-            else:
-                img = img_array
-            
-            # Contar cores
-            cores_encontradas = contar_pixels_por_cor(img)
+            img = carregar_imagem(arquivo)
             
             print(f"\n📁 {arquivo.name}:")
             
-            # Ordenar por percentual
-            cores_ordenadas = sorted(cores_encontradas.items(), key=lambda x: x[1], reverse=True)
-            
-            resultado = {'nome': arquivo.name}
-            
-            for i, (cor, perc) in enumerate(cores_ordenadas[:5]):  # Top 5
-                resultado[f'cor_{i+1}'] = cor
-                resultado[f'perc_{i+1}'] = perc
+            resultado = analisar_imagem_histograma(img, arquivo.name)
             
             resultados.append(resultado)
             
@@ -0,0 +1,110 @@
+import numpy as np
+
+N_MATIZES = 180  # H do OpenCV: 0-179 (2 graus por unidade)
+
+def histograma_matiz(h, mascara=None, pesos=None):
+    """
+    Histograma de 180 bins do canal H (um único bincount por imagem)
+
+    mascara seleciona os pixels contados; pesos (mesmo formato de h)
+    dá um peso por pixel, por exemplo a saturação.
+    """
+    if mascara is not None:
+        h = h[mascara]
+        if pesos is not None:
+            pesos = pesos[mascara]
+    h = h.ravel()
+    if pesos is not None:
+        pesos = np.asarray(pesos, dtype=np.float64).ravel()
+    return np.bincount(h, weights=pesos, minlength=N_MATIZES)[:N_MATIZES]
+
+def participacao_faixas(hist, faixas):
+    """
+    Percentual do histograma em cada faixa de matiz (limites inclusivos)
+    """
+    total = hist.sum()
+    if total == 0:
+        return {cor: 0.0 for cor in faixas}
+
+    acumulado = np.concatenate([[0], np.cumsum(hist)])
+    return {
+        cor: sum(acumulado[fim + 1] - acumulado[inicio] for inicio, fim in intervalos) / total * 100
+        for cor, intervalos in faixas.items()
+    }
+
+def _vetor_medio(hist):
+    """
+    Vetor médio dos matizes no círculo (ângulo em radianos, comprimento R)
+    """
+    total = hist.sum()
+    if total == 0:
+        return 0.0, 0.0
+    angulos = np.arange(N_MATIZES) * (2 * np.pi / N_MATIZES)
+    c = np.dot(hist, np.cos(angulos)) / total
+    s = np.dot(hist, np.sin(angulos)) / total
+    return np.arctan2(s, c) % (2 * np.pi), np.hypot(c, s)
+
+def media_circular(hist):
+    """
+    Matiz médio circular (0-179): vermelhos em 2 e 178 dão média ~0, não 90
+    """
+    angulo, _ = _vetor_medio(hist)
+    return angulo * N_MATIZES / (2 * np.pi)
+
+def variancia_circular(hist):
+    """
+    Variância circular 1 - R: 0 = um só matiz, 1 = matizes espalhados no círculo
+    """
+    _, r = _vetor_medio(hist)
+    return 1 - r
+
+def desvio_circular(hist):
+    """
+    Desvio padrão circular sqrt(-2 ln R), em unidades de H (inf se R = 0)
+    """
+    _, r = _vetor_medio(hist)
+    if r <= 0:
+        return np.inf
+    return np.sqrt(-2 * np.log(min(r, 1.0))) * N_MATIZES / (2 * np.pi)
+
+def entropia_matiz(hist):
+    """
+    Entropia de Shannon do histograma normalizada para 0-1 (1 = uniforme)
+    """
+    total = hist.sum()
+    if total == 0:
+        return 0.0
+    p = hist[hist > 0] / total
+    return float(-np.sum(p * np.log2(p)) / np.log2(N_MATIZES))
+
+def contar_picos(hist, janela=5, limiar=0.05):
+    """
+    Número de picos de matiz distintos (máximos locais no círculo)
+
+    O histograma é suavizado com média móvel circular de 'janela' bins;
+    só contam picos com pelo menos 'limiar' da altura do maior.
+    """
+    if hist.sum() == 0:
+        return 0
+
+    raio = janela // 2
+    estendido = np.concatenate([hist[-raio:], hist, hist[:raio]]) if raio else hist
+    suave = np.convolve(estendido, np.ones(janela) / janela, mode='valid')
+
+    anterior = np.roll(suave, 1)
+    proximo = np.roll(suave, -1)
+    # >= de um lado evita contar duas vezes um platô
+    picos = (suave > anterior) & (suave >= proximo) & (suave >= limiar * suave.max())
+    return int(np.sum(picos))
+
+def metricas_matiz(hist):
+    """
+    Todas as métricas derivadas do histograma de matiz (O(180))
+    """
+    return {
+        'matiz_medio': round(float(media_circular(hist)), 1),
+        'variancia_circular': round(float(variancia_circular(hist)), 3),
+        'desvio_circular': round(float(min(desvio_circular(hist), 999.0)), 1),
+        'entropia_matiz': round(entropia_matiz(hist), 3),
+        'picos_matiz': contar_picos(hist),
+    }
@@ -0,0 +1,235 @@
+import argparse
+import json
+import time
+import numpy as np
+from functools import lru_cache
+from pathlib import Path
+import pandas as pd
+from leitura_antecipada import ler_imagens_antecipadas
+from conversao_cores import converter_compartilhado
+from histograma_cores import definir_faixas_cores
+
+SUBDIVISOES_MATIZ = 3               # cada faixa de definir_faixas_cores em 3 sub-faixas
+LIMITES_SATURACAO = (30, 80, 150)   # suave / médio / vívido (como em densidade_saturacao)
+LIMITES_VALOR = (50, 150, 240)      # escuro / claro
+LIMITES_CINZA = (50, 120, 200)      # cinzas acromáticos (o papel branco fica de fora)
+N_FAIXAS = len(definir_faixas_cores())
+N_CROMATICOS = N_FAIXAS * SUBDIVISOES_MATIZ * len(LIMITES_SATURACAO) * (len(LIMITES_VALOR) - 1)
+DIMENSAO = N_CROMATICOS + 1 + len(LIMITES_CINZA) - 1  # + preto + cinzas
+
+@lru_cache(maxsize=None)
+def lut_matiz():
+    """
+    H (0-179) -> sub-faixa de cor (0 a N_FAIXAS * SUBDIVISOES_MATIZ - 1)
+
+    Cada faixa é percorrida no sentido do círculo (o Vermelho vai de 172
+    a 8 passando por 0) e dividida em partes iguais. Limites inclusivos
+    que se repetem entre faixas ficam com a primeira.
+    """
+    lut = np.full(180, -1, dtype=np.int32)
+    for i, intervalos in enumerate(definir_faixas_cores().values()):
+        # Intervalo que começa em 0 é a continuação do que termina em 179
+        ordenados = sorted(intervalos, key=lambda intervalo: intervalo[0] == 0)
+        matizes = [h for inicio, fim in ordenados for h in range(inicio, fim + 1)]
+        for j, parte in enumerate(np.array_split(np.array(matizes), SUBDIVISOES_MATIZ)):
+            livres = parte[lut[parte] < 0]
+            lut[livres] = i * SUBDIVISOES_MATIZ + j
+    return lut
+
+def descritor_cores(img):
+    """
+    Histograma de cores normalizado de tamanho fixo (DIMENSAO)
+
+    Pixels coloridos caem em sub-faixa de matiz x saturação x valor;
+    os acromáticos em preto ou num dos cinzas; o papel (claro e
+    dessaturado) é ignorado. O vetor devolvido é a raiz quadrada do
+    histograma normalizado com norma 1 (L2), então o produto escalar
+    entre dois descritores é o coeficiente de Bhattacharyya (1 = iguais).
+    """
+    hsv = converter_compartilhado(img, 'hsv')
+    h, s, v = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+
+    indice_s = np.digitize(s, LIMITES_SATURACAO[1:])
+    indice_v = np.digitize(v, LIMITES_VALOR[1:])
+    cromatico = (s > LIMITES_SATURACAO[0]) & (v > LIMITES_VALOR[0]) & (v < LIMITES_VALOR[-1])
+    n_valores = len(LIMITES_VALOR) - 1
+    codigos = (lut_matiz()[h] * len(LIMITES_SATURACAO) + indice_s) * n_valores + indice_v
+
+    preto = v <= LIMITES_CINZA[0]
+    cinza = ~cromatico & ~preto & (v < LIMITES_CINZA[-1])
+    codigos = np.where(cromatico, codigos, -1)
+    codigos[preto] = N_CROMATICOS
+    codigos[cinza] = N_CROMATICOS + np.digitize(v[cinza], LIMITES_CINZA[1:-1]) + 1
+
+    hist = np.bincount(codigos[codigos >= 0], minlength=DIMENSAO).astype(np.float32)
+    total = hist.sum()
+    if total == 0:
+        return hist
+    return np.sqrt(hist / total)
+
+class IndiceSimilaridade:
+    """
+    Matriz (n, DIMENSAO) float32 de descritores em disco, aberta com memmap
+
+    - descritores.npy: uma linha por imagem (np.load com mmap_mode='r')
+    - imagens.csv: nome e pasta de cada linha
+    A busca é um produto matriz-vetor em blocos + argpartition: a 50 mil
+    imagens são ~26 MB de matriz e ~2,5 ms por consulta.
+    """
+
+    def __init__(self, pasta_indice, bloco=65536):
+        pasta = Path(pasta_indice)
+        self.matriz = np.load(pasta / 'descritores.npy', mmap_mode='r')
+        self.imagens = pd.read_csv(pasta / 'imagens.csv')
+        self.bloco = bloco
+        self._por_nome = {nome: i for i, nome in enumerate(self.imagens['nome'])}
+
+    def __len__(self):
+        return len(self.matriz)
+
+    def similaridades(self, descritor):
+        """
+        Coeficiente de Bhattacharyya da consulta com todas as linhas
+        """
+        descritor = np.asarray(descritor, dtype=np.float32)
+        resultado = np.empty(len(self.matriz), dtype=np.float32)
+        for inicio in range(0, len(self.matriz), self.bloco):
+            fim = inicio + self.bloco
+            np.dot(self.matriz[inicio:fim], descritor, out=resultado[inicio:fim])
+        return resultado
+
+    def buscar(self, descritor, k=10, ignorar=None):
+        """
+        As k linhas mais parecidas, da mais para a menos parecida
+
+        ignorar: índice de linha a excluir (a própria imagem consultada).
+        """
+        scores = self.similaridades(descritor)
+        if ignorar is not None:
+            scores[ignorar] = -np.inf
+        k = min(k, len(scores) - (ignorar is not None))
+        if k <= 0:
+            return self.imagens.iloc[:0].assign(similaridade=[])
+
+        melhores = np.argpartition(-scores, k - 1)[:k]
+        melhores = melhores[np.argsort(-scores[melhores])]
+        return self.imagens.iloc[melhores].assign(similaridade=np.round(scores[melhores], 4))
+
+    def buscar_nome(self, nome, k=10):
+        """
+        Vizinhos de uma imagem que já está no índice (sem reler o arquivo)
+        """
+        if nome not in self._por_nome:
+            raise KeyError(f"{nome} não está no índice")
+        i = self._por_nome[nome]
+        return self.buscar(self.matriz[i], k, ignorar=i)
+
+    def buscar_imagem(self, img, k=10):
+        """
+        Vizinhos de uma imagem nova (decodificada, BGR)
+        """
+        return self.buscar(descritor_cores(img), k)
+
+def construir_indice(pastas, pasta_indice):
+    """
+    Calcula os descritores de todas as imagens das pastas e grava o índice
+
+    As linhas vão direto para um .npy aberto com open_memmap, então a
+    matriz inteira nunca precisa caber na memória.
+    """
+    arquivos = [arquivo for pasta in pastas for arquivo in sorted(Path(pasta).glob("*.TIF"))]
+    destino = Path(pasta_indice)
+    destino.mkdir(parents=True, exist_ok=True)
+
+    temporario = destino / 'descritores.tmp.npy'
+    matriz = np.lib.format.open_memmap(temporario, mode='w+', dtype=np.float32,
+                                       shape=(len(arquivos), DIMENSAO))
+    linhas = []
+    for arquivo, img, erro in ler_imagens_antecipadas(arquivos):
+        if erro is not None:
+            print(f"❌ {arquivo.name}: {erro}")
+            continue
+        if img.ndim != 3 or img.shape[2] != 3:
+            print(f"⚠️  {arquivo.name}: não é colorida, ignorada")
+            continue
+        matriz[len(linhas)] = descritor_cores(img)
+        linhas.append({'nome': arquivo.name, 'pasta': arquivo.parent.name})
+
+    # Linhas de arquivos com falha ficaram no fim sem uso: regrava só as válidas
+    final = np.lib.format.open_memmap(destino / 'descritores.npy', mode='w+', dtype=np.float32,
+                                      shape=(len(linhas), DIMENSAO))
+    final[:] = matriz[:len(linhas)]
+    final.flush()
+    del matriz, final
+    temporario.unlink()
+
+    pd.DataFrame(linhas, columns=['nome', 'pasta']).to_csv(destino / 'imagens.csv', index=False)
+    (destino / 'parametros.json').write_text(json.dumps({
+        'dimensao': DIMENSAO,
+        'subdivisoes_matiz': SUBDIVISOES_MATIZ,
+        'limites_saturacao': LIMITES_SATURACAO,
+        'limites_valor': LIMITES_VALOR,
+        'limites_cinza': LIMITES_CINZA,
+    }), encoding='utf-8')
+
+    print(f"💾 Índice com {len(linhas)} imagens ({DIMENSAO} dimensões) em {destino}")
+    return IndiceSimilaridade(destino)
+
+def medir_busca(n_imagens=50000, consultas=100, k=10, semente=42):
+    """
+    Tempo de consulta num índice sintético de n_imagens (memmap em disco temporário)
+    """
+    import tempfile
+
+    rng = np.random.default_rng(semente)
+    with tempfile.TemporaryDirectory() as pasta:
+        hist = rng.dirichlet(np.full(DIMENSAO, 0.1), size=n_imagens).astype(np.float32)
+        np.save(Path(pasta) / 'descritores.npy', np.sqrt(hist))
+        pd.DataFrame({'nome': [f"img_{i}.TIF" for i in range(n_imagens)], 'pasta': 'sintetica'}).to_csv(
+            Path(pasta) / 'imagens.csv', index=False)
+
+        indice = IndiceSimilaridade(pasta)
+        indice.buscar(indice.matriz[0], k)  # aquece o cache de páginas
+        inicio = time.perf_counter()
+        for i in rng.integers(0, n_imagens, consultas):
+            indice.buscar(indice.matriz[i], k, ignorar=i)
+        ms = (time.perf_counter() - inicio) / consultas * 1000
+        del indice
+
+    print(f"⏱️  {n_imagens} imagens x {DIMENSAO} dimensões: {ms:.2f} ms por consulta (top-{k})")
+    return ms
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índice de similaridade de paleta entre desenhos")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_construir = sub.add_parser('construir', help="calcula os descritores e grava o índice")
+    p_construir.add_argument('pastas', nargs='*',
+                             default=[r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image\CA_processada"])
+    p_construir.add_argument('--indice', default='indice_cores')
+
+    p_buscar = sub.add_parser('buscar', help="desenhos com paleta parecida")
+    p_buscar.add_argument('consulta', help="nome de uma imagem do índice ou caminho de um arquivo")
+    p_buscar.add_argument('--indice', default='indice_cores')
+    p_buscar.add_argument('-k', type=int, default=10)
+
+    p_medir = sub.add_parser('medir', help="tempo de consulta num índice sintético")
+    p_medir.add_argument('--imagens', type=int, default=50000)
+    args = parser.parse_args()
+
+    if args.comando == 'construir':
+        construir_indice(args.pastas, args.indice)
+
+    elif args.comando == 'buscar':
+        indice = IndiceSimilaridade(args.indice)
+        inicio = time.perf_counter()
+        if Path(args.consulta).is_file():
+            from upload import carregar_imagem
+            vizinhos = indice.buscar_imagem(carregar_imagem(args.consulta), args.k)
+        else:
+            vizinhos = indice.buscar_nome(args.consulta, args.k)
+        print(vizinhos.to_string(index=False))
+        print(f"\n⏱️  {(time.perf_counter() - inicio) * 1000:.1f} ms em {len(indice)} imagens")
+
+    else:
+        medir_busca(args.imagens)
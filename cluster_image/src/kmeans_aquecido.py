@@ -0,0 +1,120 @@
+import time
+import numpy as np
+from pathlib import Path
+import pandas as pd
+from sklearn.cluster import KMeans
+from upload import carregar_imagem
+from cores_dominantes import ajustar_kmeans, pixels_nao_brancos
+from analise_hsv import pixels_validos_hsv
+
+# Mesma seleção de pixels usada por extrair_cores_dominantes / extrair_cores_hsv
+SELECAO_PIXELS = {
+    'bgr': pixels_nao_brancos,
+    'hsv': pixels_validos_hsv,
+}
+
+def centroides_da_pasta(caminho_pasta, espaco='bgr', n_cores=5, pixels_por_imagem=5000, semente=42):
+    """
+    Centroides de nível de pasta: um K-Means padrão sobre uma amostra de todas as imagens
+    """
+    rng = np.random.default_rng(semente)
+    amostras = []
+
+    for arquivo in sorted(Path(caminho_pasta).glob("*.TIF")):
+        pixels = SELECAO_PIXELS[espaco](carregar_imagem(arquivo))
+        if len(pixels) > pixels_por_imagem:
+            pixels = pixels[rng.choice(len(pixels), pixels_por_imagem, replace=False)]
+        amostras.append(pixels)
+
+    return ajustar_kmeans(np.concatenate(amostras), n_cores).cluster_centers_
+
+def ajustar_kmeans_reinicios(pixels, n_cores, n_reinicios=10, semente=42):
+    """
+    K-Means padrão com os reinícios feitos um a um; devolve (melhor ajuste, iterações somadas)
+
+    Mesmo custo do n_init=10 de ajustar_kmeans, mas o n_iter_ do scikit-learn
+    só conta as iterações do melhor reinício.
+    """
+    ajustes = [KMeans(n_clusters=n_cores, random_state=semente + i, n_init=1).fit(pixels)
+               for i in range(n_reinicios)]
+    return min(ajustes, key=lambda kmeans: kmeans.inertia_), sum(kmeans.n_iter_ for kmeans in ajustes)
+
+def _delta_pct(inercia, referencia):
+    """
+    Diferença percentual de inércia (0 se as duas são 0)
+    """
+    if referencia == 0:
+        return 0.0 if inercia == 0 else float('inf')
+    return (inercia - referencia) / referencia * 100
+
+def comparar_aquecimento(caminho_pasta, espaco='bgr', modo='anterior', n_cores=5):
+    """
+    Compara o K-Means padrão (10 reinícios) com o aquecido (1 ajuste) imagem a imagem
+
+    modo='anterior': cada imagem parte dos centroides aquecidos da anterior
+    (como em analisar_cores_dataset(aquecido=True)); a primeira usa o padrão.
+    modo='pasta': todas partem dos centroides de centroides_da_pasta.
+
+    Reporta iterações (no padrão, somadas nos 10 reinícios), inércia (soma
+    das distâncias²) e tempo de cada versão; delta_inercia_pct > 0 significa
+    que o aquecido ficou pior que o padrão. delta_parada_pct é o custo só da
+    parada antecipada: o aquecido contra o mesmo ajuste levado até convergir.
+    """
+    pasta = Path(caminho_pasta)
+    selecionar = SELECAO_PIXELS[espaco]
+    centroides = centroides_da_pasta(pasta, espaco, n_cores) if modo == 'pasta' else None
+    resultados = []
+
+    print(f"K-MEANS AQUECIDO ({espaco.upper()}, modo {modo})")
+
+    for arquivo in sorted(pasta.glob("*.TIF")):
+        try:
+            pixels = selecionar(carregar_imagem(arquivo))
+            if len(pixels) < n_cores:
+                continue
+
+            inicio = time.perf_counter()
+            base, iter_base = ajustar_kmeans_reinicios(pixels, n_cores)
+            tempo_base = time.perf_counter() - inicio
+
+            if centroides is None:
+                aquecido, tempo_aquecido, convergido = base, tempo_base, base
+            else:
+                inicio = time.perf_counter()
+                aquecido = ajustar_kmeans(pixels, n_cores, centroides)
+                tempo_aquecido = time.perf_counter() - inicio
+                convergido = ajustar_kmeans(pixels, n_cores, centroides, tol=1e-4, max_iter=300)
+
+            if modo == 'anterior':
+                centroides = aquecido.cluster_centers_
+
+            delta = _delta_pct(aquecido.inertia_, base.inertia_)
+            resultados.append({
+                'nome': arquivo.name,
+                'iter_base': iter_base,
+                'iter_aquecido': aquecido.n_iter_,
+                'iter_convergido': convergido.n_iter_,
+                'inercia_base': round(base.inertia_, 1),
+                'inercia_aquecida': round(aquecido.inertia_, 1),
+                'delta_inercia_pct': round(delta, 3),
+                'delta_parada_pct': round(_delta_pct(aquecido.inertia_, convergido.inertia_), 3),
+                'tempo_base': round(tempo_base, 3),
+                'tempo_aquecido': round(tempo_aquecido, 3),
+            })
+            print(f"✅ {arquivo.name} - iterações {iter_base} -> {aquecido.n_iter_}, inércia {delta:+.2f}%")
+
+        except Exception as e:
+            print(f"❌ {arquivo.name}: {e}")
+
+    return pd.DataFrame(resultados)
+
+if __name__ == "__main__":
+    caminho = r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image\CA_processada"
+
+    for espaco in ('bgr', 'hsv'):
+        df = comparar_aquecimento(caminho, espaco=espaco, modo='anterior')
+        print(f"\n📊 Tempo total: {df['tempo_base'].sum():.1f}s -> {df['tempo_aquecido'].sum():.1f}s, "
+              f"delta de inércia mediano {df['delta_inercia_pct'].median():+.2f}% "
+              f"(parada antecipada {df['delta_parada_pct'].median():+.2f}%)\n")
+        df.to_csv(f'kmeans_aquecido_{espaco}.csv', index=False)
+        print(f"💾 Salvo: kmeans_aquecido_{espaco}.csv")
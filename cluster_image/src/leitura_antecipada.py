@@ -0,0 +1,70 @@
+import io
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from upload import carregar_imagem
+
+def ler_bytes(arquivo, latencia=0.0):
+    """
+    Lê o arquivo inteiro de uma vez (latencia simula um disco de rede lento)
+    """
+    if latencia:
+        time.sleep(latencia)
+    return Path(arquivo).read_bytes()
+
+def ler_imagens_antecipadas(arquivos, concorrencia=8, latencia=0.0):
+    """
+    Lê arquivos em threads, à frente do consumo, e decodifica da memória
+
+    Mantém até 'concorrencia' leituras em andamento enquanto o chamador
+    processa a imagem atual; a ordem de entrega é a mesma de 'arquivos'.
+    Gera (arquivo, img, erro): img é None e erro a exceção quando falha.
+    """
+    arquivos = iter(arquivos)
+    pendentes = deque()
+
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        def agendar():
+            arquivo = next(arquivos, None)
+            if arquivo is not None:
+                pendentes.append((arquivo, executor.submit(ler_bytes, arquivo, latencia)))
+
+        for _ in range(concorrencia):
+            agendar()
+
+        while pendentes:
+            arquivo, futuro = pendentes.popleft()
+            # Repor a janela antes de bloquear neste arquivo
+            agendar()
+            try:
+                img = carregar_imagem(io.BytesIO(futuro.result()))
+                yield arquivo, img, None
+            except Exception as e:
+                yield arquivo, None, e
+
+def comparar_leitura(caminho_pasta, latencia=0.2, concorrencia=8):
+    """
+    Compara leitura sequencial e antecipada com latência injetada
+    """
+    arquivos = sorted(Path(caminho_pasta).glob("*.TIF"))
+
+    inicio = time.perf_counter()
+    for arquivo in arquivos:
+        carregar_imagem(io.BytesIO(ler_bytes(arquivo, latencia)))
+    sequencial = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for _ in ler_imagens_antecipadas(arquivos, concorrencia, latencia):
+        pass
+    antecipada = time.perf_counter() - inicio
+
+    print(f"📊 {len(arquivos)} imagens, latência {latencia * 1000:.0f} ms por arquivo")
+    print(f"   Sequencial: {sequencial:.2f}s")
+    print(f"   Antecipada ({concorrencia} leituras): {antecipada:.2f}s")
+    return sequencial, antecipada
+
+if __name__ == "__main__":
+    caminho = r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image\CA_processada"
+
+    comparar_leitura(caminho, latencia=0.2, concorrencia=8)
@@ -0,0 +1,242 @@
+import argparse
+import time
+import numpy as np
+from pathlib import Path
+import pandas as pd
+from leitura_antecipada import ler_imagens_antecipadas
+from conversao_cores import converter_cores
+from histograma_cores import definir_faixas_cores, mascaras_contagem, linha_histograma, analisar_imagem_histograma
+from densidade_saturacao import (mascaras_densidade, mascara_colorida, classificar_colorido, linha_densidade,
+                                 analisar_imagem_densidade)
+from histograma_matiz import N_MATIZES, participacao_faixas, desvio_circular
+
+class BufferLote:
+    """
+    Buffers (N, H, W, ...) reaproveitados entre lotes de imagens do mesmo formato
+
+    - bgr: as imagens do lote, copiadas para um bloco contínuo
+    - hsv: a conversão do lote inteiro numa chamada só
+    - h, s, v: os canais em planos contínuos (comparar em planos é bem
+      mais rápido que nas fatias intercaladas hsv[..., c])
+    - codigos: matiz + 180 * índice da imagem, para um único bincount
+      dar o histograma de matiz de todas as imagens do lote
+    """
+
+    def __init__(self, tamanho_lote, altura, largura):
+        self.forma = (altura, largura)
+        self.bgr = np.empty((tamanho_lote, altura, largura, 3), dtype=np.uint8)
+        self.h, self.s, self.v = (np.empty((tamanho_lote, altura, largura), dtype=np.uint8) for _ in range(3))
+        self.codigos = np.empty((tamanho_lote, altura, largura), dtype=np.int32)
+        self.deslocamentos = (np.arange(tamanho_lote, dtype=np.int32) * N_MATIZES)[:, None, None]
+        self.n = 0
+
+    def carregar(self, imagens):
+        """
+        Copia as imagens para o buffer e converte o lote para HSV
+        """
+        self.n = len(imagens)
+        for i, img in enumerate(imagens):
+            self.bgr[i] = img
+
+        # (n, H, W, 3) -> (n * H, W, 3): uma única imagem "alta" para a conversão
+        altura, largura = self.forma
+        hsv = converter_cores(self.bgr[:self.n].reshape(-1, largura, 3), 'hsv').reshape(self.n, altura, largura, 3)
+        for c, plano in enumerate((self.h, self.s, self.v)):
+            np.copyto(plano[:self.n], hsv[..., c])
+        return self.h[:self.n], self.s[:self.n], self.v[:self.n]
+
+    def histogramas_matiz(self, mascara):
+        """
+        (n, 180): histograma de matiz de cada imagem do lote num único bincount
+        """
+        codigos = self.codigos[:self.n]
+        np.add(self.h[:self.n], self.deslocamentos[:self.n], out=codigos)
+        return np.bincount(codigos[mascara], minlength=self.n * N_MATIZES).reshape(self.n, N_MATIZES)
+
+def _contar(mascara):
+    """
+    Pixels True de cada imagem do lote (n,)
+    """
+    return np.count_nonzero(mascara.reshape(len(mascara), -1), axis=1)
+
+def contar_pixels_por_cor_lote(buffer):
+    """
+    contar_pixels_por_cor para o lote inteiro (mesmas máscaras e arredondamentos)
+    """
+    h, s, v = buffer.h[:buffer.n], buffer.s[:buffer.n], buffer.v[:buffer.n]
+    total_todos_pixels = h.shape[1] * h.shape[2]
+
+    mascaras = mascaras_contagem(s, v)
+    histogramas = buffer.histogramas_matiz(mascaras['valido'])
+    especiais = {cor: _contar(mascaras[cor]) for cor in ('Preto', 'Branco', 'Cinza')}
+
+    faixas = definir_faixas_cores()
+    resultados = []
+    for i in range(buffer.n):
+        if histogramas[i].sum() == 0:
+            resultados.append({})
+            continue
+
+        contadores = {}
+        for cor, percentual in participacao_faixas(histogramas[i], faixas).items():
+            if percentual > 1:
+                contadores[cor] = round(percentual, 1)
+
+        for cor, contagens in especiais.items():
+            percentual = (contagens[i] / total_todos_pixels) * 100
+            if percentual > 1:
+                contadores[cor] = round(percentual, 1)
+        resultados.append(contadores)
+
+    return resultados
+
+def analisar_densidade_saturacao_lote(buffer):
+    """
+    analisar_densidade_saturacao e calcular_diversidade_cores para o lote inteiro
+    """
+    h, s, v = buffer.h[:buffer.n], buffer.s[:buffer.n], buffer.v[:buffer.n]
+    total_pixels = h.shape[1] * h.shape[2]
+
+    contagens = {categoria: _contar(mascara) for categoria, mascara in mascaras_densidade(s, v).items()}
+    somas_s = s.reshape(buffer.n, -1).sum(axis=1, dtype=np.int64)
+    somas_v = v.reshape(buffer.n, -1).sum(axis=1, dtype=np.int64)
+    histogramas = buffer.histogramas_matiz(mascara_colorida(s, v))
+
+    resultados = []
+    for i in range(buffer.n):
+        densidade = {}
+        # Cinzas, brancos e pretos: percentual da imagem inteira
+        for categoria in ('cinza', 'branco', 'preto'):
+            densidade[categoria] = round((contagens[categoria][i] / total_pixels) * 100, 2)
+        # Coloridos: percentual dos pixels que não são brancos
+        pixel_n_branco = total_pixels - contagens['branco'][i]
+        for categoria in ('colorido_vivido', 'colorido_suave', 'quase_monocromatico'):
+            densidade[categoria] = round((contagens[categoria][i] / pixel_n_branco) * 100, 2)
+        densidade['saturacao_media'] = round(np.float64(somas_s[i] / total_pixels), 2)
+        densidade['valor_medio'] = round(np.float64(somas_v[i] / total_pixels), 2)
+        densidade['classificacao'] = classificar_colorido(densidade['colorido_vivido'] + densidade['colorido_suave'])
+
+        if histogramas[i].sum() < 100:
+            diversidade = 0
+        else:
+            diversidade = round(min((desvio_circular(histogramas[i]) / 60) * 100, 100), 1)
+
+        resultados.append((densidade, diversidade))
+
+    return resultados
+
+def agrupar_lotes(arquivos, tamanho_lote=4, concorrencia=8):
+    """
+    Gera lotes [(nome, img), ...] de imagens do mesmo formato, na ordem de leitura
+
+    Uma imagem de formato diferente fecha o lote atual; imagens em
+    cinza ou com falha de leitura saem sozinhas (lote de 1).
+    """
+    lote, forma = [], None
+    for arquivo, img, erro in ler_imagens_antecipadas(arquivos, concorrencia):
+        if erro is not None:
+            print(f"❌ {arquivo.name}: {erro}")
+            continue
+        if img.ndim != 3 or img.shape[2] != 3 or img.dtype != np.uint8:
+            yield [(arquivo.name, img)]
+            continue
+        if lote and (img.shape != forma or len(lote) == tamanho_lote):
+            yield lote
+            lote = []
+        lote.append((arquivo.name, img))
+        forma = img.shape
+    if lote:
+        yield lote
+
+def analisar_lotes(caminho_pasta, tamanho_lote=4):
+    """
+    Histograma de cores e densidade de saturação em lotes (N, H, W, 3)
+
+    Devolve (df_histograma, df_densidade), com as mesmas linhas dos
+    analisadores por imagem.
+    """
+    arquivos = sorted(Path(caminho_pasta).glob("*.TIF"))
+    buffers = {}
+    linhas_hist, linhas_densidade = [], []
+
+    print(f"ANÁLISE EM LOTES DE {tamanho_lote}")
+
+    for lote in agrupar_lotes(arquivos, tamanho_lote):
+        nomes = [nome for nome, _ in lote]
+        imagens = [img for _, img in lote]
+        try:
+            if len(lote) == 1 and (imagens[0].ndim != 3 or imagens[0].dtype != np.uint8):
+                # Formato fora do padrão: caminho por imagem
+                linhas_hist.append(analisar_imagem_histograma(imagens[0], nomes[0]))
+                linhas_densidade.append(analisar_imagem_densidade(imagens[0], nomes[0]))
+                continue
+
+            forma = imagens[0].shape[:2]
+            if forma not in buffers:
+                buffers[forma] = BufferLote(tamanho_lote, *forma)
+            buffer = buffers[forma]
+            buffer.carregar(imagens)
+
+            for nome, cores in zip(nomes, contar_pixels_por_cor_lote(buffer)):
+                linhas_hist.append(linha_histograma(nome, cores))
+            for nome, (densidade, diversidade) in zip(nomes, analisar_densidade_saturacao_lote(buffer)):
+                linhas_densidade.append(linha_densidade(nome, densidade, diversidade))
+
+            print(f"✅ Lote de {len(nomes)}: {nomes[0]} ... {nomes[-1]}")
+
+        except Exception as e:
+            print(f"❌ Lote {nomes[0]} ... {nomes[-1]}: {e}")
+
+    return pd.DataFrame(linhas_hist), pd.DataFrame(linhas_densidade)
+
+def comparar_lotes(caminho_pasta, tamanhos_lote=(2, 4, 8), repeticoes=3):
+    """
+    Tempo de análise (imagens já decodificadas) por imagem vs em lote, para cada tamanho de lote
+    """
+    from upload import carregar_imagem
+
+    imagens = [(a.name, carregar_imagem(a)) for a in sorted(Path(caminho_pasta).glob("*.TIF"))]
+    imagens = [(nome, img) for nome, img in imagens if img.ndim == 3 and img.shape == imagens[0][1].shape]
+
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        # Cópia: o cache de HSV compartilhado não vale entre repetições
+        for nome, img in imagens:
+            copia = img.copy()
+            analisar_imagem_histograma(copia, nome)
+            analisar_imagem_densidade(copia, nome)
+    por_imagem = (time.perf_counter() - inicio) / repeticoes
+
+    linhas = []
+    for tamanho_lote in tamanhos_lote:
+        buffer = BufferLote(tamanho_lote, *imagens[0][1].shape[:2])
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            for i in range(0, len(imagens), tamanho_lote):
+                buffer.carregar([img for _, img in imagens[i:i + tamanho_lote]])
+                contar_pixels_por_cor_lote(buffer)
+                analisar_densidade_saturacao_lote(buffer)
+        em_lote = (time.perf_counter() - inicio) / repeticoes
+        linhas.append({'tamanho_lote': tamanho_lote, 'por_imagem_ms': round(por_imagem * 1000),
+                       'em_lote_ms': round(em_lote * 1000)})
+
+    df = pd.DataFrame(linhas)
+    print(f"📊 {len(imagens)} imagens:")
+    print(df.to_string(index=False))
+    return df
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Histograma de cores e densidade em lotes do mesmo formato")
+    parser.add_argument('caminho', nargs='?',
+                        default=r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image\CA_processada")
+    parser.add_argument('--tamanho-lote', type=int, default=4)
+    parser.add_argument('--comparar', action='store_true', help="mede por imagem vs em lote (2, 4 e 8)")
+    args = parser.parse_args()
+
+    if args.comparar:
+        comparar_lotes(args.caminho)
+    else:
+        df_hist, df_densidade = analisar_lotes(args.caminho, args.tamanho_lote)
+        df_hist.to_csv('histograma_cores.csv', index=False)
+        df_densidade.to_csv('densidade_saturacao.csv', index=False)
+        print(f"\n💾 Salvo: histograma_cores.csv, densidade_saturacao.csv")
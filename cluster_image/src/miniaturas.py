@@ -0,0 +1,259 @@
+import argparse
+import hashlib
+import html
+import os
+from urllib.parse import quote
+import cv2
+import numpy as np
+from pathlib import Path
+import pandas as pd
+from leitura_antecipada import ler_imagens_antecipadas
+from triagem import triar_imagem
+
+TAMANHOS = (1024, 256, 64)  # lado maior, do maior para o menor
+PARAMETROS_FORMATO = {
+    'webp': [cv2.IMWRITE_WEBP_QUALITY, 80],
+    'jpg': [cv2.IMWRITE_JPEG_QUALITY, 85],
+}
+
+def chave_miniatura(arquivo):
+    """
+    <nome sem extensão>-<10 hex do SHA-1 do caminho absoluto>
+
+    O nome sozinho colide entre pastas (CA_processada/1a.TIF e
+    CB_processada/1a.TIF); o hash do caminho separa os dois e o nome
+    continua legível no cache.
+    """
+    caminho = Path(arquivo).resolve()
+    return f"{caminho.stem}-{hashlib.sha1(str(caminho).encode('utf-8')).hexdigest()[:10]}"
+
+def caminho_miniatura(pasta_cache, arquivo, tamanho, formato='webp'):
+    """
+    <pasta_cache>/<tamanho>/<chave_miniatura(arquivo)>.<formato>
+    """
+    return Path(pasta_cache) / str(tamanho) / f"{chave_miniatura(arquivo)}.{formato}"
+
+def gerar_piramide(img, tamanhos=TAMANHOS):
+    """
+    Reduz a imagem em cascata (cada nível parte do anterior, INTER_AREA)
+
+    Não amplia: se a imagem já é menor que o nível, ele fica do tamanho original.
+    """
+    if len(img.shape) == 2:
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+
+    piramide = {}
+    atual = img
+    for tamanho in sorted(tamanhos, reverse=True):
+        escala = tamanho / max(atual.shape[:2])
+        if escala < 1:
+            largura = max(1, round(atual.shape[1] * escala))
+            altura = max(1, round(atual.shape[0] * escala))
+            atual = cv2.resize(atual, (largura, altura), interpolation=cv2.INTER_AREA)
+        piramide[tamanho] = atual
+    return piramide
+
+def miniaturas_atualizadas(arquivo, pasta_cache, tamanhos=TAMANHOS, formato='webp'):
+    """
+    True se todas as miniaturas existem e são mais novas que o arquivo original
+    """
+    mtime = os.stat(arquivo).st_mtime
+    for tamanho in tamanhos:
+        destino = caminho_miniatura(pasta_cache, arquivo, tamanho, formato)
+        if not destino.exists() or destino.stat().st_mtime < mtime:
+            return False
+    return True
+
+def salvar_piramide(img, arquivo, pasta_cache, tamanhos=TAMANHOS, formato='webp'):
+    """
+    Gera e grava as miniaturas de uma imagem já decodificada (arquivo: caminho do original)
+
+    Pensada para ser chamada no mesmo passo de leitura dos analisadores,
+    sem decodificar o TIF de novo.
+    """
+    for tamanho, miniatura in gerar_piramide(img, tamanhos).items():
+        destino = caminho_miniatura(pasta_cache, arquivo, tamanho, formato)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        ok, dados = cv2.imencode(f'.{formato}', miniatura, PARAMETROS_FORMATO[formato])
+        if not ok:
+            raise ValueError(f"Falha ao codificar {destino.name}")
+        # Grava em .tmp e troca, para nunca deixar miniatura pela metade no cache
+        temporario = destino.with_name(destino.name + '.tmp')
+        temporario.write_bytes(dados.tobytes())
+        temporario.replace(destino)
+
+def gerar_miniaturas_pasta(caminho_pasta, pasta_cache='miniaturas', tamanhos=TAMANHOS, formato='webp',
+                           recursivo=False, concorrencia=8):
+    """
+    Gera a pirâmide de miniaturas de todas as imagens da pasta (só as desatualizadas)
+    """
+    pasta = Path(caminho_pasta)
+    arquivos = sorted(pasta.rglob("*.TIF") if recursivo else pasta.glob("*.TIF"))
+    pendentes = [a for a in arquivos if not miniaturas_atualizadas(a, pasta_cache, tamanhos, formato)]
+
+    print(f"🖼️  {len(pendentes)} de {len(arquivos)} imagens sem miniatura atualizada")
+
+    for arquivo, img, erro in ler_imagens_antecipadas(pendentes, concorrencia):
+        try:
+            if erro is not None:
+                raise erro
+            salvar_piramide(img, arquivo, pasta_cache, tamanhos, formato)
+            print(f"✅ {arquivo.name}")
+        except Exception as e:
+            print(f"❌ {arquivo.name}: {e}")
+
+    return len(pendentes)
+
+def triar_miniaturas(caminho_pasta, pasta_cache='miniaturas', tamanho=256, formato='webp'):
+    """
+    Triagem de versos/páginas em branco direto das miniaturas em cache
+
+    A triagem já trabalha numa miniatura de 128 px, então a de 256 basta.
+    """
+    resultados = []
+    for arquivo in sorted(Path(caminho_pasta).rglob("*.TIF")):
+        miniatura = cv2.imread(str(caminho_miniatura(pasta_cache, arquivo, tamanho, formato)))
+        if miniatura is None:
+            continue
+        resultado = {'nome': arquivo.name, 'caminho': str(arquivo)}
+        resultado.update(triar_imagem(miniatura))
+        resultados.append(resultado)
+    return pd.DataFrame(resultados)
+
+def _legendar(miniatura, texto, tamanho):
+    """
+    Cola a miniatura numa célula quadrada branca com o nome embaixo
+    """
+    altura_texto = 18
+    celula = np.full((tamanho + altura_texto, tamanho, 3), 255, dtype=np.uint8)
+    altura, largura = miniatura.shape[:2]
+    topo = (tamanho - altura) // 2
+    esquerda = (tamanho - largura) // 2
+    celula[topo:topo + altura, esquerda:esquerda + largura] = miniatura
+    cv2.putText(celula, texto[:tamanho // 7], (2, tamanho + 13), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 0, 0), 1,
+                cv2.LINE_AA)
+    return celula
+
+def completar_caminhos(df, caminho_pasta):
+    """
+    Garante a coluna 'caminho' (a chave do cache) numa tabela que só tem 'nome'
+
+    Procura cada nome nos TIFs de caminho_pasta (recursivo); nome em mais
+    de uma pasta fica com o primeiro, com aviso, e nome não encontrado
+    fica sem caminho.
+    """
+    if 'caminho' in df.columns:
+        return df
+    encontrados = {}
+    for arquivo in sorted(Path(caminho_pasta).rglob("*.TIF")):
+        encontrados.setdefault(arquivo.name, []).append(arquivo)
+    for nome, arquivos in encontrados.items():
+        if len(arquivos) > 1 and nome in set(df['nome']):
+            print(f"⚠️  {nome} existe em {len(arquivos)} pastas; usando {arquivos[0].parent}")
+    return df.assign(caminho=[str(encontrados[nome][0]) if nome in encontrados else None for nome in df['nome']])
+
+def montar_mosaico(arquivos, pasta_cache='miniaturas', tamanho=256, colunas=6, formato='webp'):
+    """
+    Folha de contato (array BGR) com as miniaturas já em cache, em grade
+    """
+    celulas = []
+    for arquivo in arquivos:
+        miniatura = cv2.imread(str(caminho_miniatura(pasta_cache, arquivo, tamanho, formato))) if isinstance(
+            arquivo, (str, Path)) else None
+        if miniatura is None:
+            print(f"⚠️  Sem miniatura: {arquivo}")
+            continue
+        celulas.append(_legendar(miniatura, Path(arquivo).stem, tamanho))
+
+    if not celulas:
+        return None
+
+    vazia = np.full_like(celulas[0], 255)
+    celulas += [vazia] * (-len(celulas) % colunas)
+    linhas = [np.hstack(celulas[i:i + colunas]) for i in range(0, len(celulas), colunas)]
+    return np.vstack(linhas)
+
+def salvar_mosaicos(df, coluna_grupo, pasta_cache='miniaturas', pasta_saida='mosaicos', tamanho=256, colunas=6,
+                    formato='webp'):
+    """
+    Um PNG de folha de contato por grupo (cluster, motivo da triagem, ...)
+
+    df precisa das colunas 'caminho' (ver completar_caminhos) e coluna_grupo.
+    """
+    pasta_saida = Path(pasta_saida)
+    pasta_saida.mkdir(parents=True, exist_ok=True)
+
+    for grupo, linhas in df.groupby(df[coluna_grupo].fillna('').astype(str)):
+        mosaico = montar_mosaico(linhas['caminho'], pasta_cache, tamanho, colunas, formato)
+        if mosaico is None:
+            continue
+        destino = pasta_saida / f"mosaico_{coluna_grupo}_{grupo or 'sem_grupo'}.png".replace(' ', '_').replace('/', '-')
+        cv2.imwrite(str(destino), mosaico)
+        print(f"💾 Salvo: {destino.name} ({len(linhas)} imagens)")
+
+def gerar_pagina_revisao(df, coluna_grupo, pasta_cache='miniaturas', arquivo_html='revisao.html', formato='webp',
+                         colunas_info=()):
+    """
+    Página HTML estática para revisar as imagens agrupadas
+
+    Cada grupo é uma seção recolhível com as miniaturas de 256 px; clicar
+    abre a de 1024 px. Só usa as miniaturas do cache (nenhum TIF é lido);
+    df precisa das colunas 'nome' e 'caminho' (ver completar_caminhos).
+    """
+    arquivo_html = Path(arquivo_html)
+    base = Path(os.path.relpath(Path(pasta_cache).resolve(), arquivo_html.parent.resolve())).as_posix()
+
+    secoes = []
+    for grupo, linhas in df.groupby(df[coluna_grupo].fillna('').astype(str)):
+        cartoes = []
+        for _, linha in linhas.iterrows():
+            nome = linha['nome']
+            if not isinstance(linha['caminho'], str):
+                print(f"⚠️  Sem miniatura: {nome}")
+                continue
+            chave = html.escape(quote(chave_miniatura(linha['caminho'])))
+            info = ''.join(f"<br>{html.escape(str(c))}: {html.escape(str(linha[c]))}" for c in colunas_info)
+            cartoes.append(
+                f'<figure><a href="{base}/1024/{chave}.{formato}" target="_blank">'
+                f'<img src="{base}/256/{chave}.{formato}" loading="lazy"></a>'
+                f'<figcaption>{html.escape(nome)}{info}</figcaption></figure>'
+            )
+        titulo = html.escape(grupo or 'sem grupo')
+        secoes.append(f"<details open><summary>{titulo} ({len(linhas)})</summary>"
+                      f"<div class=\"grade\">{''.join(cartoes)}</div></details>")
+
+    pagina = f"""<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>Revisão - {html.escape(coluna_grupo)}</title>
+<style>
+body {{ font-family: sans-serif; margin: 1em; }}
+summary {{ font-size: 1.2em; font-weight: bold; cursor: pointer; margin: .5em 0; }}
+.grade {{ display: flex; flex-wrap: wrap; gap: 8px; }}
+figure {{ margin: 0; width: 256px; font-size: 12px; }}
+img {{ max-width: 256px; max-height: 256px; border: 1px solid #ccc; }}
+</style></head><body>
+<h1>Revisão por {html.escape(coluna_grupo)}</h1>
+{''.join(secoes)}
+</body></html>
+"""
+    arquivo_html.write_text(pagina, encoding='utf-8')
+    print(f"💾 Salvo: {arquivo_html}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pirâmide de miniaturas e mosaicos para revisão")
+    parser.add_argument('caminho', nargs='?',
+                        default=r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image\CA_processada")
+    parser.add_argument('--cache', default='miniaturas', help="pasta do cache de miniaturas")
+    parser.add_argument('--formato', choices=sorted(PARAMETROS_FORMATO), default='webp')
+    parser.add_argument('--tabela', help="CSV com 'nome' e a coluna de agrupamento (padrão: triagem)")
+    parser.add_argument('--grupo', default='motivo', help="coluna usada para agrupar")
+    args = parser.parse_args()
+
+    gerar_miniaturas_pasta(args.caminho, args.cache, formato=args.formato, recursivo=True)
+
+    if args.tabela:
+        df = completar_caminhos(pd.read_csv(args.tabela), args.caminho)
+    else:
+        df = triar_miniaturas(args.caminho, args.cache, formato=args.formato)
+
+    salvar_mosaicos(df, args.grupo, args.cache, formato=args.formato)
+    gerar_pagina_revisao(df, args.grupo, args.cache, f'revisao_{args.grupo}.html', args.formato)
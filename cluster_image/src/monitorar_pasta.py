@@ -0,0 +1,275 @@
+import argparse
+import hashlib
+import time
+from pathlib import Path
+import pandas as pd
+from leitura_antecipada import ler_imagens_antecipadas
+from analisadores import selecionar_analisadores
+from hash_perceptual import ArvoreBK, calcular_hashes
+from triagem import triar_imagem
+from miniaturas import salvar_piramide
+
+COLUNAS_MANIFESTO = ['nome', 'tamanho', 'mtime', 'hash', 'phash', 'duplicata_de', 'triagem', 'pulado']
+
+def calcular_hash(arquivo, tamanho_bloco=1024 * 1024):
+    """
+    Hash SHA-256 do conteúdo do arquivo (lido em blocos)
+    """
+    h = hashlib.sha256()
+    with open(arquivo, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+def carregar_manifesto(arquivo_manifesto):
+    """
+    Lê o manifesto de arquivos já processados (nome -> registro)
+    """
+    arquivo_manifesto = Path(arquivo_manifesto)
+    if not arquivo_manifesto.exists():
+        return {}
+
+    df = pd.read_csv(arquivo_manifesto, dtype={'phash': str, 'duplicata_de': str, 'triagem': str, 'pulado': str})
+    return {linha['nome']: linha for linha in df.to_dict('records')}
+
+def indexar_manifesto(manifesto):
+    """
+    Monta a BK-tree de pHash das imagens já processadas
+    """
+    arvore = ArvoreBK()
+    for nome, registro in manifesto.items():
+        if isinstance(registro.get('phash'), str):
+            arvore.inserir(int(registro['phash'], 16), nome)
+    return arvore
+
+def salvar_manifesto(manifesto, arquivo_manifesto):
+    """
+    Salva o manifesto em CSV (escrita atômica via arquivo temporário)
+    """
+    arquivo_manifesto = Path(arquivo_manifesto)
+    temporario = arquivo_manifesto.with_suffix('.tmp')
+    pd.DataFrame(list(manifesto.values()), columns=COLUNAS_MANIFESTO).to_csv(temporario, index=False)
+    temporario.replace(arquivo_manifesto)
+
+def verso_pulado(registro):
+    """
+    O registro é de um verso/página em branco que não passou pelos analisadores
+
+    Manifestos anteriores à coluna pulado só marcavam a triagem; nesses,
+    vale a triagem preenchida.
+    """
+    if 'pulado' in registro:
+        return registro['pulado'] == 'verso'
+    return isinstance(registro.get('triagem'), str)
+
+def detectar_pendentes(caminho_pasta, manifesto, revisitar_versos=False):
+    """
+    Lista arquivos novos ou alterados em relação ao manifesto
+
+    Tamanho e mtime servem de filtro rápido; o hash só é calculado quando
+    eles mudam, e um arquivo apenas "tocado" (mesmo hash) não é reprocessado.
+    revisitar_versos=True inclui também os versos que foram pulados antes.
+    """
+    pasta = Path(caminho_pasta)
+    pendentes = []
+
+    for arquivo in sorted(pasta.glob("*.TIF")):
+        info = arquivo.stat()
+        registro = {'nome': arquivo.name, 'tamanho': info.st_size, 'mtime': info.st_mtime}
+        anterior = manifesto.get(arquivo.name)
+
+        if anterior is not None and anterior['tamanho'] == info.st_size and anterior['mtime'] == info.st_mtime:
+            registro['hash'] = anterior['hash']
+        else:
+            registro['hash'] = calcular_hash(arquivo)
+
+        if anterior is not None and anterior['hash'] == registro['hash']:
+            if revisitar_versos and verso_pulado(anterior):
+                pendentes.append((arquivo, registro, True))
+                continue
+            # Conteúdo igual: só atualizar o mtime no manifesto
+            manifesto[arquivo.name] = {**anterior, **registro}
+            continue
+
+        pendentes.append((arquivo, registro, anterior is not None))
+
+    return pendentes
+
+def anexar_resultados(arquivo_csv, linhas, substituir=()):
+    """
+    Anexa linhas ao CSV de resultados existente
+
+    Se as colunas cabem no cabeçalho atual, faz append direto no arquivo;
+    caso contrário (colunas novas ou linhas a substituir), reescreve o CSV.
+    """
+    arquivo_csv = Path(arquivo_csv)
+    novas = pd.DataFrame(linhas)
+
+    if not arquivo_csv.exists():
+        novas.to_csv(arquivo_csv, index=False)
+        return
+
+    cabecalho = pd.read_csv(arquivo_csv, nrows=0).columns
+    if not substituir and set(novas.columns) <= set(cabecalho):
+        novas.reindex(columns=cabecalho).to_csv(arquivo_csv, mode='a', header=False, index=False)
+        return
+
+    existentes = pd.read_csv(arquivo_csv)
+    existentes = existentes[~existentes['nome'].isin(substituir)]
+    pd.concat([existentes, novas], ignore_index=True).to_csv(arquivo_csv, index=False)
+
+def remover_resultados(arquivo_csv, nomes):
+    """
+    Tira do CSV de resultados as linhas dessas imagens (se houver)
+    """
+    arquivo_csv = Path(arquivo_csv)
+    if not arquivo_csv.exists():
+        return
+
+    existentes = pd.read_csv(arquivo_csv)
+    manter = ~existentes['nome'].isin(nomes)
+    if not manter.all():
+        existentes[manter].to_csv(arquivo_csv, index=False)
+
+def processar_novos(caminho_pasta, pasta_saida='.', analisadores=None, pular_duplicatas=False, raio_duplicata=6,
+                    pular_versos=True, concorrencia=4, recortar=False, pasta_miniaturas=None):
+    """
+    Roda os analisadores registrados apenas nos arquivos novos/alterados
+
+    Antes dos analisadores, a triagem em miniatura marca versos e páginas
+    em branco (coluna triagem do manifesto); com pular_versos=True eles
+    não passam por KMeans, traços nem CLIP (coluna pulado), e com
+    pular_versos=False os versos pulados antes entram de novo na fila.
+
+    Um arquivo alterado que passa a ser pulado (verso ou quase-duplicata)
+    tem suas linhas antigas removidas dos CSVs de resultado.
+
+    Cada imagem nova também tem seu pHash comparado com as já processadas; as
+    quase-duplicatas ficam marcadas no manifesto (coluna duplicata_de) e,
+    com pular_duplicatas=True, não passam pelos analisadores.
+
+    Os arquivos pendentes são lidos em threads à frente do processamento
+    (até 'concorrencia' leituras simultâneas), útil em pastas de rede.
+
+    recortar=True roda os analisadores só na caixa do desenho
+    (segmentacao_fundo), pulando o papel vazio.
+
+    Com pasta_miniaturas, a pirâmide de miniaturas (64/256/1024) de cada
+    imagem é gravada no mesmo passo, a partir da imagem já decodificada.
+    """
+    pasta = Path(caminho_pasta)
+    pasta_saida = Path(pasta_saida)
+    arquivo_manifesto = pasta_saida / f"manifesto_{pasta.name}.csv"
+
+    manifesto = carregar_manifesto(arquivo_manifesto)
+    selecionados = selecionar_analisadores(analisadores, recortar)
+    pendentes = detectar_pendentes(pasta, manifesto, revisitar_versos=not pular_versos)
+    arvore = indexar_manifesto(manifesto)
+
+    registros = {arquivo: (registro, alterado) for arquivo, registro, alterado in pendentes}
+
+    for arquivo, img, erro in ler_imagens_antecipadas(registros, concorrencia):
+        inicio = time.perf_counter()
+        registro, alterado = registros[arquivo]
+        try:
+            if erro is not None:
+                raise erro
+
+            # Imagem decodificada uma vez e reaproveitada em todos os analisadores
+            if pasta_miniaturas is not None:
+                salvar_piramide(img, arquivo, pasta_miniaturas)
+
+            triagem = triar_imagem(img)
+            registro['triagem'] = triagem['motivo'] or None
+            registro['pulado'] = None
+
+            if triagem['provavel_verso'] and pular_versos:
+                registro['pulado'] = 'verso'
+                if alterado:
+                    for _, arquivo_csv in selecionados.values():
+                        remover_resultados(pasta_saida / arquivo_csv, [arquivo.name])
+                manifesto[arquivo.name] = registro
+                salvar_manifesto(manifesto, arquivo_manifesto)
+                print(f"⚠️  {arquivo.name}: {triagem['motivo']}, analisadores pulados")
+                continue
+
+            phash = calcular_hashes(img)['phash']
+            registro['phash'] = f"{phash:016x}"
+            vizinhos = [nome for _, nome in arvore.buscar(phash, raio_duplicata) if nome != arquivo.name]
+            registro['duplicata_de'] = vizinhos[0] if vizinhos else None
+
+            if vizinhos and pular_duplicatas:
+                registro['pulado'] = 'duplicata'
+                if alterado:
+                    for _, arquivo_csv in selecionados.values():
+                        remover_resultados(pasta_saida / arquivo_csv, [arquivo.name])
+                manifesto[arquivo.name] = registro
+                salvar_manifesto(manifesto, arquivo_manifesto)
+                print(f"⚠️  {arquivo.name}: quase-duplicata de {vizinhos[0]}, analisadores pulados")
+                continue
+
+            # Todos os analisadores antes de gravar: se um falha, nenhum CSV recebe
+            # linha e a próxima passada (o arquivo segue fora do manifesto) não duplica
+            resultados = [(funcao(img, arquivo.name), arquivo_csv) for funcao, arquivo_csv in selecionados.values()]
+            for resultado, arquivo_csv in resultados:
+                if resultado is not None:
+                    substituir = [arquivo.name] if alterado else []
+                    anexar_resultados(pasta_saida / arquivo_csv, [resultado], substituir)
+                elif alterado:
+                    remover_resultados(pasta_saida / arquivo_csv, [arquivo.name])
+
+            manifesto[arquivo.name] = registro
+            salvar_manifesto(manifesto, arquivo_manifesto)
+            arvore.inserir(phash, arquivo.name)
+            print(f"✅ {arquivo.name} ({time.perf_counter() - inicio:.1f}s)")
+
+        except Exception as e:
+            print(f"❌ {arquivo.name}: {e}")
+
+    # Persistir também atualizações só de mtime
+    salvar_manifesto(manifesto, arquivo_manifesto)
+    return len(pendentes)
+
+def monitorar(caminho_pasta, pasta_saida='.', analisadores=None, intervalo=5.0, pular_duplicatas=False,
+              pular_versos=True, concorrencia=4, recortar=False, pasta_miniaturas=None):
+    """
+    Verifica a pasta periodicamente e processa as imagens que forem chegando
+    """
+    print(f"👀 Monitorando {Path(caminho_pasta).name} (Ctrl-C para sair)")
+    try:
+        while True:
+            processar_novos(caminho_pasta, pasta_saida, analisadores, pular_duplicatas,
+                            pular_versos=pular_versos, concorrencia=concorrencia, recortar=recortar,
+                            pasta_miniaturas=pasta_miniaturas)
+            time.sleep(intervalo)
+    except KeyboardInterrupt:
+        print("\n⏹️  Monitoramento encerrado")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Processamento incremental de pastas *_processada")
+    parser.add_argument('caminho', nargs='?',
+                        default=r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image\CA_processada")
+    parser.add_argument('--saida', default='.', help="pasta dos CSVs de resultado e do manifesto")
+    parser.add_argument('--analisadores', nargs='+', help="subconjunto dos analisadores registrados")
+    parser.add_argument('--intervalo', type=float, default=5.0, help="segundos entre verificações")
+    parser.add_argument('--pular-duplicatas', action='store_true',
+                        help="não analisa imagens quase idênticas a outra já processada")
+    parser.add_argument('--analisar-versos', action='store_true',
+                        help="roda os analisadores mesmo em versos/páginas em branco")
+    parser.add_argument('--concorrencia', type=int, default=4, help="leituras de arquivo simultâneas")
+    parser.add_argument('--recortar', action='store_true',
+                        help="analisa só a caixa do desenho, sem o papel em volta")
+    parser.add_argument('--miniaturas', metavar='PASTA',
+                        help="grava também a pirâmide de miniaturas nesta pasta")
+    parser.add_argument('--uma-vez', action='store_true', help="processa os pendentes e sai")
+    args = parser.parse_args()
+
+    if args.uma_vez:
+        n = processar_novos(args.caminho, args.saida, args.analisadores, args.pular_duplicatas,
+                            pular_versos=not args.analisar_versos, concorrencia=args.concorrencia,
+                            recortar=args.recortar, pasta_miniaturas=args.miniaturas)
+        print(f"\n📊 {n} arquivo(s) processado(s)")
+    else:
+        monitorar(args.caminho, args.saida, args.analisadores, args.intervalo, args.pular_duplicatas,
+                  pular_versos=not args.analisar_versos, concorrencia=args.concorrencia,
+                  recortar=args.recortar, pasta_miniaturas=args.miniaturas)
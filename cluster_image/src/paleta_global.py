@@ -0,0 +1,148 @@
+import cv2
+import numpy as np
+from pathlib import Path
+import pandas as pd
+from sklearn.cluster import KMeans
+from upload import carregar_imagem
+from analise_hsv import classificar_cor_hsv
+from conversao_cores import codigos_24bits, mascara_nao_branco
+
+def listar_pastas_processadas(caminho_raiz):
+    """
+    Pastas *_processada (uma por coleção: CA, CB, ...)
+    """
+    return sorted(p for p in Path(caminho_raiz).glob("*_processada") if p.is_dir())
+
+def amostrar_pixels(pastas, pixels_por_imagem=2000, semente=42):
+    """
+    Amostra pixels não brancos de todas as imagens de todas as pastas
+    """
+    rng = np.random.default_rng(semente)
+    amostras = []
+
+    for pasta in pastas:
+        for arquivo in sorted(Path(pasta).glob("*.TIF")):
+            try:
+                img = carregar_imagem(arquivo)
+                if len(img.shape) != 3:
+                    continue
+                pixels = img.reshape(-1, 3)[mascara_nao_branco(img).ravel()]
+                if len(pixels) > pixels_por_imagem:
+                    pixels = pixels[rng.choice(len(pixels), pixels_por_imagem, replace=False)]
+                amostras.append(pixels)
+            except Exception as e:
+                print(f"❌ {arquivo.name}: {e}")
+
+    return np.concatenate(amostras) if amostras else np.empty((0, 3), dtype=np.uint8)
+
+def ajustar_paleta(amostra, n_cores=32):
+    """
+    Ajusta a paleta global (centroides BGR) uma única vez na amostra
+    """
+    kmeans = KMeans(n_clusters=n_cores, random_state=42, n_init=4)
+    kmeans.fit(amostra.astype(np.float32))
+    return kmeans.cluster_centers_.astype(np.float32)
+
+def construir_lut(paleta, tamanho_bloco=1 << 18):
+    """
+    Tabela de 2^24 entradas: código BGR de 24 bits -> índice da cor mais próxima
+    """
+    n_cores = len(paleta)
+    tipo = np.uint8 if n_cores <= 256 else np.uint16
+    lut = np.empty(1 << 24, dtype=tipo)
+    norma_paleta = np.sum(paleta ** 2, axis=1)
+
+    for inicio in range(0, 1 << 24, tamanho_bloco):
+        codigos = np.arange(inicio, inicio + tamanho_bloco, dtype=np.uint32)
+        cores = np.stack([(codigos >> 16) & 255, (codigos >> 8) & 255, codigos & 255], axis=1).astype(np.float32)
+        # ||x - c||² = ||c||² - 2 x·c (+ ||x||², constante por linha)
+        distancias = norma_paleta - 2 * cores @ paleta.T
+        lut[inicio:inicio + tamanho_bloco] = np.argmin(distancias, axis=1)
+
+    return lut
+
+def salvar_paleta(paleta, lut, arquivo='paleta_global.npz'):
+    """
+    Salva paleta e LUT juntas (a LUT só vale para esta paleta)
+    """
+    np.savez(arquivo, paleta=paleta, lut=lut)
+    print(f"💾 Paleta salva: {arquivo}")
+
+def carregar_paleta(arquivo='paleta_global.npz'):
+    """
+    Carrega paleta e LUT salvas por salvar_paleta
+    """
+    dados = np.load(arquivo)
+    return dados['paleta'], dados['lut']
+
+def descrever_paleta(paleta):
+    """
+    Tabela da paleta com a classificação HSV de cada entrada
+    """
+    hsv = cv2.cvtColor(np.clip(paleta, 0, 255).astype(np.uint8).reshape(1, -1, 3), cv2.COLOR_BGR2HSV)[0]
+    linhas = []
+    for i, (bgr, (h, s, v)) in enumerate(zip(paleta.astype(int), hsv.astype(int))):
+        linhas.append({
+            'indice': i,
+            'bgr': bgr.tolist(),
+            'hsv': f"[{h},{s},{v}]",
+            'cor': classificar_cor_hsv(h, s, v),
+        })
+    return pd.DataFrame(linhas)
+
+def histograma_paleta(img, lut, n_cores):
+    """
+    Percentual de pixels não brancos em cada entrada da paleta global
+
+    Imagens em cinza viram BGR (B = G = R) e são quantizadas contra a
+    mesma paleta, em vez de ficarem de fora da tabela.
+    """
+    if img.ndim == 2:
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    indices = lut[codigos_24bits(img)]
+    contagens = np.bincount(indices[mascara_nao_branco(img)], minlength=n_cores)
+    total = contagens.sum()
+    if total == 0:
+        return np.zeros(n_cores)
+    return contagens / total * 100
+
+def analisar_paleta_global(caminho_pasta, paleta, lut):
+    """
+    Histograma de paleta global de cada imagem (colunas comparáveis entre desenhos)
+    """
+    pasta = Path(caminho_pasta)
+    n_cores = len(paleta)
+    resultados = []
+
+    for arquivo in sorted(pasta.glob("*.TIF")):
+        try:
+            img = carregar_imagem(arquivo)
+            percentuais = histograma_paleta(img, lut, n_cores)
+
+            resultado = {'nome': arquivo.name, 'pasta': pasta.name}
+            for i, perc in enumerate(percentuais):
+                resultado[f'paleta_{i:02d}'] = round(perc, 2)
+            resultados.append(resultado)
+
+        except Exception as e:
+            print(f"❌ {arquivo.name}: {e}")
+
+    return pd.DataFrame(resultados)
+
+if __name__ == "__main__":
+    raiz = r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image"
+
+    pastas = listar_pastas_processadas(raiz)
+    print(f"🎨 Ajustando paleta global em {len(pastas)} pasta(s)...")
+
+    # Ajuste único da paleta + LUT de 24 bits
+    amostra = amostrar_pixels(pastas)
+    paleta = ajustar_paleta(amostra, n_cores=32)
+    lut = construir_lut(paleta)
+    salvar_paleta(paleta, lut)
+    descrever_paleta(paleta).to_csv('paleta_global.csv', index=False)
+
+    # Quantizar todas as imagens contra a mesma paleta
+    df_paleta = pd.concat([analisar_paleta_global(pasta, paleta, lut) for pasta in pastas], ignore_index=True)
+    df_paleta.to_csv('paleta_global_histogramas.csv', index=False)
+    print(f"\n💾 Salvo: paleta_global.csv, paleta_global_histogramas.csv")
@@ -0,0 +1,284 @@
+import argparse
+import multiprocessing as mp
+import queue
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from pathlib import Path
+import pandas as pd
+from PIL import Image, ImageMode
+from upload import carregar_imagem
+
+# Registro de largura fixa por analisador: (campo, dtype numpy)
+# Campos ausentes na linha (ex.: menos de 5 cores) ficam '' / NaN /
+# INTEIRO_AUSENTE e são omitidos de volta, então a linha reconstruída é
+# igual à original.
+ESQUEMAS = {
+    'histograma': [(campo, tipo) for i in range(1, 6) for campo, tipo in ((f'cor_{i}', 'U12'), (f'perc_{i}', 'f8'))],
+    'densidade': [
+        ('classificacao', 'U16'),
+        ('colorido_vivido', 'f8'),
+        ('colorido_suave', 'f8'),
+        ('total_colorido', 'f8'),
+        ('monocromatico', 'f8'),
+        ('cinza', 'f8'),
+        ('branco', 'f8'),
+        ('preto', 'f8'),
+        ('saturacao_media', 'f8'),
+        ('valor_medio', 'f8'),
+        ('diversidade_cores', 'f8'),
+    ],
+    'tracos': [
+        ('classificacao_espessura', 'U24'),
+        ('classificacao_continuidade', 'U24'),
+        ('classificacao_densidade', 'U16'),
+        ('espessura_media', 'f4'),
+        ('espessura_max', 'f4'),
+        ('espessura_std', 'f4'),
+        ('densidade_tracos', 'f8'),
+        ('variacao_densidade', 'f8'),
+        ('num_segmentos', 'i4'),
+        ('conectividade', 'f8'),
+        ('comprimento_total', 'f8'),
+        ('suavidade', 'f8'),
+        ('pressao_forte_pct', 'f8'),
+        ('pressao_media_pct', 'f8'),
+        ('pressao_fraca_pct', 'f8'),
+        ('intensidade_media', 'f8'),
+        ('contraste_pressao', 'f8'),
+        ('entropia_normalizada', 'f8'),
+        ('thresholds_pressao', 'U40'),
+    ],
+}
+
+INTEIRO_AUSENTE = np.iinfo(np.int32).min
+
+# Estado do registro de cada analisador
+PENDENTE, OK, VAZIO, FALHA = 0, 1, 2, 3
+
+def tipo_registro(analisadores):
+    """
+    dtype estruturado com um sub-registro (estado + campos) por analisador
+    """
+    return np.dtype([(nome, [('_estado', 'i1')] + ESQUEMAS[nome]) for nome in analisadores])
+
+def gravar_registro(registro, linha, esquema):
+    """
+    Copia a linha (dict) para o registro de largura fixa
+    """
+    for campo, tipo in esquema:
+        valor = linha.get(campo)
+        if valor is None:
+            registro[campo] = '' if tipo.startswith('U') else (np.nan if tipo.startswith('f') else INTEIRO_AUSENTE)
+        else:
+            registro[campo] = valor
+
+def ler_registro(registro, esquema, nome):
+    """
+    Reconstrói a linha (dict) a partir do registro de largura fixa
+    """
+    linha = {'nome': nome}
+    for campo, tipo in esquema:
+        valor = registro[campo]
+        if tipo.startswith('U'):
+            if valor == '':
+                continue
+            valor = str(valor)
+        elif tipo.startswith('f') and np.isnan(valor):
+            continue
+        elif tipo.startswith('i') and valor == INTEIRO_AUSENTE:
+            continue
+        linha[campo] = valor
+    return linha
+
+def tamanho_maximo(arquivos, alinhamento=64):
+    """
+    Bytes do maior array decodificado (lê só os cabeçalhos)
+
+    Conta o tamanho de cada amostra pelo modo do PIL (TIF de 16 bits ocupa
+    2 bytes por banda) e arredonda para um múltiplo de alinhamento, para
+    todo slot começar alinhado qualquer que seja o dtype.
+    """
+    maior = 0
+    for arquivo in arquivos:
+        try:
+            with Image.open(arquivo) as pil_img:
+                largura, altura = pil_img.size
+                modo = ImageMode.getmode(pil_img.mode)
+                maior = max(maior, largura * altura * len(modo.bands) * np.dtype(modo.typestr).itemsize)
+        except Exception:
+            continue
+    return -(-maior // alinhamento) * alinhamento
+
+def _decodificar(arquivos, nome_anel, bytes_por_slot, livres, tarefas, resultados, n_workers):
+    """
+    Processo decodificador: lê cada imagem e a escreve num slot livre do anel
+
+    livres.get() bloqueia quando todos os slots estão ocupados (contrapressão).
+    """
+    anel = shared_memory.SharedMemory(name=nome_anel)
+    try:
+        for indice, arquivo in enumerate(arquivos):
+            try:
+                img = carregar_imagem(arquivo)
+                if img.nbytes > bytes_por_slot:
+                    raise ValueError(f"imagem de {img.nbytes} bytes não cabe no slot ({bytes_por_slot})")
+            except Exception as e:
+                resultados.put((indice, f"{type(e).__name__}: {e}"))
+                continue
+
+            slot = livres.get()
+            destino = np.ndarray(img.shape, dtype=img.dtype, buffer=anel.buf, offset=slot * bytes_por_slot)
+            destino[...] = img
+            del destino
+            tarefas.put((slot, indice, img.shape, img.dtype.str))
+    finally:
+        for _ in range(n_workers):
+            tarefas.put(None)
+        anel.close()
+
+def _trabalhar(nome_anel, bytes_por_slot, nome_registros, n_imagens, analisadores, nomes_arquivos,
+               livres, tarefas, resultados):
+    """
+    Processo de análise: lê a imagem do slot sem cópia, grava o registro e libera o slot
+    """
+    from analisadores import selecionar_analisadores
+
+    anel = shared_memory.SharedMemory(name=nome_anel)
+    memoria_registros = shared_memory.SharedMemory(name=nome_registros)
+    registros = np.ndarray((n_imagens,), dtype=tipo_registro(analisadores), buffer=memoria_registros.buf)
+    selecionados = selecionar_analisadores(analisadores)
+
+    try:
+        while (tarefa := tarefas.get()) is not None:
+            slot, indice, forma, tipo = tarefa
+            img = np.ndarray(forma, dtype=tipo, buffer=anel.buf, offset=slot * bytes_por_slot)
+            erros, registro = [], None
+            for nome, (funcao, _) in selecionados.items():
+                registro = registros[nome][indice]
+                try:
+                    linha = funcao(img, nomes_arquivos[indice])
+                    if linha is None:
+                        registro['_estado'] = VAZIO
+                    else:
+                        gravar_registro(registro, linha, ESQUEMAS[nome])
+                        registro['_estado'] = OK
+                except Exception as e:
+                    registro['_estado'] = FALHA
+                    erros.append(f"[{nome}] {type(e).__name__}: {e}")
+
+            # Nenhuma referência ao slot pode sobrar antes de devolvê-lo
+            del img, registro
+            livres.put(slot)
+            resultados.put((indice, '; '.join(erros) or None))
+    finally:
+        del registros
+        memoria_registros.close()
+        anel.close()
+
+def processar_paralelo(caminho_pasta, analisadores=('histograma', 'densidade', 'tracos'), n_workers=None,
+                       n_slots=None):
+    """
+    Analisa a pasta com um decodificador e n_workers processos de análise
+
+    As imagens passam do decodificador aos workers por um anel de n_slots
+    slots em memória compartilhada (sem pickle dos arrays); os resultados
+    voltam como registros de largura fixa num segundo bloco compartilhado,
+    e pela fila só passa (índice, erro). Devolve {analisador: DataFrame}.
+    """
+    desconhecidos = [nome for nome in analisadores if nome not in ESQUEMAS]
+    if desconhecidos:
+        raise ValueError(f"Analisadores sem registro de largura fixa: {', '.join(desconhecidos)}")
+
+    arquivos = sorted(Path(caminho_pasta).glob("*.TIF"))
+    nomes_arquivos = [arquivo.name for arquivo in arquivos]
+    n_workers = n_workers or max(1, (mp.cpu_count() or 2) - 1)
+    n_slots = n_slots or 2 * n_workers
+    bytes_por_slot = tamanho_maximo(arquivos)
+    dtype = tipo_registro(analisadores)
+
+    print(f"⚙️  {len(arquivos)} imagens, {n_workers} workers, {n_slots} slots de {bytes_por_slot / 1e6:.1f} MB")
+    if not arquivos:
+        return {nome: pd.DataFrame() for nome in analisadores}
+
+    anel = shared_memory.SharedMemory(create=True, size=n_slots * bytes_por_slot)
+    memoria_registros = shared_memory.SharedMemory(create=True, size=max(1, len(arquivos) * dtype.itemsize))
+    registros = np.ndarray((len(arquivos),), dtype=dtype, buffer=memoria_registros.buf)
+    registros[...] = np.zeros((), dtype=dtype)
+
+    livres, tarefas, resultados = mp.Queue(), mp.Queue(), mp.Queue()
+    for slot in range(n_slots):
+        livres.put(slot)
+
+    decodificador = mp.Process(target=_decodificar, args=(arquivos, anel.name, bytes_por_slot, livres, tarefas,
+                                                          resultados, n_workers))
+    workers = [mp.Process(target=_trabalhar, args=(anel.name, bytes_por_slot, memoria_registros.name, len(arquivos),
+                                                   list(analisadores), nomes_arquivos, livres, tarefas, resultados))
+               for _ in range(n_workers)]
+
+    inicio = time.perf_counter()
+    try:
+        decodificador.start()
+        for worker in workers:
+            worker.start()
+
+        recebidos = 0
+        while recebidos < len(arquivos):
+            # Um processo que morre segurando um slot trava o decodificador em
+            # livres.get(): falha logo em vez de esperar para sempre
+            for processo in [decodificador] + workers:
+                if processo.exitcode not in (None, 0):
+                    raise RuntimeError(f"{processo.name} encerrou com código {processo.exitcode} "
+                                       f"({recebidos} de {len(arquivos)} resultados recebidos)")
+            try:
+                indice, erro = resultados.get(timeout=1.0)
+            except queue.Empty:
+                if not any(processo.is_alive() for processo in [decodificador] + workers):
+                    raise RuntimeError("Processos encerraram antes de entregar todos os resultados")
+                continue
+            recebidos += 1
+            if erro:
+                print(f"❌ {nomes_arquivos[indice]}: {erro}")
+            else:
+                print(f"✅ {nomes_arquivos[indice]}")
+
+        decodificador.join()
+        for worker in workers:
+            worker.join()
+
+        tabelas = {}
+        for nome in analisadores:
+            linhas = [ler_registro(registros[nome][i], ESQUEMAS[nome], nomes_arquivos[i])
+                      for i in range(len(arquivos)) if registros[nome][i]['_estado'] == OK]
+            tabelas[nome] = pd.DataFrame(linhas)
+
+    finally:
+        for processo in [decodificador] + workers:
+            if processo.is_alive():
+                processo.terminate()
+        del registros
+        memoria_registros.close()
+        memoria_registros.unlink()
+        anel.close()
+        anel.unlink()
+
+    print(f"\n📊 {len(arquivos)} imagens em {time.perf_counter() - inicio:.1f}s")
+    return tabelas
+
+if __name__ == "__main__":
+    from analisadores import ANALISADORES
+
+    parser = argparse.ArgumentParser(description="Análise paralela com imagens em memória compartilhada")
+    parser.add_argument('caminho', nargs='?',
+                        default=r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image\CA_processada")
+    parser.add_argument('--analisadores', nargs='+', default=['histograma', 'densidade', 'tracos'],
+                        choices=sorted(ESQUEMAS))
+    parser.add_argument('--workers', type=int, help="processos de análise (padrão: núcleos - 1)")
+    parser.add_argument('--slots', type=int, help="slots do anel (padrão: 2 por worker)")
+    args = parser.parse_args()
+
+    tabelas = processar_paralelo(args.caminho, args.analisadores, args.workers, args.slots)
+    for nome, df in tabelas.items():
+        arquivo_csv = ANALISADORES[nome][1]
+        df.to_csv(arquivo_csv, index=False)
+        print(f"💾 Salvo: {arquivo_csv}")
@@ -0,0 +1,100 @@
+import cv2
+import numpy as np
+from pathlib import Path
+import pandas as pd
+from sklearn.cluster import KMeans
+from upload import carregar_imagem
+from analise_hsv import classificar_cor_hsv
+from conversao_cores import converter_unicas, cores_unicas, mascara_nao_branco
+
+def lab_opencv_para_cielab(lab):
+    """
+    Lab uint8 do OpenCV (L*255/100, a+128, b+128) -> L*a*b* em float
+    """
+    lab = lab.astype(np.float32)
+    return np.stack([lab[..., 0] * 100 / 255, lab[..., 1] - 128, lab[..., 2] - 128], axis=-1)
+
+def quantizar_lab(img, n_cores=5, ignorar_branco=True):
+    """
+    Paleta perceptual: K-Means em L*a*b* sobre as cores únicas, com peso pela contagem
+
+    Cada cor única é convertida uma vez (LUT) e agrupada uma vez; o
+    resultado volta aos pixels pelo índice de cores_unicas. Retorna
+    centroides L*a*b*, centroides BGR, percentuais e rótulo por pixel
+    selecionado, em ordem decrescente de percentual.
+    """
+    mascara = mascara_nao_branco(img) if ignorar_branco else None
+    cores, contagens, inverso = cores_unicas(img, mascara)
+
+    if len(cores) < n_cores:
+        return None
+
+    lab = lab_opencv_para_cielab(converter_unicas(cores, 'lab'))
+    kmeans = KMeans(n_clusters=n_cores, random_state=42, n_init=10)
+    kmeans.fit(lab, sample_weight=contagens)
+
+    pesos = np.bincount(kmeans.labels_, weights=contagens, minlength=n_cores)
+    ordem = np.argsort(pesos)[::-1]
+    centroides = kmeans.cluster_centers_[ordem]
+
+    # Rótulos renumerados na ordem de percentual
+    renumerar = np.empty(n_cores, dtype=np.int64)
+    renumerar[ordem] = np.arange(n_cores)
+
+    lab_opencv = np.stack([centroides[:, 0] * 255 / 100, centroides[:, 1] + 128, centroides[:, 2] + 128], axis=1)
+    bgr = cv2.cvtColor(np.clip(np.round(lab_opencv), 0, 255).astype(np.uint8).reshape(1, -1, 3), cv2.COLOR_LAB2BGR)[0]
+
+    return {
+        'lab': centroides,
+        'bgr': bgr,
+        'percentuais': pesos[ordem] / pesos.sum() * 100,
+        'rotulos': renumerar[kmeans.labels_][inverso],
+    }
+
+def analisar_imagem_lab(img, nome, n_cores=5):
+    """
+    Gera a linha de resultado da paleta L*a*b* de uma imagem
+    """
+    quantizacao = quantizar_lab(img, n_cores)
+    if quantizacao is None:
+        return None
+
+    hsv = cv2.cvtColor(quantizacao['bgr'].reshape(1, -1, 3), cv2.COLOR_BGR2HSV)[0]
+    resultado = {'nome': nome}
+
+    for i, (lab, (h, s, v), perc) in enumerate(zip(quantizacao['lab'], hsv.astype(int), quantizacao['percentuais'])):
+        l, a, b = np.round(lab).astype(int)
+        resultado[f'cor_{i+1}'] = classificar_cor_hsv(h, s, v)
+        resultado[f'lab_{i+1}'] = f"[{l},{a},{b}]"
+        resultado[f'perc_{i+1}'] = round(perc, 1)
+
+    return resultado
+
+def analisar_lab_dataset(caminho_pasta, n_cores=5):
+    """
+    Paleta L*a*b* de todas as imagens
+    """
+    pasta = Path(caminho_pasta)
+    resultados = []
+
+    print("PALETA L*a*b* (CORES ÚNICAS)")
+
+    for arquivo in sorted(pasta.glob("*.TIF")):
+        try:
+            img = carregar_imagem(arquivo)
+            resultado = analisar_imagem_lab(img, arquivo.name, n_cores)
+            if resultado is not None:
+                resultados.append(resultado)
+                print(f"✅ {arquivo.name} - {resultado['cor_1']} {resultado['perc_1']}%")
+
+        except Exception as e:
+            print(f"❌ {arquivo.name}: {e}")
+
+    return pd.DataFrame(resultados)
+
+if __name__ == "__main__":
+    caminho = r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image\CA_processada"
+
+    df_lab = analisar_lab_dataset(caminho)
+    df_lab.to_csv('cores_lab.csv', index=False)
+    print(f"\n💾 Salvo: cores_lab.csv")
@@ -0,0 +1,244 @@
+import argparse
+import io
+import json
+import os
+import platform
+import re
+import sys
+import time
+from datetime import datetime
+from fnmatch import fnmatch
+from pathlib import Path
+import pandas as pd
+from upload import carregar_imagem
+from analisadores import selecionar_analisadores
+
+PASTA_IMAGENS = Path(__file__).resolve().parent.parent / 'CA_processada'
+PASTA_REFERENCIA = Path(__file__).resolve().parent / 'regressao'
+ANALISADORES_PADRAO = ('histograma', 'densidade', 'matiz', 'tracos', 'hsv', 'cores', 'lab')
+
+# Tolerância absoluta por coluna (padrões fnmatch, vale o primeiro que casar).
+# Colunas com números dentro de texto ("[245, 204, 110]", "Fraca:<32, ...")
+# comparam número a número; o texto em volta tem de ser idêntico.
+TOLERANCIAS = {
+    'histograma': {'perc_*': 0.1},
+    'densidade': {'diversidade_cores': 0.1, '*': 0.05},
+    'matiz': {'matiz_medio': 0.1, 'desvio_circular': 0.1, '*': 0.001},
+    'tracos': {'espessura_*': 0.05, '*_pct': 0.1, 'comprimento_total': 1.0, 'num_segmentos': 0,
+               'thresholds_pressao': 1, '*': 0.01},
+    'hsv': {'hsv_*': 2, 'perc_*': 0.5},
+    'cores': {'cor_*': 2, 'perc_*': 0.5},
+    'lab': {'lab_*': 1, 'perc_*': 0.5},
+}
+TOLERANCIA_PADRAO = 1e-6
+
+_NUMERO = re.compile(r'-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?')
+
+def tolerancia(analisador, coluna):
+    """
+    Tolerância absoluta da coluna (TOLERANCIA_PADRAO se nenhum padrão casar)
+    """
+    for padrao, valor in TOLERANCIAS.get(analisador, {}).items():
+        if fnmatch(coluna, padrao):
+            return valor
+    return TOLERANCIA_PADRAO
+
+def _como_texto(df):
+    """
+    DataFrame como sairia do CSV e lido de volta em texto (mesma formatação da referência)
+    """
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    buffer.seek(0)
+    return pd.read_csv(buffer, dtype=str, keep_default_na=False)
+
+def comparar_valor(esperado, obtido):
+    """
+    Maior desvio numérico entre duas células, ou None se o texto não bate
+    """
+    if esperado == obtido:
+        return 0.0
+    if _NUMERO.sub('#', esperado) != _NUMERO.sub('#', obtido):
+        return None
+    desvios = [abs(float(a) - float(b)) for a, b in zip(_NUMERO.findall(esperado), _NUMERO.findall(obtido))]
+    return max(desvios, default=0.0)
+
+def comparar_tabela(analisador, referencia, atual):
+    """
+    Lista de falhas (texto) entre a tabela de referência e a atual
+    """
+    falhas = []
+    referencia = referencia.set_index('nome')
+    atual = atual.set_index('nome')
+
+    for nome in sorted(set(referencia.index) - set(atual.index)):
+        falhas.append(f"{nome}: sem resultado (a referência tem)")
+    for nome in sorted(set(atual.index) - set(referencia.index)):
+        falhas.append(f"{nome}: resultado novo (a referência não tem)")
+    for coluna in [c for c in referencia.columns if c not in atual.columns]:
+        falhas.append(f"coluna {coluna} sumiu")
+    for coluna in [c for c in atual.columns if c not in referencia.columns]:
+        falhas.append(f"coluna {coluna} é nova")
+
+    nomes = referencia.index.intersection(atual.index)
+    for coluna in referencia.columns.intersection(atual.columns):
+        tol = tolerancia(analisador, coluna)
+        for nome in nomes:
+            esperado, obtido = referencia.at[nome, coluna], atual.at[nome, coluna]
+            desvio = comparar_valor(esperado, obtido)
+            if desvio is None:
+                falhas.append(f"{nome} [{coluna}]: '{esperado}' -> '{obtido}'")
+            elif desvio > tol:
+                falhas.append(f"{nome} [{coluna}]: {esperado} -> {obtido} (desvio {desvio:.4g} > {tol})")
+
+    return falhas
+
+def maquina():
+    """
+    Identificação da máquina: cada uma tem a sua base de tempo
+    """
+    return {
+        'host': platform.node(),
+        'sistema': f"{platform.system()} {platform.machine()}",
+        'processador': platform.processor(),
+        'nucleos': os.cpu_count(),
+    }
+
+def rodar_analisadores(caminho_pasta, analisadores, repeticoes=1):
+    """
+    Roda cada analisador em todas as imagens; devolve ({analisador: DataFrame}, {analisador: imagens/s})
+
+    As imagens são decodificadas antes (a leitura não entra no tempo) e cada
+    chamada recebe uma cópia, para um analisador não aproveitar a conversão
+    de cor em cache de outro. A vazão é a da melhor repetição.
+    """
+    imagens = [(a.name, carregar_imagem(a)) for a in sorted(Path(caminho_pasta).glob("*.TIF"))]
+    if not imagens:
+        raise ValueError(f"Nenhuma imagem em {caminho_pasta}")
+
+    tabelas, vazoes = {}, {}
+    for nome, (funcao, _) in selecionar_analisadores(analisadores).items():
+        melhor = None
+        for repeticao in range(repeticoes):
+            linhas, decorrido = [], 0.0
+            for nome_imagem, img in imagens:
+                copia = img.copy()
+                inicio = time.perf_counter()
+                linha = funcao(copia, nome_imagem)
+                decorrido += time.perf_counter() - inicio
+                if linha is not None:
+                    linhas.append(linha)
+            melhor = decorrido if melhor is None else min(melhor, decorrido)
+            if repeticao == 0:
+                tabelas[nome] = _como_texto(pd.DataFrame(linhas)).sort_values('nome').reset_index(drop=True)
+        vazoes[nome] = len(imagens) / melhor
+        print(f"⏱️  {nome}: {vazoes[nome]:.2f} imagens/s")
+
+    return tabelas, vazoes
+
+def ler_bases_tempo(pasta_referencia=PASTA_REFERENCIA):
+    """
+    Bases de tempo gravadas, uma por host: {host: {maquina, data, repeticoes, vazao}}
+
+    O arquivo é de cada máquina e fica fora do git (.gitignore).
+    """
+    arquivo_tempo = Path(pasta_referencia) / 'base_tempo.json'
+    if not arquivo_tempo.exists():
+        return {}
+    return json.loads(arquivo_tempo.read_text(encoding='utf-8'))
+
+def gravar_referencia(tabelas, vazoes, pasta_referencia=PASTA_REFERENCIA, repeticoes=1, so_tempo=False):
+    """
+    Grava as saídas de referência (<analisador>.csv) e/ou a base de tempo desta máquina (base_tempo.json)
+
+    As bases das outras máquinas ficam como estão.
+    """
+    pasta = Path(pasta_referencia)
+    pasta.mkdir(parents=True, exist_ok=True)
+    if not so_tempo:
+        for nome, df in tabelas.items():
+            df.to_csv(pasta / f"{nome}.csv", index=False)
+
+    bases = ler_bases_tempo(pasta)
+    atual = maquina()
+    base = bases.get(atual['host'], {})
+    if base.get('maquina') != atual:
+        base = {}
+    bases[atual['host']] = {
+        'maquina': atual,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'repeticoes': repeticoes,
+        'vazao': {**base.get('vazao', {}), **{nome: round(v, 3) for nome, v in vazoes.items()}},
+    }
+    (pasta / 'base_tempo.json').write_text(json.dumps(bases, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"💾 Referência gravada em {pasta}")
+
+def verificar(tabelas, vazoes, pasta_referencia=PASTA_REFERENCIA, tolerancia_vazao=0.8):
+    """
+    Compara saídas e vazão com a referência; devolve a lista de falhas
+    """
+    pasta = Path(pasta_referencia)
+    falhas = []
+
+    for nome, atual in tabelas.items():
+        arquivo = pasta / f"{nome}.csv"
+        if not arquivo.exists():
+            falhas.append(f"[{nome}] sem referência ({arquivo}); rode com --gravar")
+            continue
+        referencia = pd.read_csv(arquivo, dtype=str, keep_default_na=False)
+        erros = comparar_tabela(nome, referencia, atual)
+        print(f"{'✅' if not erros else '❌'} {nome}: {len(erros)} diferença(s) acima da tolerância")
+        falhas.extend(f"[{nome}] {erro}" for erro in erros)
+
+    if vazoes:
+        atual = maquina()
+        base = ler_bases_tempo(pasta).get(atual['host'])
+        if base is None:
+            falhas.append(f"sem base de tempo para {atual['host']}; rode com --gravar-tempo nesta máquina "
+                          f"(ou --sem-tempo)")
+        elif base['maquina'] != atual:
+            falhas.append(f"base de tempo de {atual['host']} gravada com outra configuração ({base['maquina']}); "
+                          f"rode com --gravar-tempo")
+        else:
+            for nome, vazao in vazoes.items():
+                if nome not in base['vazao']:
+                    falhas.append(f"[{nome}] sem vazão na base de {atual['host']}; rode com --gravar-tempo")
+                    continue
+                minimo = base['vazao'][nome] * tolerancia_vazao
+                ok = vazao >= minimo
+                print(f"{'✅' if ok else '❌'} {nome}: {vazao:.2f} imagens/s (base {base['vazao'][nome]:.2f}, "
+                      f"mínimo {minimo:.2f})")
+                if not ok:
+                    falhas.append(f"[{nome}] vazão {vazao:.2f} imagens/s abaixo do mínimo {minimo:.2f}")
+
+    return falhas
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regressão: saídas de referência e vazão dos analisadores")
+    parser.add_argument('caminho', nargs='?', default=PASTA_IMAGENS)
+    parser.add_argument('--analisadores', nargs='+', default=list(ANALISADORES_PADRAO))
+    parser.add_argument('--referencia', default=PASTA_REFERENCIA, help="pasta das saídas de referência")
+    parser.add_argument('--gravar', action='store_true', help="grava saídas e base de tempo atuais como referência")
+    parser.add_argument('--gravar-tempo', action='store_true', help="grava só a base de tempo (desta máquina)")
+    parser.add_argument('--sem-tempo', action='store_true', help="compara só as saídas")
+    parser.add_argument('--repeticoes', type=int, default=3, help="repetições para medir a vazão (vale a melhor)")
+    parser.add_argument('--tolerancia-vazao', type=float, default=0.8,
+                        help="falha se a vazão cair abaixo desta fração da base")
+    args = parser.parse_args()
+
+    print(f"🔁 Regressão em {args.caminho}")
+    tabelas, vazoes = rodar_analisadores(args.caminho, args.analisadores, args.repeticoes)
+
+    if args.gravar or args.gravar_tempo:
+        gravar_referencia(tabelas, vazoes, args.referencia, args.repeticoes, so_tempo=args.gravar_tempo)
+        sys.exit(0)
+
+    falhas = verificar(tabelas, {} if args.sem_tempo else vazoes, args.referencia, args.tolerancia_vazao)
+    if falhas:
+        print(f"\n❌ {len(falhas)} falha(s):")
+        for falha in falhas[:50]:
+            print(f"   {falha}")
+        if len(falhas) > 50:
+            print(f"   ... e mais {len(falhas) - 50}")
+        sys.exit(1)
+    print("\n✅ Sem regressões")
@@ -0,0 +1,114 @@
+import cv2
+import numpy as np
+from pathlib import Path
+import pandas as pd
+from upload import carregar_imagem
+from triagem import miniatura
+from conversao_cores import cache_por_array
+
+def estimar_cor_papel(img, largura_miniatura=256):
+    """
+    Cor do suporte (mediana Lab da miniatura) e ruído do papel (mediana e MAD da distância)
+    """
+    mini = miniatura(img, largura_miniatura)
+    lab = cv2.cvtColor(mini, cv2.COLOR_BGR2LAB).astype(np.float32)
+    papel = np.median(lab.reshape(-1, 3), axis=0)
+
+    distancia = np.linalg.norm(lab - papel, axis=2)
+    mediana = np.median(distancia)
+    mad = np.median(np.abs(distancia - mediana)) * 1.4826
+    return papel, mediana, mad
+
+def segmentar_fundo(img, limiar_minimo=15.0, limiar_maximo=30.0, margem=8):
+    """
+    Separa o desenho do papel/papelão de uma imagem BGR
+
+    - cor do suporte estimada por imagem (mediana Lab, como na triagem)
+    - limiar adaptativo: mediana + 3 MAD da distância ao suporte, limitado
+      a [limiar_minimo, limiar_maximo] (papel com textura sobe o limiar)
+    - abertura 3x3 remove poeira; fechamento 5x5 fecha falhas nos traços
+
+    Retorna a máscara de frente (bool), a caixa (x0, y0, x1, y1) com
+    'margem' pixels em volta, a cor do suporte e o limiar usado. Sem
+    frente nenhuma, a caixa é a imagem inteira.
+    """
+    if len(img.shape) == 2:
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+
+    papel, mediana, mad = estimar_cor_papel(img)
+    limiar = float(np.clip(mediana + 3 * mad, limiar_minimo, limiar_maximo))
+
+    lab = cv2.cvtColor(img, cv2.COLOR_BGR2LAB).astype(np.float32)
+    distancia = cv2.magnitude(lab[..., 0] - papel[0], lab[..., 1] - papel[1])
+    distancia = cv2.magnitude(distancia, lab[..., 2] - papel[2])
+
+    mascara = (distancia > limiar).astype(np.uint8)
+    mascara = cv2.morphologyEx(mascara, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+    mascara = cv2.morphologyEx(mascara, cv2.MORPH_CLOSE, np.ones((5, 5), np.uint8))
+
+    altura, largura = mascara.shape
+    x, y, w, h = cv2.boundingRect(mascara)
+    if w == 0 or h == 0:
+        caixa = (0, 0, largura, altura)
+    else:
+        caixa = (max(0, x - margem), max(0, y - margem), min(largura, x + w + margem), min(altura, y + h + margem))
+
+    return {
+        'frente': mascara.astype(bool),
+        'caixa': caixa,
+        'cor_papel': papel,
+        'limiar': limiar,
+    }
+
+def segmentacao_compartilhada(img):
+    """
+    segmentar_fundo calculado uma vez por imagem (cache pelo próprio array)
+
+    Os analisadores recebem o mesmo array da mesma imagem, então a
+    segmentação é reaproveitada entre eles e sai do cache quando o array
+    é descartado.
+    """
+    return cache_por_array(img, 'segmentacao', segmentar_fundo)
+
+def recortar_desenho(img):
+    """
+    Recorte da imagem na caixa do desenho (view, sem cópia)
+    """
+    x0, y0, x1, y1 = segmentacao_compartilhada(img)['caixa']
+    return img[y0:y1, x0:x1]
+
+def analisar_segmentacao(caminho_pasta):
+    """
+    Cor do suporte, limiar, cobertura e caixa do desenho de cada imagem
+    """
+    pasta = Path(caminho_pasta)
+    resultados = []
+
+    for arquivo in sorted(pasta.glob("*.TIF")):
+        try:
+            img = carregar_imagem(arquivo)
+            segmentacao = segmentacao_compartilhada(img)
+            x0, y0, x1, y1 = segmentacao['caixa']
+            area_caixa = (x1 - x0) * (y1 - y0) / (img.shape[0] * img.shape[1]) * 100
+
+            resultados.append({
+                'nome': arquivo.name,
+                'cor_papel_lab': np.round(segmentacao['cor_papel']).astype(int).tolist(),
+                'limiar': round(segmentacao['limiar'], 1),
+                'cobertura_frente': round(np.mean(segmentacao['frente']) * 100, 1),
+                'caixa': [x0, y0, x1, y1],
+                'area_caixa': round(area_caixa, 1),
+            })
+            print(f"✅ {arquivo.name} - frente {resultados[-1]['cobertura_frente']}%, caixa {area_caixa:.0f}% da página")
+
+        except Exception as e:
+            print(f"❌ {arquivo.name}: {e}")
+
+    return pd.DataFrame(resultados)
+
+if __name__ == "__main__":
+    caminho = r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image\CA_processada"
+
+    df_segmentacao = analisar_segmentacao(caminho)
+    df_segmentacao.to_csv('segmentacao_fundo.csv', index=False)
+    print(f"\n💾 Salvo: segmentacao_fundo.csv")
@@ -0,0 +1,265 @@
+import argparse
+import io
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+from upload import carregar_imagem
+from analisadores import selecionar_analisadores
+from conversao_cores import lut_conversao
+from execucao_retomavel import para_json
+
+ANALISADORES_PADRAO = ('hsv', 'densidade', 'tracos', 'clip')
+TAMANHO_MAXIMO_UPLOAD = 256 * 1024 * 1024  # um A3 RGB a 600 dpi sem compressão tem ~210 MB
+
+class ErroEntrada(ValueError):
+    """
+    Pedido inválido (corpo, imagem ou analisador): vira 400; o resto vira 500
+    """
+
+class Metricas:
+    """
+    Latências recentes (janela deslizante) e vazão por rota
+    """
+
+    def __init__(self, janela=1000):
+        self.janela = janela
+        self.trava = threading.Lock()
+        self.latencias = {}
+        self.contagens = {}
+        self.inicio = time.perf_counter()
+        self.lotes_clip = deque(maxlen=janela)
+
+    def registrar(self, rota, segundos):
+        with self.trava:
+            self.latencias.setdefault(rota, deque(maxlen=self.janela)).append(segundos)
+            self.contagens[rota] = self.contagens.get(rota, 0) + 1
+
+    def registrar_lote_clip(self, tamanho):
+        with self.trava:
+            self.lotes_clip.append(tamanho)
+
+    def resumo(self):
+        with self.trava:
+            decorrido = time.perf_counter() - self.inicio
+            rotas = {}
+            for rota, latencias in self.latencias.items():
+                ms = np.array(latencias) * 1000
+                rotas[rota] = {
+                    'requisicoes': self.contagens[rota],
+                    'p50_ms': round(float(np.percentile(ms, 50)), 1),
+                    'p99_ms': round(float(np.percentile(ms, 99)), 1),
+                    'vazao_rps': round(self.contagens[rota] / decorrido, 2),
+                }
+            return {
+                'tempo_no_ar_s': round(decorrido, 1),
+                'rotas': rotas,
+                'lote_clip_medio': round(float(np.mean(self.lotes_clip)), 2) if self.lotes_clip else None,
+            }
+
+class LoteadorClip:
+    """
+    Junta pedidos de CLIP concorrentes em micro-lotes
+
+    Cada pedido é redimensionado/recortado na própria thread (uma imagem
+    ruim falha só o seu pedido). Uma thread espera o primeiro recorte,
+    recolhe os que chegarem em até 'espera_ms' (no máximo
+    'tamanho_maximo') e roda o modelo uma vez para o lote todo; cada
+    pedido recebe seu resultado por um Future.
+    """
+
+    def __init__(self, metricas, tamanho_maximo=16, espera_ms=10):
+        from clip_cores import modelo_clip_compartilhado, parametros_preprocessamento, texto_clip_compartilhado
+
+        self.model, processor, self.device = modelo_clip_compartilhado()
+        self.parametros = parametros_preprocessamento(processor)
+        self.texto = texto_clip_compartilhado()
+        self.metricas = metricas
+        self.tamanho_maximo = tamanho_maximo
+        self.espera = espera_ms / 1000
+        self.fila = queue.Queue()
+        threading.Thread(target=self._executar, daemon=True).start()
+
+    def classificar(self, img, nome):
+        from clip_cores import preparar_imagem_clip
+
+        try:
+            recorte = preparar_imagem_clip(img, self.parametros)
+        except Exception as e:
+            raise ErroEntrada(f"Imagem inválida para o CLIP: {e}") from e
+        futuro = Future()
+        self.fila.put((recorte, nome, futuro))
+        return futuro.result()
+
+    def _executar(self):
+        from clip_cores import (classificar_lote_clip, definir_categorias_cores, montar_linha_clip,
+                                normalizar_lote_clip, ordenar_probabilidades)
+
+        categorias = definir_categorias_cores()
+        while True:
+            pedidos = [self.fila.get()]
+            limite = time.perf_counter() + self.espera
+            while len(pedidos) < self.tamanho_maximo:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    pedidos.append(self.fila.get(timeout=restante))
+                except queue.Empty:
+                    break
+
+            self.metricas.registrar_lote_clip(len(pedidos))
+            try:
+                pixel_values = normalizar_lote_clip([recorte for recorte, _, _ in pedidos], self.parametros, self.device)
+                probabilidades = classificar_lote_clip(pixel_values, self.model, self.texto)
+                for (_, nome, futuro), probs in zip(pedidos, probabilidades):
+                    futuro.set_result(montar_linha_clip(nome, ordenar_probabilidades(probs, categorias)))
+            except Exception as e:
+                for _, _, futuro in pedidos:
+                    futuro.set_exception(e)
+
+class Servico:
+    """
+    Estado quente do serviço: analisadores, LUTs, CLIP (opcional) e métricas
+    """
+
+    def __init__(self, com_clip=True, tamanho_lote_clip=16, espera_ms=10,
+                 tamanho_maximo_upload=TAMANHO_MAXIMO_UPLOAD):
+        self.metricas = Metricas()
+        self.tamanho_maximo_upload = tamanho_maximo_upload
+        self.analisadores = selecionar_analisadores([n for n in ANALISADORES_PADRAO if n != 'clip'] + ['lab'])
+
+        print("🔥 Aquecendo LUTs...")
+        lut_conversao('lab')
+
+        self.clip = None
+        if com_clip:
+            print("🔥 Carregando CLIP...")
+            self.clip = LoteadorClip(self.metricas, tamanho_lote_clip, espera_ms)
+
+    def validar_pedidos(self, pedidos):
+        """
+        ErroEntrada se algum analisador pedido não existe ou está desativado
+        """
+        desconhecidos = [nome for nome in pedidos if nome != 'clip' and nome not in self.analisadores]
+        if desconhecidos:
+            raise ErroEntrada(f"Analisador desconhecido: {', '.join(desconhecidos)}")
+        if 'clip' in pedidos and self.clip is None:
+            raise ErroEntrada("CLIP desativado neste serviço (--sem-clip)")
+
+    def analisar(self, dados, nome, pedidos):
+        """
+        Decodifica o upload e roda os analisadores pedidos
+
+        Os nomes são conferidos antes de decodificar, para um pedido
+        inválido não custar a decodificação nem os analisadores anteriores.
+        """
+        self.validar_pedidos(pedidos)
+        try:
+            img = carregar_imagem(io.BytesIO(dados))
+        except Exception as e:
+            raise ErroEntrada(f"Imagem inválida: {e}") from e
+        resposta = {'nome': nome, 'forma': list(img.shape)}
+
+        for analisador in pedidos:
+            if analisador == 'clip':
+                resposta['clip'] = self.clip.classificar(img, nome)
+            else:
+                resposta[analisador] = self.analisadores[analisador][0](img, nome)
+
+        return resposta
+
+def criar_manipulador(servico):
+    class Manipulador(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _responder(self, status, corpo, fechar=False):
+            dados = json.dumps(corpo, ensure_ascii=False, default=para_json).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(dados)))
+            if fechar:
+                # O corpo não foi lido: a conexão não pode ser reaproveitada
+                self.send_header('Connection', 'close')
+                self.close_connection = True
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_GET(self):
+            rota = urlparse(self.path).path
+            if rota == '/saude':
+                self._responder(200, {'ok': True, 'clip': servico.clip is not None})
+            elif rota == '/metricas':
+                self._responder(200, servico.metricas.resumo())
+            else:
+                self._responder(404, {'erro': f"Rota desconhecida: {rota}"})
+
+        def do_POST(self):
+            inicio = time.perf_counter()
+            url = urlparse(self.path)
+            if url.path != '/analisar':
+                self._responder(404, {'erro': f"Rota desconhecida: {url.path}"})
+                return
+
+            parametros = parse_qs(url.query)
+            nome = parametros.get('nome', ['upload'])[0]
+            padrao = ANALISADORES_PADRAO if servico.clip is not None else ANALISADORES_PADRAO[:-1]
+            pedidos = parametros.get('analisadores', [','.join(padrao)])[0].split(',')
+
+            corpo_lido = False
+            try:
+                try:
+                    tamanho = int(self.headers.get('Content-Length', 0))
+                except ValueError:
+                    raise ErroEntrada("Content-Length inválido") from None
+                if tamanho <= 0:
+                    raise ErroEntrada("Envie a imagem no corpo da requisição")
+                if tamanho > servico.tamanho_maximo_upload:
+                    self._responder(413, {'erro': f"Upload de {tamanho} bytes acima do limite de "
+                                                  f"{servico.tamanho_maximo_upload}"}, fechar=True)
+                    return
+                servico.validar_pedidos(pedidos)
+                dados = self.rfile.read(tamanho)
+                corpo_lido = True
+                resposta = servico.analisar(dados, nome, pedidos)
+                self._responder(200, resposta)
+            except ErroEntrada as e:
+                # Antes de ler o corpo, os bytes dele virariam a "próxima requisição"
+                self._responder(400, {'erro': str(e)}, fechar=not corpo_lido)
+            except Exception as e:
+                self._responder(500, {'erro': f"{type(e).__name__}: {e}"})
+            finally:
+                servico.metricas.registrar(url.path, time.perf_counter() - inicio)
+
+        def log_message(self, formato, *args):
+            # Uma linha por requisição polui o terminal sob carga
+            pass
+
+    return Manipulador
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serviço local de análise de desenhos")
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--sem-clip', action='store_true', help="não carrega torch/CLIP")
+    parser.add_argument('--lote-clip', type=int, default=16, help="tamanho máximo do micro-lote do CLIP")
+    parser.add_argument('--espera-ms', type=float, default=10, help="espera máxima para completar um micro-lote")
+    parser.add_argument('--max-upload-mb', type=float, default=TAMANHO_MAXIMO_UPLOAD / 2 ** 20,
+                        help="tamanho máximo do corpo do POST")
+    args = parser.parse_args()
+
+    servico = Servico(com_clip=not args.sem_clip, tamanho_lote_clip=args.lote_clip, espera_ms=args.espera_ms,
+                      tamanho_maximo_upload=int(args.max_upload_mb * 2 ** 20))
+    servidor = ThreadingHTTPServer((args.host, args.porta), criar_manipulador(servico))
+    print(f"🚀 Servindo em http://{args.host}:{args.porta} (POST /analisar, GET /metricas, GET /saude)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️  Serviço encerrado")
+    finally:
+        servidor.server_close()
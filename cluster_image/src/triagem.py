@@ -0,0 +1,101 @@
+import cv2
+import numpy as np
+from pathlib import Path
+import pandas as pd
+from upload import carregar_imagem
+
+def miniatura(img, largura=128):
+    """
+    Reduz a imagem para a triagem (INTER_AREA preserva as médias de cor)
+    """
+    altura = max(1, round(img.shape[0] * largura / img.shape[1]))
+    return cv2.resize(img, (largura, altura), interpolation=cv2.INTER_AREA)
+
+def triar_imagem(img, largura_miniatura=128, limite_tinta=30.0, limite_branco=1.0):
+    """
+    Triagem barata de verso/página em branco sobre uma miniatura
+
+    - cor do suporte: mediana Lab da miniatura (papel ou papelão)
+    - tinta: pixels a mais de 40 unidades Lab da cor do suporte
+    - traço fraco: entre 10 e 25 unidades (vazamento do desenho do outro lado)
+    - saturação: fração de pixels com S > 60
+
+    Um suporte escuro/colorido (papelão) quase sem tinta é verso; papel
+    claro sem tinta é página em branco; papel claro só com traço fraco é
+    verso com vazamento.
+    """
+    if len(img.shape) == 2:
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+
+    mini = miniatura(img, largura_miniatura)
+
+    lab = cv2.cvtColor(mini, cv2.COLOR_BGR2LAB).astype(np.float32)
+    papel = np.median(lab.reshape(-1, 3), axis=0)
+    distancia = np.linalg.norm(lab - papel, axis=2)
+
+    s = cv2.cvtColor(mini, cv2.COLOR_BGR2HSV)[:, :, 1]
+
+    # Mesma definição de branco de verifica_formato (>240 em todos os canais)
+    percentual_branco = np.mean((mini > 240).all(axis=2)) * 100
+    cobertura_tinta = np.mean(distancia > 40) * 100
+    traco_fraco = np.mean((distancia > 10) & (distancia <= 25)) * 100
+    percentual_saturado = np.mean(s > 60) * 100
+
+    luminosidade_papel = papel[0]
+    croma_papel = np.hypot(papel[1] - 128, papel[2] - 128)
+    papel_claro = luminosidade_papel > 200 and croma_papel < 15
+
+    if not papel_claro and cobertura_tinta <= limite_tinta:
+        motivo = "Verso (suporte escuro/colorido)"
+    elif papel_claro and cobertura_tinta < limite_branco and traco_fraco >= 5:
+        motivo = "Verso com vazamento"
+    elif papel_claro and cobertura_tinta < limite_branco:
+        motivo = "Página em branco"
+    else:
+        motivo = ""
+
+    return {
+        'provavel_verso': bool(motivo),
+        'motivo': motivo,
+        'percentual_branco': round(percentual_branco, 1),
+        'cobertura_tinta': round(cobertura_tinta, 1),
+        'traco_fraco': round(traco_fraco, 1),
+        'percentual_saturado': round(percentual_saturado, 1),
+        'luminosidade_papel': round(float(luminosidade_papel), 1),
+        'croma_papel': round(float(croma_papel), 1),
+    }
+
+def triar_pasta(caminho_pasta, recursivo=False):
+    """
+    Aplica a triagem a todas as imagens da pasta
+    """
+    pasta = Path(caminho_pasta)
+    arquivos = pasta.rglob("*.TIF") if recursivo else pasta.glob("*.TIF")
+    resultados = []
+
+    print("TRIAGEM DE VERSOS / PÁGINAS EM BRANCO")
+
+    for arquivo in sorted(arquivos):
+        try:
+            img = carregar_imagem(arquivo)
+            resultado = {'nome': arquivo.name}
+            resultado.update(triar_imagem(img))
+            resultados.append(resultado)
+
+            if resultado['provavel_verso']:
+                print(f"⚠️  {arquivo.name}: {resultado['motivo']}")
+
+        except Exception as e:
+            print(f"❌ {arquivo.name}: {e}")
+
+    return pd.DataFrame(resultados)
+
+if __name__ == "__main__":
+    caminho = r"C:\Users\jorge\Desktop\Projetos\Lia²\lia-cores-alegria\cluster_image\CA_processada"
+
+    # Triagem (inclui subpastas, como CA_deletados)
+    df_triagem = triar_pasta(caminho, recursivo=True)
+
+    # Salvar
+    df_triagem.to_csv('triagem.csv', index=False)
+    print(f"\n💾 Salvo: triagem.csv")
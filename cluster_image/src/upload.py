@@ -3,6 +3,18 @@ import numpy as np
 from PIL import Image
 from pathlib import Path
 
+def carregar_imagem(arquivo):
+    """
+    Carrega uma imagem com PIL e devolve array BGR (padrão OpenCV)
+    """
+    pil_img = Image.open(arquivo)
+    img_array = np.array(pil_img)
+    
+    # Converter RGB para BGR se necessário
+    if len(img_array.shape) == 3 and pil_img.mode == 'RGB':
+        return cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
+    return img_array
+
 def carregar_imagens(caminho_pasta):
     """
     Carrega imagens de forma simples - OpenCV + PIL backup
@@ -16,14 +28,7 @@ def carregar_imagens(caminho_pasta):
     for arquivo in pasta.glob("*.TIF"):  # Apenas TIF por enquanto
         # Tentar PIL (melhor para TIF)
         try:
-            pil_img = Image.open(arquivo)
-            img_array = np.array(pil_img)
-            
-            # Converter RGB para BGR se necessário
-            if len(img_array.shape) == 3 and pil_img.mode == 'RGB':
-                img = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-            else:
-                img = img_array
+            img = carregar_imagem(arquivo)
             
             imagens.append(img)
             nomes.append(arquivo.name)
@@ -1,59 +1,90 @@
-import cv2
 import numpy as np
 from PIL import Image
 from pathlib import Path
 import pandas as pd
+from upload import carregar_imagem
+from conversao_cores import codigos_24bits
 
-def criar_dataset_imagens(caminho_pasta):
+# Colunas do dataset_imagens.csv (formato usado pelas análises existentes)
+COLUNAS_DATASET = ['nome', 'largura', 'altura', 'canais', 'cores_unicas', 'percentual_branco', 'tamanho_mb', 'caminho']
+
+def ler_cabecalho(arquivo):
     """
-    Cria dataset simples com informações das imagens
+    Lê só o cabeçalho do TIF (Image.open é preguiçoso: sem load() não decodifica pixels)
+    """
+    with Image.open(arquivo) as pil_img:
+        largura, altura = pil_img.size
+        dpi = pil_img.info.get('dpi', (None, None))
+        return {
+            'largura': largura,
+            'altura': altura,
+            'canais': len(pil_img.getbands()),
+            'modo': pil_img.mode,
+            'compressao': pil_img.info.get('compression'),
+            'dpi_x': dpi[0],
+            'dpi_y': dpi[1],
+        }
+
+def estatisticas_pixels(img):
+    """
+    Colunas que exigem decodificar a imagem: cores únicas e % de branco
+    """
+    altura, largura = img.shape[:2]
+    
+    # Contagem de cores únicas
+    if len(img.shape) == 3 and img.shape[2] == 3:
+        # Código de 24 bits por pixel: np.unique 1D em vez de linhas (axis=0)
+        cores_unicas = len(np.unique(codigos_24bits(img)))
+        # Pixels brancos (>240 em todos os canais)
+        pixels_brancos = np.sum((img[:,:,0] > 240) & (img[:,:,1] > 240) & (img[:,:,2] > 240))
+    elif len(img.shape) == 3:
+        cores_unicas = len(np.unique(img.reshape(-1, img.shape[2]), axis=0))
+        pixels_brancos = np.sum(np.all(img > 240, axis=2))
+    else:
+        cores_unicas = len(np.unique(img))
+        pixels_brancos = np.sum(img > 240)
+    
+    percentual_branco = (pixels_brancos / (largura * altura)) * 100
+    
+    return {
+        'cores_unicas': cores_unicas,
+        'percentual_branco': round(percentual_branco, 1),
+    }
+
+def inventario_imagens(caminho_pasta, calcular_pixels=False):
+    """
+    Inventário rápido: dimensões, modo, compressão, DPI e tamanho pelo cabeçalho
+
+    Só decodifica as imagens quando calcular_pixels=True (cores_unicas e
+    percentual_branco).
     """
     pasta = Path(caminho_pasta)
     dados = []
     
     for arquivo in pasta.glob("*.TIF"):
         try:
-            # Carregar
-            pil_img = Image.open(arquivo)
-            img_array = np.array(pil_img)
-            
-            if len(img_array.shape) == 3 and pil_img.mode == 'RGB':
-                img = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-            else:
-                img = img_array
-            
-            # Dados básicos
-            altura, largura = img.shape[:2]
-            canais = img.shape[2] if len(img.shape) == 3 else 1
-            
-            # Contagem de cores únicas
-            if canais == 3:
-                cores_unicas = len(np.unique(img.reshape(-1, 3), axis=0))
-                # Pixels brancos (>240 em todos os canais)
-                pixels_brancos = np.sum((img[:,:,0] > 240) & (img[:,:,1] > 240) & (img[:,:,2] > 240))
-            else:
-                cores_unicas = len(np.unique(img))
-                pixels_brancos = np.sum(img > 240)
+            linha = {'nome': arquivo.name}
+            linha.update(ler_cabecalho(arquivo))
+            linha['tamanho_mb'] = round(arquivo.stat().st_size / (1024*1024), 2)
+            linha['caminho'] = str(arquivo)
             
-            percentual_branco = (pixels_brancos / (largura * altura)) * 100
+            if calcular_pixels:
+                linha.update(estatisticas_pixels(carregar_imagem(arquivo)))
             
-            # Adicionar ao dataset
-            dados.append({
-                'nome': arquivo.name,
-                'largura': largura,
-                'altura': altura,
-                'canais': canais,
-                'cores_unicas': cores_unicas,
-                'percentual_branco': round(percentual_branco, 1),
-                'tamanho_mb': round(arquivo.stat().st_size / (1024*1024), 2),
-                'caminho': str(arquivo)
-            })
+            dados.append(linha)
             
         except Exception as e:
             print(f"❌ Erro com {arquivo.name}: {e}")
     
-    # Converter para DataFrame
-    df = pd.DataFrame(dados)
+    return pd.DataFrame(dados)
+
+def criar_dataset_imagens(caminho_pasta):
+    """
+    Cria dataset simples com informações das imagens
+    """
+    df = inventario_imagens(caminho_pasta, calcular_pixels=True)
+    if not df.empty:
+        df = df[COLUNAS_DATASET]
     print(f"✅ Dataset criado: {len(df)} imagens")
     
     return df
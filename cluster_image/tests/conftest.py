@@ -0,0 +1,15 @@
+from pathlib import Path
+import pytest
+from upload import carregar_imagem
+
+PASTA_IMAGENS = Path(__file__).resolve().parent.parent / 'CA_processada'
+
+@pytest.fixture(scope='session')
+def imagens_exemplo():
+    """
+    Três scans de CA_processada, já decodificados (BGR)
+    """
+    arquivos = sorted(PASTA_IMAGENS.glob("*.TIF"))[:3]
+    if not arquivos:
+        pytest.skip(f"sem imagens em {PASTA_IMAGENS}")
+    return [(arquivo.name, carregar_imagem(arquivo)) for arquivo in arquivos]
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from acumuladores import ContagemCategorias, DigestQuantis, ResumoStreaming, Welford
+
+def test_welford_combinado_igual_ao_total():
+    valores = np.random.default_rng(0).normal(10, 3, 5000)
+    partes = [Welford() for _ in range(3)]
+    for parte, pedaco in zip(partes, np.array_split(valores, 3)):
+        for valor in pedaco[:10]:
+            parte.atualizar(valor)
+        parte.atualizar(pedaco[10:])
+
+    total = partes[0].combinar(partes[1]).combinar(partes[2])
+    assert total.n == len(valores)
+    assert total.media == pytest.approx(valores.mean())
+    assert total.variancia == pytest.approx(valores.var())
+    assert (total.minimo, total.maximo) == (valores.min(), valores.max())
+
+def test_digest_combinado_perto_dos_quantis():
+    valores = np.random.default_rng(1).exponential(5, 20000)
+    a, b = DigestQuantis(), DigestQuantis()
+    a.atualizar(valores[:7000])
+    b.atualizar(valores[7000:])
+    digest = DigestQuantis.de_dict(a.combinar(b).para_dict())
+    for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+        assert digest.quantil(q) == pytest.approx(np.quantile(valores, q), rel=0.03)
+
+def test_resumo_streaming_combinado(tmp_path):
+    linhas = [{'nome': f'{i}.TIF', 'valor': float(i), 'classe': 'par' if i % 2 == 0 else 'impar'}
+              for i in range(100)]
+    parciais = [ResumoStreaming(), ResumoStreaming()]
+    for i, linha in enumerate(linhas):
+        parciais[i % 2].atualizar(linha)
+    for i, parcial in enumerate(parciais):
+        parcial.salvar(tmp_path / f'{i}.json')
+
+    total = ResumoStreaming.carregar(tmp_path / '0.json').combinar(ResumoStreaming.carregar(tmp_path / '1.json'))
+    numerica = total.tabela_numerica().set_index('coluna').loc['valor']
+    assert numerica['n'] == 100
+    assert numerica['media'] == pytest.approx(49.5)
+    assert total.categoricas['classe'].contagens() == {'impar': 50, 'par': 50}
+
+def test_contagem_categorias_limitada():
+    contagem = ContagemCategorias(limite=10)
+    for i in range(50):
+        contagem.atualizar(f'valor_{i}')
+    assert contagem.excedeu and not contagem.valores and contagem.total == 50
+
+def test_combinar_nao_altera_as_entradas():
+    s1, s2 = ResumoStreaming(), ResumoStreaming()
+    s1.atualizar({'nome': 'a.TIF', 'valor': 1.0, 'classe': 'x'})
+    s2.atualizar({'nome': 'b.TIF', 'valor': 3.0, 'classe': 'y'})
+    buffer_s2 = [b.copy() for b in s2.numericas['valor'][1].buffer]
+
+    total = ResumoStreaming()
+    total.combinar(s1).combinar(s2)
+    assert total.numericas['valor'][0].n == 2
+    assert total.categoricas['classe'].contagens() == {'x': 1, 'y': 1}
+    assert s1.numericas['valor'][0].n == 1
+    assert s1.numericas['valor'][1].quantil(0.5) == 1.0
+    assert s1.categoricas['classe'].contagens() == {'x': 1}
+    # O digest do outro continua com o buffer sem comprimir
+    assert [b.tolist() for b in s2.numericas['valor'][1].buffer] == [b.tolist() for b in buffer_s2]
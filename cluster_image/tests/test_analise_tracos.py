@@ -0,0 +1,33 @@
+import cv2
+import numpy as np
+import pytest
+from analise_tracos import MARGEM_MINIMA, analisar_tracos_desenho_corrigido, analisar_tracos_em_blocos
+
+def _comparar(inteira, blocos):
+    assert inteira.keys() == blocos.keys()
+    for chave, esperado in inteira.items():
+        if isinstance(esperado, str):
+            assert blocos[chave] == esperado, chave
+        else:
+            # Médias em float32 somam em outra ordem nos blocos
+            assert blocos[chave] == pytest.approx(esperado, rel=1e-3, abs=0.02), chave
+
+@pytest.mark.parametrize('tamanho_bloco, margem', [(256, 64), (300, 8), (200, MARGEM_MINIMA)])
+def test_blocos_iguais_a_imagem_inteira(imagens_exemplo, tamanho_bloco, margem):
+    for _, img in imagens_exemplo:
+        _comparar(analisar_tracos_desenho_corrigido(img),
+                  analisar_tracos_em_blocos(img, tamanho_bloco, margem))
+
+def test_traco_mais_grosso_que_a_margem():
+    # Faixa de 200 px: o distance transform precisa de um halo bem maior que a margem
+    img = np.full((600, 900, 3), 255, dtype=np.uint8)
+    cv2.rectangle(img, (100, 200), (800, 400), (40, 60, 200), thickness=-1)
+    cv2.line(img, (50, 50), (850, 550), (20, 20, 20), thickness=3)
+
+    inteira = analisar_tracos_desenho_corrigido(img)
+    _comparar(inteira, analisar_tracos_em_blocos(img, 128, 16))
+
+def test_margem_menor_que_os_filtros_recusada():
+    img = np.full((64, 64, 3), 255, dtype=np.uint8)
+    with pytest.raises(ValueError):
+        analisar_tracos_em_blocos(img, 32, 0)
@@ -0,0 +1,38 @@
+import queue
+import numpy as np
+import pytest
+from PIL import Image
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('transformers')
+from clip_cores import _produzir_lotes, preparar_imagem_clip
+
+PARAMETROS = {
+    'lado_menor': 32,
+    'recorte': (32, 32),
+    'media': torch.tensor([0.48, 0.46, 0.41]).view(1, 3, 1, 1),
+    'desvio': torch.tensor([0.27, 0.26, 0.28]).view(1, 3, 1, 1),
+}
+
+def test_preparar_aceita_bgra_e_cinza():
+    for img in (np.zeros((40, 60, 4), np.uint8), np.zeros((40, 60), np.uint8)):
+        assert preparar_imagem_clip(img, PARAMETROS).shape == (32, 32, 3)
+
+def test_imagem_ruim_nao_derruba_o_lote(tmp_path):
+    rng = np.random.default_rng(0)
+    for nome in ('a', 'c', 'e'):
+        Image.fromarray(rng.integers(0, 255, (40, 50, 3), dtype=np.uint8)).save(tmp_path / f'{nome}.TIF')
+    Image.fromarray(rng.integers(0, 255, (40, 50, 4), dtype=np.uint8), 'RGBA').save(tmp_path / 'b.TIF')
+    (tmp_path / 'd.TIF').write_bytes(b'nao e uma imagem')
+    Image.fromarray(rng.integers(0, 60000, (40, 50), dtype=np.uint16)).save(tmp_path / 'f.TIF')
+
+    fila, falhas = queue.Queue(), []
+    _produzir_lotes(sorted(tmp_path.glob('*.TIF')), PARAMETROS, 'cpu', 2, fila, falhas)
+
+    nomes = []
+    while (item := fila.get()) is not None:
+        lote_nomes, pixel_values = item
+        assert pixel_values.shape == (len(lote_nomes), 3, 32, 32)
+        nomes.extend(lote_nomes)
+    assert nomes == ['a.TIF', 'b.TIF', 'c.TIF', 'e.TIF']
+    assert [falha['nome'] for falha in falhas] == ['d.TIF', 'f.TIF']
@@ -0,0 +1,28 @@
+import cv2
+import numpy as np
+import pytest
+from analise_hsv import extrair_cores_hsv
+from cores_dominantes import reduzir_paleta
+
+def _distancia_matiz(a, b):
+    diferenca = abs(a - b) % 180
+    return min(diferenca, 180 - diferenca)
+
+def test_fusao_de_vermelhos_dos_dois_lados_do_zero():
+    paleta = reduzir_paleta([[2, 200, 200], [177, 200, 200], [60, 200, 200]], [100] * 3, 'hsv')
+    assert len(paleta) == 2
+    vermelho = min(paleta, key=lambda cor: _distancia_matiz(cor[0], 0))
+    assert _distancia_matiz(vermelho[0], 179.5) < 0.01
+    assert vermelho[1:] == pytest.approx([200, 200])
+
+def test_auto_em_hsv_mantem_o_vermelho():
+    # 75% vermelho (metade em H=0, metade em H=177) e 25% verde
+    hsv = np.zeros((100, 120, 3), dtype=np.uint8)
+    hsv[..., 1:] = 200
+    hsv[:, 45:90, 0] = 177
+    hsv[:, 90:, 0] = 60
+    cores, percentuais = extrair_cores_hsv(cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR), n_cores='auto')
+
+    assert len(cores) == 2
+    assert _distancia_matiz(cores[0][0], 178.5) < 1.5 and percentuais[0] == pytest.approx(75)
+    assert _distancia_matiz(cores[1][0], 60) < 1 and percentuais[1] == pytest.approx(25)
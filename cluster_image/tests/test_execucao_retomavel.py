@@ -0,0 +1,34 @@
+import csv
+from execucao_retomavel import COLUNAS_FALHAS, Diario, limpar_falhas_resolvidas, registrar_falha
+
+def test_retomar_apos_linha_truncada(tmp_path):
+    arquivo = tmp_path / 'diario.jsonl'
+    diario = Diario(arquivo)
+    diario.gravar({'nome': 'a.TIF', 'valor': 1})
+    diario.fechar()
+    # Queda no meio da escrita do segundo registro
+    with open(arquivo, 'a', encoding='utf-8') as f:
+        f.write('{"nome": "b.TIF", "va')
+
+    diario = Diario(arquivo, retomar=True)
+    assert diario.concluidos == {'a.TIF'}
+    diario.gravar({'nome': 'b.TIF', 'valor': 2})
+    diario.gravar({'nome': 'c.TIF', 'valor': 3})
+    diario.fechar()
+
+    assert [linha['nome'] for linha in Diario(arquivo, retomar=True).linhas()] == ['a.TIF', 'b.TIF', 'c.TIF']
+
+def test_falha_resolvida_sai_da_tabela(tmp_path):
+    arquivo_falhas = tmp_path / 'falhas.csv'
+    registrar_falha(arquivo_falhas, 'a.TIF', 'hsv', ValueError("imagem ruim"))
+    registrar_falha(arquivo_falhas, 'b.TIF', 'hsv', ValueError("imagem ruim"))
+
+    diario = Diario(tmp_path / 'hsv.jsonl')
+    diario.gravar({'nome': 'a.TIF'})
+    diario.fechar()
+    limpar_falhas_resolvidas(arquivo_falhas, {'hsv': diario})
+
+    with open(arquivo_falhas, newline='', encoding='utf-8') as f:
+        leitor = csv.DictReader(f)
+        assert leitor.fieldnames == COLUNAS_FALHAS
+        assert [falha['nome'] for falha in leitor] == ['b.TIF']
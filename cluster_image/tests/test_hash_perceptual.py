@@ -0,0 +1,30 @@
+import numpy as np
+from hash_perceptual import ArvoreBK, calcular_hashes, distancia_hamming
+
+def test_busca_igual_a_forca_bruta():
+    rng = np.random.default_rng(0)
+    base = int(rng.integers(0, 2 ** 63))
+    # Grupos de hashes próximos (poucos bits trocados) mais hashes aleatórios
+    valores = [base ^ int(sum(1 << int(b) for b in rng.choice(64, k, replace=False))) for k in range(12)]
+    valores += [int(v) for v in rng.integers(0, 2 ** 63, 300)]
+
+    arvore = ArvoreBK()
+    for i, valor in enumerate(valores):
+        arvore.inserir(valor, i)
+    assert arvore.tamanho == len(valores)
+
+    for consulta in valores[:20]:
+        for raio in (0, 3, 6, 10):
+            esperado = sorted((distancia_hamming(consulta, v), i) for i, v in enumerate(valores)
+                              if distancia_hamming(consulta, v) <= raio)
+            assert sorted(arvore.buscar(consulta, raio)) == esperado
+
+def test_quase_duplicata_encontrada(imagens_exemplo):
+    arvore = ArvoreBK()
+    for nome, img in imagens_exemplo:
+        arvore.inserir(calcular_hashes(img)['phash'], nome)
+
+    nome, img = imagens_exemplo[0]
+    ruidosa = np.clip(img.astype(np.int16) + np.random.default_rng(1).integers(-6, 7, img.shape), 0, 255)
+    vizinhos = arvore.buscar(calcular_hashes(ruidosa.astype(np.uint8))['phash'], 6)
+    assert vizinhos and vizinhos[0][1] == nome
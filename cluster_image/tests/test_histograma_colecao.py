@@ -0,0 +1,18 @@
+import numpy as np
+from histograma_colecao import HistogramaHSV
+
+def test_histograma_hsv_combinado_igual_ao_total(imagens_exemplo, tmp_path):
+    total = HistogramaHSV(['todas'])
+    partes = [HistogramaHSV([nome]) for nome, _ in imagens_exemplo]
+    for parte, (_, img) in zip(partes, imagens_exemplo):
+        total.atualizar(img)
+        parte.atualizar(img)
+        parte.salvar(tmp_path / 'parte.npz')
+        parte.contagens = HistogramaHSV.carregar(tmp_path / 'parte.npz').contagens
+
+    combinado = HistogramaHSV()
+    for parte in partes:
+        combinado.combinar(parte)
+    assert combinado.n_imagens == total.n_imagens
+    np.testing.assert_array_equal(combinado.contagens, total.contagens)
+    assert combinado.fontes == [nome for nome, _ in imagens_exemplo]
@@ -0,0 +1,24 @@
+import numpy as np
+from cores_dominantes import MAX_ITER_AQUECIDO, TOL_AQUECIDO, ajustar_kmeans
+from kmeans_aquecido import _delta_pct, ajustar_kmeans_reinicios
+
+def _pixels():
+    rng = np.random.default_rng(0)
+    centros = np.array([[30, 30, 200], [200, 40, 40], [40, 180, 60]])
+    return np.concatenate([c + rng.normal(0, 12, (2000, 3)) for c in centros])
+
+def test_aquecido_com_parada_antecipada():
+    pixels = _pixels()
+    base = ajustar_kmeans(pixels, 3)
+    aquecido = ajustar_kmeans(pixels, 3, base.cluster_centers_ + 5)
+    assert (aquecido.tol, aquecido.max_iter, aquecido.n_init) == (TOL_AQUECIDO, MAX_ITER_AQUECIDO, 1)
+    assert aquecido.inertia_ <= base.inertia_ * 1.001
+
+def test_iteracoes_somadas_nos_reinicios():
+    melhor, iteracoes = ajustar_kmeans_reinicios(_pixels(), 3, n_reinicios=4)
+    assert iteracoes >= 4 and iteracoes >= melhor.n_iter_
+
+def test_delta_com_inercia_zero():
+    assert _delta_pct(0.0, 0.0) == 0.0
+    assert _delta_pct(1.0, 0.0) == float('inf')
+    assert _delta_pct(110.0, 100.0) == 10.0
@@ -0,0 +1,15 @@
+import pandas as pd
+from conftest import PASTA_IMAGENS
+from densidade_saturacao import analisar_imagem_densidade
+from histograma_cores import analisar_imagem_histograma
+from lote_imagens import analisar_lotes
+
+def test_lotes_iguais_ao_caminho_por_imagem(imagens_exemplo, tmp_path):
+    for nome, img in imagens_exemplo:
+        (tmp_path / nome).symlink_to(PASTA_IMAGENS / nome)
+
+    df_hist, df_densidade = analisar_lotes(tmp_path, tamanho_lote=2)
+    esperado_hist = pd.DataFrame([analisar_imagem_histograma(img.copy(), nome) for nome, img in imagens_exemplo])
+    esperado_densidade = pd.DataFrame([analisar_imagem_densidade(img.copy(), nome) for nome, img in imagens_exemplo])
+    pd.testing.assert_frame_equal(df_hist, esperado_hist)
+    pd.testing.assert_frame_equal(df_densidade, esperado_densidade)
@@ -0,0 +1,29 @@
+import shutil
+import pandas as pd
+import pytest
+import analisadores
+from conftest import PASTA_IMAGENS
+from monitorar_pasta import processar_novos
+
+def test_analisador_que_falha_nao_duplica_linhas(tmp_path, monkeypatch):
+    arquivos = sorted(PASTA_IMAGENS.glob("*.TIF"))[:2]
+    if not arquivos:
+        pytest.skip(f"sem imagens em {PASTA_IMAGENS}")
+    pasta = tmp_path / 'CA_processada'
+    pasta.mkdir()
+    for arquivo in arquivos:
+        shutil.copy(arquivo, pasta)
+
+    def falha(img, nome):
+        raise RuntimeError("analisador quebrado")
+
+    monkeypatch.setitem(analisadores.ANALISADORES, 'falha', (falha, 'falha.csv'))
+    for _ in range(2):
+        processar_novos(pasta, tmp_path, ['histograma', 'falha'], pular_versos=False)
+    assert not (tmp_path / 'histograma_cores.csv').exists()
+
+    monkeypatch.setitem(analisadores.ANALISADORES, 'falha', (lambda img, nome: {'nome': nome}, 'falha.csv'))
+    processar_novos(pasta, tmp_path, ['histograma', 'falha'], pular_versos=False)
+    processar_novos(pasta, tmp_path, ['histograma', 'falha'], pular_versos=False)
+    for arquivo_csv in ('histograma_cores.csv', 'falha.csv'):
+        assert sorted(pd.read_csv(tmp_path / arquivo_csv)['nome']) == [arquivo.name for arquivo in arquivos]
@@ -0,0 +1,37 @@
+import multiprocessing as mp
+import os
+import numpy as np
+import pytest
+from PIL import Image
+import analisadores
+from processamento_paralelo import processar_paralelo
+
+# Os analisadores trocados com monkeypatch só chegam aos workers por fork
+pytestmark = pytest.mark.skipif(mp.get_start_method() != 'fork', reason="precisa de processos por fork")
+
+def _gravar_tifs(pasta, n, dtype=np.uint16, maximo=60000):
+    rng = np.random.default_rng(0)
+    for i in range(n):
+        Image.fromarray(rng.integers(0, maximo, (40, 50), dtype=dtype)).save(pasta / f'{i}.TIF')
+
+def test_tif_de_16_bits_chega_inteiro(tmp_path, monkeypatch):
+    _gravar_tifs(tmp_path, 3)
+
+    def descrever(img, nome):
+        return {'nome': nome, 'classificacao': img.dtype.name, 'valor_medio': float(img.max())}
+
+    monkeypatch.setitem(analisadores.ANALISADORES, 'densidade', (descrever, 'densidade.csv'))
+    df = processar_paralelo(tmp_path, ['densidade'], n_workers=2, n_slots=2)['densidade']
+    assert list(df['classificacao']) == ['uint16'] * 3
+    esperado = [float(np.array(Image.open(tmp_path / f'{i}.TIF')).max()) for i in range(3)]
+    assert list(df['valor_medio']) == esperado
+
+def test_worker_que_morre_falha_logo(tmp_path, monkeypatch):
+    _gravar_tifs(tmp_path, 6, np.uint8, 255)
+
+    def morrer(img, nome):
+        os._exit(3)
+
+    monkeypatch.setitem(analisadores.ANALISADORES, 'densidade', (morrer, 'densidade.csv'))
+    with pytest.raises(RuntimeError, match='código 3'):
+        processar_paralelo(tmp_path, ['densidade'], n_workers=2, n_slots=2)
@@ -0,0 +1,45 @@
+import os
+import pytest
+import regressao
+
+@pytest.fixture(scope='module')
+def execucao():
+    if not any(regressao.PASTA_IMAGENS.glob("*.TIF")):
+        pytest.skip(f"sem imagens em {regressao.PASTA_IMAGENS}")
+    return regressao.rodar_analisadores(regressao.PASTA_IMAGENS, regressao.ANALISADORES_PADRAO)
+
+def test_saidas_iguais_a_referencia(execucao):
+    tabelas, _ = execucao
+    assert regressao.verificar(tabelas, {}) == []
+
+@pytest.mark.skipif(not os.environ.get('REGRESSAO_VAZAO'),
+                    reason="vazão depende da máquina; defina REGRESSAO_VAZAO=1 para comparar")
+def test_vazao_contra_a_base_desta_maquina(execucao):
+    # Uma só repetição aqui, então a margem é maior que a da linha de comando
+    _, vazoes = execucao
+    if regressao.maquina()['host'] not in regressao.ler_bases_tempo():
+        pytest.skip("sem base de tempo desta máquina; rode regressao.py --gravar-tempo")
+    assert regressao.verificar({}, vazoes, tolerancia_vazao=0.5) == []
+
+def test_comparar_valor():
+    assert regressao.comparar_valor('1.5', '1.5') == 0.0
+    assert regressao.comparar_valor('[245, 204, 110]', '[246, 204, 109]') == 1.0
+    assert regressao.comparar_valor('Fraca:<32', 'Forte:<32') is None
+
+def test_base_de_tempo_por_maquina(tmp_path, monkeypatch):
+    vazoes = {'hsv': 10.0, 'lab': 5.0}
+    assert any('sem base de tempo' in falha for falha in regressao.verificar({}, vazoes, tmp_path))
+
+    outra = {**regressao.maquina(), 'host': 'outra'}
+    monkeypatch.setattr(regressao, 'maquina', lambda: outra)
+    regressao.gravar_referencia({}, {'hsv': 1.0}, tmp_path, so_tempo=True)
+    monkeypatch.undo()
+
+    regressao.gravar_referencia({}, vazoes, tmp_path, so_tempo=True)
+    assert set(regressao.ler_bases_tempo(tmp_path)) == {'outra', regressao.maquina()['host']}
+    assert regressao.verificar({}, vazoes, tmp_path) == []
+
+    falhas = regressao.verificar({}, {'hsv': 7.0, 'lab': 5.0, 'cores': 1.0}, tmp_path)
+    assert len(falhas) == 2
+    assert 'hsv' in falhas[0] and 'abaixo do mínimo' in falhas[0]
+    assert 'cores' in falhas[1] and 'sem vazão' in falhas[1]
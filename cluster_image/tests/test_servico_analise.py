@@ -0,0 +1,101 @@
+import http.client
+import json
+import queue
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+import cv2
+import numpy as np
+import pytest
+from servico_analise import ErroEntrada, LoteadorClip, Metricas, Servico, criar_manipulador
+
+@pytest.fixture(scope='module')
+def servidor():
+    servico = Servico(com_clip=False, tamanho_maximo_upload=1_000_000)
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), criar_manipulador(servico))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield servidor.server_address
+    servidor.shutdown()
+    servidor.server_close()
+
+def _postar(endereco, corpo, consulta='', cabecalhos=None):
+    conexao = http.client.HTTPConnection(*endereco)
+    conexao.request('POST', '/analisar' + consulta, body=corpo, headers=cabecalhos or {})
+    resposta = conexao.getresponse()
+    dados = json.loads(resposta.read())
+    conexao.close()
+    return resposta.status, dados
+
+def _png(img):
+    return cv2.imencode('.png', img)[1].tobytes()
+
+def test_imagem_valida(servidor):
+    img = np.random.default_rng(0).integers(0, 255, (120, 160, 3), dtype=np.uint8)
+    status, dados = _postar(servidor, _png(img), '?nome=x.png')
+    assert status == 200
+    assert dados['nome'] == 'x.png' and {'hsv', 'densidade', 'tracos'} <= set(dados)
+
+def test_erros_de_entrada_sao_400(servidor):
+    img = np.zeros((50, 50, 3), np.uint8)
+    assert _postar(servidor, b'lixo')[0] == 400
+    assert _postar(servidor, _png(img), '?analisadores=inexistente')[0] == 400
+    assert _postar(servidor, _png(img), '?analisadores=clip')[0] == 400
+
+def test_analisador_conferido_antes_de_decodificar(servidor):
+    status, dados = _postar(servidor, b'lixo', '?analisadores=hsv,inexistente')
+    assert status == 400 and 'inexistente' in dados['erro']
+
+def test_content_length_invalido_fecha_a_conexao(servidor):
+    # O corpo não lido não pode ser interpretado como a próxima requisição
+    with socket.create_connection(servidor, timeout=5) as conexao:
+        conexao.sendall(b'POST /analisar HTTP/1.1\r\nHost: x\r\nContent-Length: abc\r\n\r\n'
+                        b'GET /saude HTTP/1.1\r\nHost: x\r\n\r\n')
+        resposta = b''
+        while bloco := conexao.recv(4096):
+            resposta += bloco
+    assert resposta.startswith(b'HTTP/1.1 400')
+    assert b'Connection: close' in resposta
+    assert resposta.count(b'HTTP/1.1') == 1
+
+def test_upload_grande_recusado_sem_ler(servidor):
+    status, dados = _postar(servidor, b'x', cabecalhos={'Content-Length': str(10 ** 9)})
+    assert status == 413 and 'limite' in dados['erro']
+
+def test_erro_dentro_do_analisador_e_500(servidor):
+    cinza = np.random.default_rng(0).integers(0, 255, (50, 50), dtype=np.uint8)
+    assert _postar(servidor, _png(cinza), '?analisadores=hsv')[0] == 500
+
+def test_upload_ruim_nao_derruba_o_micro_lote():
+    torch = pytest.importorskip('torch')
+    pytest.importorskip('transformers')
+
+    class ModeloFalso(torch.nn.Module):
+        # Só o que classificar_lote_clip usa: get_image_features e logit_scale
+        def __init__(self):
+            super().__init__()
+            self.logit_scale = torch.nn.Parameter(torch.tensor(1.0))
+
+        def get_image_features(self, pixel_values):
+            return pixel_values.mean(dim=(2, 3))
+
+    loteador = LoteadorClip.__new__(LoteadorClip)
+    loteador.model, loteador.device = ModeloFalso(), 'cpu'
+    loteador.parametros = {'lado_menor': 32, 'recorte': (32, 32),
+                           'media': torch.zeros(1, 3, 1, 1), 'desvio': torch.ones(1, 3, 1, 1)}
+    n_categorias = 10
+    loteador.texto = torch.nn.functional.normalize(torch.randn(n_categorias, 3), dim=-1)
+    loteador.metricas = Metricas()
+    loteador.tamanho_maximo, loteador.espera = 8, 0.2
+    loteador.fila = queue.Queue()
+    threading.Thread(target=loteador._executar, daemon=True).start()
+
+    boa = np.random.default_rng(0).integers(0, 255, (40, 60, 3), dtype=np.uint8)
+    ruim = np.zeros((40, 60, 2), np.uint8)
+    with ThreadPoolExecutor(3) as executor:
+        futuros = [executor.submit(loteador.classificar, img, nome)
+                   for img, nome in ((boa, 'a'), (ruim, 'b'), (boa, 'c'))]
+        assert futuros[0].result()['nome'] == 'a'
+        assert futuros[2].result()['nome'] == 'c'
+        with pytest.raises(ErroEntrada):
+            futuros[1].result()